@@ -1,16 +1,27 @@
 """Agent模块初始化文件"""
-from .llm_base_agent import LLMBaseAgent
-from .llm_planner_agent import LLMPlannerAgent
-from .llm_crawler_agent import LLMCrawlerAgent
-from .llm_extractor_agent import LLMExtractorAgent
-from .llm_analyzer_agent import LLMAnalyzerAgent
-from .llm_writer_agent import LLMWriterAgent
+import importlib
 
-__all__ = [
-    'LLMBaseAgent',
-    'LLMPlannerAgent',
-    'LLMCrawlerAgent',
-    'LLMExtractorAgent',
-    'LLMAnalyzerAgent',
-    'LLMWriterAgent'
-]
+# 按需导入：访问 agents.LLMXxxAgent 时才加载对应模块，导入 agents 包本身不加载任何Agent
+_AGENT_MODULES = {
+    'LLMBaseAgent': '.llm_base_agent',
+    'LLMPlannerAgent': '.llm_planner_agent',
+    'LLMCrawlerAgent': '.llm_crawler_agent',
+    'LLMExtractorAgent': '.llm_extractor_agent',
+    'LLMAnalyzerAgent': '.llm_analyzer_agent',
+    'LLMWriterAgent': '.llm_writer_agent',
+}
+
+__all__ = list(_AGENT_MODULES)
+
+
+def __getattr__(name):
+    module = _AGENT_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -1,14 +1,30 @@
 """LLM增强的Analyzer Agent - 深度分析"""
 from typing import Dict, Any, List
+import contextvars
 import json
+import os
 from .llm_base_agent import LLMBaseAgent
+from utils.meme_dedup import heat_score
+from utils import tracing
+from utils.meme_stats import compute_meme_stats, format_stats_tables
+from utils.token_budget import estimate_tokens, pack_items, prompt_budget
 
 
 class LLMAnalyzerAgent(LLMBaseAgent):
     """使用LLM进行多维度深度分析 (6轮调用)"""
     
-    def __init__(self, config: Dict[str, Any] = None):
-        super().__init__("LLM-AnalyzerAgent", config)
+    # (insights字段, 日志标签, 分析方法)
+    DIMENSIONS = [
+        ('top_10_analysis', '4.1 分析Top10及传播机制', '_analyze_top_10'),
+        ('platform_comparison', '4.2 分析平台生态对比', '_analyze_platforms'),
+        ('propagation_paths', '4.3 分析跨平台传播', '_analyze_propagation'),
+        ('time_trends', '4.4 分析时间趋势', '_analyze_trends'),
+        ('cultural_insights', '4.5 分析文化洞察', '_analyze_culture'),
+        ('commercial_value', '4.6 预测商业价值', '_predict_commercial'),
+    ]
+    
+    def __init__(self, config: Dict[str, Any] = None, transport=None):
+        super().__init__("LLM-AnalyzerAgent", config, transport)
     
     def execute(self, data_path: str) -> str:
         """
@@ -25,47 +41,98 @@ class LLMAnalyzerAgent(LLMBaseAgent):
         with open(data_path, 'r', encoding='utf-8') as f:
             memes = json.load(f)
             
-        insights = {}
-        
-        # 4.1 热门梗Top10 + 传播机制
-        self.logger.info(">>> 4.1 分析Top10及传播机制...")
-        insights['top_10_analysis'] = self._analyze_top_10(memes)
-        
-        # 4.2 平台生态对比
-        self.logger.info(">>> 4.2 分析平台生态对比...")
-        insights['platform_comparison'] = self._analyze_platforms(memes)
-        
-        # 4.3 跨平台传播路径
-        self.logger.info(">>> 4.3 分析跨平台传播...")
-        insights['propagation_paths'] = self._analyze_propagation(memes)
-        
-        # 4.4 时间趋势
-        self.logger.info(">>> 4.4 分析时间趋势...")
-        insights['time_trends'] = self._analyze_trends(memes)
+        output_dir = self.config.get('output_dir', 'data/processed')
+        os.makedirs(output_dir, exist_ok=True)
         
-        # 4.5 文化洞察
-        self.logger.info(">>> 4.5 分析文化洞察...")
-        insights['cultural_insights'] = self._analyze_culture(memes)
+        # 本地确定性统计：平台计数、标签频次/共现、热度分布，供各维度提示词引用
+        stats = compute_meme_stats(memes)
+        if stats:
+            self.save_output(stats, os.path.join(output_dir, "stats.json"))
+        else:
+            self.logger.warning("未安装pandas或无数据，跳过本地统计")
+            
+        max_workers = self.config.get('max_concurrency', 1)
+        if max_workers > 1:
+            self.logger.info(f"并发执行6个分析维度 (并发上限: {max_workers})")
+            results = self._run_concurrent(memes, stats, max_workers)
+        else:
+            results = self._run_sequential(memes, stats)
         
-        # 4.6 商业价值预测
-        self.logger.info(">>> 4.6 预测商业价值...")
-        insights['commercial_value'] = self._predict_commercial(memes)
+        # 保持与顺序执行一致的字段顺序
+        insights = {key: results.get(key, "") for key, _, _ in self.DIMENSIONS}
+        failed = [key for key, value in insights.items() if not value]
+        if failed:
+            self.mark_degraded(f"{len(failed)} 个分析维度失败: {', '.join(failed)}")
         
         # 保存洞察
-        output_path = "data/processed/insights.json"
+        output_path = os.path.join(output_dir, "insights.json")
         self.save_output(insights, output_path)
         
         self.logger.info(f"✓ 深度分析完成，结果已保存至 {output_path}")
         return output_path
 
-    def _call_analysis_llm(self, prompt: str, data: List[Dict]) -> Any:
-        """通用分析调用方法"""
-        # 为了节省token，只传入必要信息，或者分批传入
-        # 这里简化处理，传入所有memes的摘要
-        memes_summary = [
-            f"{m.get('name')} ({m.get('platform')}): {m.get('description')[:50]}" 
-            for m in data
-        ]
+    def _run_dimension(self, key: str, label: str, method_name: str, memes: List[Dict], stats: Dict) -> str:
+        """执行单个分析维度，失败时返回空字符串而不影响其他维度"""
+        self.logger.info(f">>> {label}...")
+        with tracing.span(f"analyze.{key}", kind="task") as span:
+            try:
+                return getattr(self, method_name)(memes, stats) or ""
+            except Exception as e:
+                self.logger.error(f"分析维度失败 ({key}): {e}")
+                span.set(error=str(e))
+                return ""
+
+    def _run_sequential(self, memes: List[Dict], stats: Dict) -> Dict[str, str]:
+        """顺序执行所有分析维度"""
+        return {
+            key: self._run_dimension(key, label, method_name, memes, stats)
+            for key, label, method_name in self.DIMENSIONS
+        }
+
+    def _run_concurrent(self, memes: List[Dict], stats: Dict, max_workers: int) -> Dict[str, str]:
+        """使用线程池并发执行所有分析维度"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(self.DIMENSIONS))) as pool:
+            futures = {
+                key: pool.submit(contextvars.copy_context().run,
+                                 self._run_dimension, key, label, method_name, memes, stats)
+                for key, label, method_name in self.DIMENSIONS
+            }
+            return {key: future.result() for key, future in futures.items()}
+
+    def _call_analysis_llm(
+        self,
+        prompt: str,
+        data: List[Dict],
+        stats: Dict = None,
+        stats_sections: List[str] = (),
+        summary_max_tokens: int = None
+    ) -> Any:
+        """
+        通用分析调用方法
+
+        Args:
+            prompt: 分析任务提示词
+            data: 梗列表
+            stats: compute_meme_stats 的统计结果
+            stats_sections: 需要附带的统计表
+            summary_max_tokens: 梗摘要预算 (默认使用配置)；有精确统计时可以给得更少
+        """
+        stats_text = format_stats_tables(stats or {}, list(stats_sections))
+        if stats_text:
+            prompt = f"{prompt}\n\n统计数据 (本地精确计算，请直接引用，不要重新计数):\n{stats_text}"
+        
+        # 在token预算内按热度优先打包梗摘要，放不下的低热度条目被舍弃
+        budget = self._summary_budget(prompt, summary_max_tokens)
+        memes_summary = pack_items(
+            data,
+            budget,
+            render=lambda m: f"{m.get('name')} ({m.get('platform')}): {str(m.get('description') or '')[:50]}",
+            priority=lambda m: (heat_score(m.get('heat')), m.get('mentions', 1)),
+        )
+        if len(memes_summary) < len(data):
+            self.logger.warning(f"梗摘要超出预算 ({budget} tokens)，保留热度最高的 {len(memes_summary)}/{len(data)} 条")
         
         messages = [
             {"role": "system", "content": "你是一个资深的互联网文化研究员和数据分析师。"},
@@ -75,43 +142,53 @@ class LLMAnalyzerAgent(LLMBaseAgent):
         response = self.call_llm(messages, temperature=0.7)
         return response
 
-    def _analyze_top_10(self, memes: List[Dict]) -> str:
+    def _summary_budget(self, prompt: str, summary_max_tokens: int = None) -> int:
+        """梗摘要可用的token数：配置上限与上下文剩余空间取较小值"""
+        available = prompt_budget(
+            self.context_window,
+            self.config.get('max_tokens', 4000)
+        ) - estimate_tokens(prompt) - 64
+        limit = summary_max_tokens or self.config.get('summary_max_tokens', 12000)
+        return max(min(limit, available), 0)
+
+    def _analyze_top_10(self, memes: List[Dict], stats: Dict = None) -> str:
         prompt = """请从数据中选出Top 10最火的梗。
 对于每一个梗，详细分析其传播机制（为什么火？利用了什么心理？传播节点是什么？）。
 返回Markdown格式的分析。"""
-        return self._call_analysis_llm(prompt, memes)
+        return self._call_analysis_llm(prompt, memes, stats, ['heat_overall'])
 
-    def _analyze_platforms(self, memes: List[Dict]) -> str:
+    def _analyze_platforms(self, memes: List[Dict], stats: Dict = None) -> str:
         prompt = """请对比微博、B站、抖音、小红书等平台的梗文化生态。
 分析各平台产生的梗有何不同？用户互动方式有何差异？
 返回Markdown格式的分析。"""
-        return self._call_analysis_llm(prompt, memes)
+        return self._call_analysis_llm(prompt, memes, stats, ['platform_counts', 'heat_by_platform', 'tag_frequencies'],
+                                       summary_max_tokens=self.config.get('stats_summary_max_tokens', 3000))
 
-    def _analyze_propagation(self, memes: List[Dict]) -> str:
+    def _analyze_propagation(self, memes: List[Dict], stats: Dict = None) -> str:
         prompt = """分析梗的跨平台传播路径。
 通常一个梗是如何从一个小圈子（如贴吧、B站）扩散到大众平台（抖音、微博）的？
 结合数据中的例子进行说明。
 返回Markdown格式的分析。"""
-        return self._call_analysis_llm(prompt, memes)
+        return self._call_analysis_llm(prompt, memes, stats, ['platform_counts', 'tag_cooccurrence'])
 
-    def _analyze_trends(self, memes: List[Dict]) -> str:
+    def _analyze_trends(self, memes: List[Dict], stats: Dict = None) -> str:
         prompt = """分析这些梗的时间趋势。
 现在的梗生命周期是变短了还是变长了？
 有什么季节性或事件驱动的规律？
 返回Markdown格式的分析。"""
-        return self._call_analysis_llm(prompt, memes)
+        return self._call_analysis_llm(prompt, memes, stats, ['tag_frequencies'])
 
-    def _analyze_culture(self, memes: List[Dict]) -> str:
+    def _analyze_culture(self, memes: List[Dict], stats: Dict = None) -> str:
         prompt = """请提供深度的文化洞察。
 这些梗反映了当代年轻人什么样的心理状态、价值观或社会焦虑？
 例如：发疯文学、躺平、电子榨菜等背后的社会心理。
 返回Markdown格式的分析。"""
-        return self._call_analysis_llm(prompt, memes)
+        return self._call_analysis_llm(prompt, memes, stats, ['tag_frequencies', 'tag_cooccurrence'])
 
-    def _predict_commercial(self, memes: List[Dict]) -> str:
+    def _predict_commercial(self, memes: List[Dict], stats: Dict = None) -> str:
         prompt = """预测这些梗的商业价值。
 品牌如何借势营销？
 哪些梗适合商业化，哪些不适合（有风险）？
 请给出具体的营销建议。
 返回Markdown格式的分析。"""
-        return self._call_analysis_llm(prompt, memes)
+        return self._call_analysis_llm(prompt, memes, stats, ['heat_overall', 'tag_frequencies'])
@@ -1,19 +1,33 @@
 """LLM增强的基础Agent类"""
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, Optional
 import json
 import os
 from datetime import datetime
+from utils import tracing
+from utils.http_transport import HTTPStatusError
+from utils.resilience import RetryPolicy, get_shared_breaker, get_shared_latency
+from utils.token_budget import estimate_messages_tokens
 
 
 class LLMBaseAgent(ABC):
     """所有LLM Agent的基类"""
     
-    def __init__(self, name: str, config: Dict[str, Any] = None):
+    def __init__(self, name: str, config: Dict[str, Any] = None, transport=None):
         self.name = name
         self.config = config or {}
         self.logger = self._setup_logger()
+        self.transport = transport or self._setup_transport()
         self.client = self._setup_llm_client()
+        self.cache = self._setup_cache()
+        self.retry_policy = self._setup_retry_policy()
+        # 本次运行的结果是否降级 (兜底方案、输出不完整等) 及原因；降级结果不保存检查点
+        self.degraded: Optional[str] = None
+    
+    def mark_degraded(self, reason: str):
+        """标记本次运行的结果为降级结果 (编排器不会为其保存检查点，断点续跑时重新执行)"""
+        self.degraded = reason
+        self.logger.warning(f"结果已降级，不保存检查点: {reason}")
     
     def _setup_logger(self):
         """设置日志"""
@@ -29,6 +43,11 @@ class LLMBaseAgent(ABC):
             logger.addHandler(handler)
         return logger
     
+    def _setup_transport(self):
+        """获取进程内共享的HTTP传输层 (未由调用方传入时)"""
+        from utils.http_transport import get_shared_transport
+        return get_shared_transport()
+
     def _setup_llm_client(self):
         """设置LLM客户端"""
         api_key = os.getenv('DEEPSEEK_API_KEY')
@@ -45,11 +64,7 @@ class LLMBaseAgent(ABC):
             pass # Fallback to OpenAI SDK logic if requests is missing (unlikely)
 
         try:
-            from openai import OpenAI
-            client = OpenAI(
-                api_key=api_key,
-                base_url="https://api.deepseek.com"
-            )
+            client = self.transport.openai_client(api_key)
             self.logger.info("✓ DeepSeek客户端初始化成功 (OpenAI SDK)")
             return client
             
@@ -60,6 +75,31 @@ class LLMBaseAgent(ABC):
             self.logger.error(f"LLM客户端初始化失败: {e}")
             return None
     
+    def _setup_cache(self):
+        """设置响应缓存 (config['use_cache']=False 可关闭，config['cache_dir'] 指定缓存目录)"""
+        if not self.config.get('use_cache', True):
+            return None
+        try:
+            from config.llm_config import LLM_CACHE_CONFIG
+            from utils.llm_cache import get_shared_cache
+            if self.config.get('cache_dir'):
+                return get_shared_cache(dict(LLM_CACHE_CONFIG, cache_dir=self.config['cache_dir']))
+            return get_shared_cache()
+        except Exception as e:
+            self.logger.warning(f"LLM缓存初始化失败，将不使用缓存: {e}")
+            return None
+
+    def _setup_retry_policy(self):
+        """重试/对冲/熔断策略 (config['retry'] 覆盖 LLM_RETRY_CONFIG)；熔断器按服务端地址共享"""
+        from config.llm_config import LLM_RETRY_CONFIG
+        config = dict(LLM_RETRY_CONFIG, **self.config.get('retry', {}))
+        endpoint = self._endpoint
+        return RetryPolicy(
+            config,
+            breaker=get_shared_breaker(endpoint, config['breaker_failures'], config['breaker_reset']),
+            latency=get_shared_latency(f"{endpoint}|{self.name}"),
+        )
+
     def call_llm(
         self, 
         messages: list,
@@ -79,14 +119,68 @@ class LLMBaseAgent(ABC):
         Returns:
             LLM返回的文本
         """
-        if not self.client:
-            self.logger.error("LLM客户端未初始化")
-            return ""
-        
         temp = temperature or self.config.get('temperature', 0.7)
         tokens = max_tokens or self.config.get('max_tokens', 4000)
         model = self.config.get('model', 'deepseek-chat')
         
+        with tracing.span("llm.chat", kind="llm", agent=self.name, model=model) as span:
+            cache_key = None
+            if self.cache:
+                cache_key = self.cache.make_key(model, messages, temp, tokens, self._endpoint)
+                cached = self.cache.get(cache_key)
+                span.set(cache_hit=bool(cached))
+                if cached:
+                    self.logger.info(f"LLM缓存命中 ({cache_key[:12]})")
+                    return cached
+            
+            if not self._check_budget(messages, tokens):
+                span.set(error="超出上下文预算")
+                return ""
+            
+            content = self._request_completion(messages, model, temp, tokens, use_web_search)
+            span.set(response_chars=len(content))
+            
+            if self.cache and content:
+                self.cache.set(cache_key, content, model=model)
+            return content
+
+    @property
+    def _endpoint(self) -> str:
+        """LLM服务端地址 (熔断器、延迟统计和响应缓存按地址区分)"""
+        return getattr(self.transport, 'base_url', '')
+
+    @property
+    def context_window(self) -> int:
+        """模型上下文长度 (提示词+输出)：Agent配置未指定时使用 DEEPSEEK_CONFIG['context_window']"""
+        if self.config.get('context_window'):
+            return self.config['context_window']
+        from config.llm_config import DEEPSEEK_CONFIG
+        return DEEPSEEK_CONFIG.get('context_window', 64000)
+
+    def _check_budget(self, messages: list, max_tokens: int) -> bool:
+        """发送前检查提示词+输出是否超出模型上下文窗口"""
+        context_window = self.context_window
+        prompt_tokens = estimate_messages_tokens(messages)
+        if prompt_tokens + max_tokens > context_window:
+            self.logger.error(
+                f"提示词超出上下文预算: 预估 {prompt_tokens} + 输出 {max_tokens} > {context_window} tokens，已取消调用"
+            )
+            return False
+        return True
+
+    def _request_completion(
+        self,
+        messages: list,
+        model: str,
+        temp: float,
+        tokens: int,
+        use_web_search: bool = False
+    ) -> str:
+        """实际发送LLM请求 (OpenAI SDK 或共享连接池)"""
+        if not self.client:
+            self.logger.error("LLM客户端未初始化")
+            return ""
+        
         # 使用OpenAI SDK
         if self.client != "requests":
             try:
@@ -106,70 +200,210 @@ class LLMBaseAgent(ABC):
                     # 这里暂不处理复杂的tools，保持原样
                     pass
 
-                self.logger.info(f"正在调用LLM (OpenAI SDK)... Token预估: {len(str(messages))/4}")
+                self.logger.info(f"正在调用LLM (OpenAI SDK)... Token预估: {estimate_messages_tokens(messages)}")
                 response = self.client.chat.completions.create(**request_params)
                 self.logger.info("LLM调用成功")
+                if getattr(response, 'usage', None):
+                    tracing.current_span().set(
+                        prompt_tokens=response.usage.prompt_tokens,
+                        completion_tokens=response.usage.completion_tokens
+                    )
                 return response.choices[0].message.content
             except Exception as e:
                 self.logger.error(f"LLM调用失败 (OpenAI SDK): {e}")
                 return ""
         
-        # 使用urllib Fallback (Requests在Windows下处理大Payload可能崩溃)
-        else:
-            import urllib.request
-            import time
-            import json
-            
-            headers = {
-                "Authorization": f"Bearer {os.getenv('DEEPSEEK_API_KEY')}",
-                "Content-Type": "application/json",
-                "Accept": "application/json"
-            }
-            
-            data = {
-                "model": model,
-                "messages": messages,
-                "temperature": temp,
-                "max_tokens": tokens,
-                "stream": False
-            }
-            
-            try:
-                json_data = json.dumps(data).encode('utf-8')
-                print(f"DEBUG: Using urllib fallback. Payload size: {len(json_data)}", flush=True)
-                
-                retries = 3
-                for attempt in range(retries):
-                    try:
-                        req = urllib.request.Request(
-                            "https://api.deepseek.com/chat/completions",
-                            data=json_data,
-                            headers=headers,
-                            method="POST"
-                        )
-                        
-                        # 增加超时时间到300秒
-                        with urllib.request.urlopen(req, timeout=300) as response:
-                            if response.status == 200:
-                                res_body = response.read().decode('utf-8')
-                                res_json = json.loads(res_body)
-                                content = res_json['choices'][0]['message']['content']
-                                print(f"DEBUG: urllib success. Content length: {len(content)}", flush=True)
-                                return content
-                            else:
-                                print(f"DEBUG: urllib status {response.status}", flush=True)
-                    except Exception as e:
-                        print(f"DEBUG: urllib attempt {attempt+1} failed: {e}", flush=True)
-                        if attempt == retries - 1:
-                            self.logger.error(f"LLM调用失败 (urllib): {e}")
-                            return ""
-                        time.sleep(2 * (attempt + 1))
-            except Exception as e:
-                self.logger.error(f"数据准备失败: {e}")
-                return ""
-            
+        # 使用共享连接池 (http.client Keep-Alive; Requests在Windows下处理大Payload可能崩溃)
+        headers = {
+            "Authorization": f"Bearer {os.getenv('DEEPSEEK_API_KEY')}",
+            "Content-Type": "application/json",
+            "Accept": "application/json"
+        }
+        
+        data = {
+            "model": model,
+            "messages": messages,
+            "temperature": temp,
+            "max_tokens": tokens,
+            "stream": False
+        }
+        
+        span = tracing.current_span()
+        json_data = json.dumps(data).encode('utf-8')
+        self.logger.debug(f"使用共享连接池发送请求，请求体 {len(json_data)} 字节")
+        try:
+            # 退避重试、对冲和熔断见 utils/resilience.py
+            content = self.retry_policy.call(
+                lambda timeout: self._post_completion(json_data, headers, timeout, span), span
+            )
+            self.logger.debug(f"LLM调用成功，返回 {len(content)} 字")
+            return content
+        except Exception as e:
+            span.set(error=str(e))
+            self.logger.error(f"LLM调用失败 (HTTP): {e}")
             return ""
 
+    def _post_completion(self, json_data: bytes, headers: Dict[str, str], timeout: float, span) -> str:
+        """发送一次非流式请求；非200状态抛出 HTTPStatusError (携带 Retry-After 等响应头)"""
+        response = self.transport.post("/chat/completions", json_data, headers, timeout=timeout)
+        span.add(request_bytes=len(json_data), response_bytes=len(response.body))
+        if response.status != 200:
+            raise HTTPStatusError(response.status, response.headers, response.body)
+        res_json = json.loads(response.body.decode('utf-8'))
+        content = res_json['choices'][0]['message']['content']
+        usage = res_json.get('usage') or {}
+        span.set(
+            prompt_tokens=usage.get('prompt_tokens', 0),
+            completion_tokens=usage.get('completion_tokens', 0)
+        )
+        return content
+
+    def stream_llm(
+        self,
+        messages: list,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> Iterator[str]:
+        """
+        流式调用LLM API，逐段产出生成的文本
+
+        缓存命中时一次性产出完整文本；完整结束的响应写入缓存。
+        已产出部分内容后出错不再重试，调用方保留已收到的部分。
+
+        Args:
+            messages: 消息列表
+            temperature: 温度参数
+            max_tokens: 最大token数
+
+        Yields:
+            文本增量
+        """
+        temp = temperature or self.config.get('temperature', 0.7)
+        tokens = max_tokens or self.config.get('max_tokens', 4000)
+        model = self.config.get('model', 'deepseek-chat')
+
+        # 生成器跨越多次yield，Span不设为当前Span，结束时手动end
+        span = tracing.start_span("llm.stream", kind="llm", agent=self.name, model=model)
+        try:
+            cache_key = None
+            if self.cache:
+                cache_key = self.cache.make_key(model, messages, temp, tokens, self._endpoint)
+                cached = self.cache.get(cache_key)
+                span.set(cache_hit=bool(cached))
+                if cached:
+                    self.logger.info(f"LLM缓存命中 ({cache_key[:12]})")
+                    yield cached
+                    return
+
+            if not self.client:
+                self.logger.error("LLM客户端未初始化")
+                return
+
+            if not self._check_budget(messages, tokens):
+                span.set(error="超出上下文预算")
+                return
+
+            import time
+            chunks = []
+            finished = False
+            policy = self.retry_policy
+            deadline = policy.start()
+            attempt = 0
+            while True:
+                try:
+                    policy.check()
+                    start = time.time()
+                    for delta in self._stream_completion(messages, model, temp, tokens, span,
+                                                         timeout=policy.timeout(deadline)):
+                        if not chunks:
+                            self.logger.info(f"LLM首个token到达 ({time.time() - start:.1f}s)")
+                            span.set(first_token_seconds=round(time.time() - start, 3))
+                        chunks.append(delta)
+                        yield delta
+                    policy.on_success()
+                    finished = True
+                    break
+                except Exception as e:
+                    if chunks:
+                        policy.on_failure(e, attempt, deadline)
+                        self.logger.error(f"LLM流式输出中断，保留已生成的 {sum(map(len, chunks))} 字: {e}")
+                        span.set(error=str(e))
+                        self.mark_degraded(f"LLM流式输出中断: {e}")
+                        break
+                    delay = policy.on_failure(e, attempt, deadline)
+                    if delay is None:
+                        span.set(error=str(e))
+                        self.logger.error(f"LLM流式调用失败: {e}")
+                        return
+                    self.logger.debug(f"第{attempt+1}次流式请求失败: {e}，{delay:.1f}秒后重试")
+                    span.add(retries=1)
+                    time.sleep(delay)
+                    attempt += 1
+
+            span.set(response_chars=sum(map(len, chunks)), completed=finished)
+            if self.cache and finished and chunks:
+                self.cache.set(cache_key, "".join(chunks), model=model)
+        finally:
+            span.end()
+
+    def _stream_completion(self, messages: list, model: str, temp: float, tokens: int,
+                           span=tracing.NULL_SPAN, timeout: Optional[float] = None) -> Iterator[str]:
+        """发送流式请求并解析增量文本 (OpenAI SDK 或 SSE)；最后一个事件中的usage记录到span"""
+        if self.client != "requests":
+            response = self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temp,
+                max_tokens=tokens,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            for chunk in response:
+                if getattr(chunk, 'usage', None):
+                    span.set(prompt_tokens=chunk.usage.prompt_tokens,
+                             completion_tokens=chunk.usage.completion_tokens)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            return
+
+        headers = {
+            "Authorization": f"Bearer {os.getenv('DEEPSEEK_API_KEY')}",
+            "Content-Type": "application/json",
+            "Accept": "text/event-stream"
+        }
+        data = {
+            "model": model,
+            "messages": messages,
+            "temperature": temp,
+            "max_tokens": tokens,
+            "stream": True,
+            "stream_options": {"include_usage": True}
+        }
+        json_data = json.dumps(data).encode('utf-8')
+        span.add(request_bytes=len(json_data))
+
+        done = False
+        for raw_line in self.transport.stream_lines("/chat/completions", json_data, headers, timeout=timeout):
+            line = raw_line.decode('utf-8').strip()
+            if not line.startswith("data:"):
+                continue
+            payload = line[len("data:"):].strip()
+            if payload == "[DONE]":
+                # 继续读完剩余响应，连接才能归还连接池
+                done = True
+                continue
+            event = json.loads(payload)
+            if event.get('usage'):
+                span.set(prompt_tokens=event['usage'].get('prompt_tokens', 0),
+                         completion_tokens=event['usage'].get('completion_tokens', 0))
+            choices = event.get('choices') or [{}]
+            delta = choices[0].get('delta', {}).get('content')
+            if delta:
+                yield delta
+        if not done:
+            # 连接在 [DONE] 之前断开 (http.client 对中断的分块响应可能只返回EOF)，按中断处理，不写入缓存
+            raise ConnectionError("流式响应在 [DONE] 之前中断")
+
     def save_output(self, data: Any, file_path: str):
         """保存输出到文件"""
         try:
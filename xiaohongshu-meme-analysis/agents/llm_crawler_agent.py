@@ -1,27 +1,41 @@
 """LLM增强的Crawler Agent - 多源数据采集"""
 from typing import Dict, Any, List
+from urllib.parse import urlsplit
+import asyncio
+import contextvars
 import json
 import os
 import time
 from datetime import datetime
 from .llm_base_agent import LLMBaseAgent
-
-try:
-    from tavily import TavilyClient
-except ImportError:
-    TavilyClient = None
-
-try:
-    from playwright.sync_api import sync_playwright
-except ImportError:
-    sync_playwright = None
+from utils import tracing
+from utils.browser_service import BrowserCrashError, BrowserPool, load_async_playwright
+from utils.hotlist_adapters import EXTRACT_ROWS_SCRIPT, build_specs
+from utils.query_dedup import normalize_query
+from utils.rate_limiter import TokenBucket, get_shared_bucket
+from utils.raw_store import RawStore
+from utils.source_cache import get_shared_source_cache
 
 class LLMCrawlerAgent(LLMBaseAgent):
     """多工具数据采集Agent (Tavily + Playwright)"""
     
-    def __init__(self, config: Dict[str, Any] = None):
-        super().__init__("LLM-CrawlerAgent", config)
+    def __init__(self, config: Dict[str, Any] = None, transport=None, browser=None):
+        super().__init__("LLM-CrawlerAgent", config, transport)
         self.tavily_api_key = os.getenv("TAVILY_API_KEY")
+        self._http_session = None
+        # 共享的常驻浏览器 (BrowserService)，为空时每次爬取启动新浏览器
+        self.browser = browser
+        self.source_cache = self._setup_source_cache()
+    
+    def _setup_source_cache(self):
+        """设置数据源缓存 (config['use_source_cache']=False 可关闭)"""
+        if not self.config.get('use_source_cache', True):
+            return None
+        try:
+            return get_shared_source_cache()
+        except Exception as e:
+            self.logger.warning(f"数据源缓存初始化失败，将不使用缓存: {e}")
+            return None
     
     def execute(self, plan: Dict[str, Any]) -> str:
         """
@@ -40,33 +54,50 @@ class LLMCrawlerAgent(LLMBaseAgent):
         self.logger.info(f"Received plan - Tavily Queries: {tavily_queries}")
         self.logger.info(f"Received plan - Playwright Targets: {playwright_targets}")
         
-        results = {
-            "tavily_results": [],
-            "playwright_results": [],
-            "timestamp": datetime.now().isoformat()
-        }
-        
-        # 2.1 Tavily搜索
+        store = self.open_store()
+        try:
+            # 2.1 Tavily搜索
+            self.search(plan, store)
+                
+            # 2.2 Playwright爬取
+            self.crawl(plan, store)
+        finally:
+            # 中途出错也关闭文件，已写入的记录保持可用
+            output_path = self.close_store(store)
+        return output_path
+    
+    def open_store(self) -> RawStore:
+        """打开新一轮采集的原始数据存储 (JSONL，逐条追加)"""
+        path = self.config.get('raw_store_path', 'data/raw/multi_source.jsonl')
+        if self.config.get('raw_store_gzip', False) and not path.endswith('.gz'):
+            path += '.gz'
+        return RawStore(path)
+    
+    def close_store(self, store: RawStore) -> str:
+        """关闭原始数据存储，返回数据文件路径 (未采集到任何数据时标记为降级结果)"""
+        store.close()
+        if not sum(store.counts.values()):
+            self.mark_degraded("未采集到任何数据")
+        self.logger.info(f"✓ 数据采集完成，保存至 {store.path}")
+        self.logger.info(f"  - Tavily结果: {store.counts.get('tavily', 0)} 条")
+        self.logger.info(f"  - Playwright结果: {store.counts.get('playwright', 0)} 条")
+        return store.path
+    
+    def search(self, plan: Dict[str, Any], store: RawStore = None) -> List[Dict]:
+        """按计划执行Tavily搜索，结果逐条写入store (无查询时返回空列表)"""
         tavily_queries = plan.get("tavily_queries", [])
-        if tavily_queries:
-            results["tavily_results"] = self._run_tavily_search(tavily_queries)
-            
-        # 2.2 Playwright爬取
+        if not tavily_queries:
+            return []
+        return self._run_tavily_search(tavily_queries, store)
+    
+    def crawl(self, plan: Dict[str, Any], store: RawStore = None) -> List[Dict]:
+        """按计划执行Playwright爬取，结果逐条写入store (无目标时返回空列表)"""
         playwright_targets = plan.get("playwright_targets", [])
-        if playwright_targets:
-            results["playwright_results"] = self._run_playwright_crawl(playwright_targets)
-            
-        # 保存数据
-        output_path = "data/raw/multi_source.json"
-        self.save_output(results, output_path)
-        
-        self.logger.info(f"✓ 数据采集完成，保存至 {output_path}")
-        self.logger.info(f"  - Tavily结果: {len(results['tavily_results'])} 条")
-        self.logger.info(f"  - Playwright结果: {len(results['playwright_results'])} 条")
-        
-        return output_path
+        if not playwright_targets:
+            return []
+        return self._run_playwright_crawl(playwright_targets, store)
     
-    def _run_tavily_search(self, queries: List[str]) -> List[Dict]:
+    def _run_tavily_search(self, queries: List[str], store: RawStore = None) -> List[Dict]:
         """执行Tavily搜索"""
         self.logger.info("启动Tavily搜索...")
         
@@ -79,6 +110,7 @@ class LLMCrawlerAgent(LLMBaseAgent):
         # 优先使用SDK
         # if TavilyClient:
         if False: # 强制使用Requests以提高稳定性
+            from tavily import TavilyClient
             client = TavilyClient(api_key=self.tavily_api_key)
             for query in queries:
                 try:
@@ -94,9 +126,39 @@ class LLMCrawlerAgent(LLMBaseAgent):
         else:
             # Fallback to Requests
             self.logger.warning("未安装tavily-python，使用Requests Fallback")
-            import requests
-            for query in queries:
-                try:
+            max_workers = self.config.get('tavily_concurrency', 4)
+            # 同一服务端地址在进程内共用令牌桶，批量/服务模式下并发的工作流合计不超过速率限制
+            bucket = get_shared_bucket(
+                self.config.get('tavily_url', "https://api.tavily.com/search"),
+                rate=self.config.get('tavily_rate_limit', 2),
+                capacity=self.config.get('tavily_burst', 4)
+            )
+            session = self._get_http_session(max_workers)
+            
+            # 并发查询，令牌桶控制请求速率；结果按查询顺序合并
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                futures = [
+                    pool.submit(contextvars.copy_context().run, self._tavily_query, session, bucket, query, store)
+                    for query in queries
+                ]
+                for future in futures:
+                    all_results.extend(future.result())
+                
+        return all_results
+    
+    def _tavily_query(self, session, bucket: TokenBucket, query: str, store: RawStore = None) -> List[Dict]:
+        """执行单条Tavily查询，失败时返回空列表而不影响其他查询"""
+        with tracing.span("tavily.search", kind="http", query=query) as span:
+            try:
+                # 仅大小写/空白/全半角不同的查询共用缓存
+                cache_key = f"advanced|10|{normalize_query(query)}"
+                results = self.source_cache.get('tavily', cache_key) if self.source_cache else None
+                span.set(cache_hit=results is not None)
+                if results is not None:
+                    self.logger.info(f"搜索 (缓存): {query}")
+                else:
+                    bucket.acquire()
                     self.logger.info(f"搜索 (API): {query}")
                     payload = {
                         "api_key": self.tavily_api_key,
@@ -104,83 +166,170 @@ class LLMCrawlerAgent(LLMBaseAgent):
                         "search_depth": "advanced",
                         "max_results": 10
                     }
-                    response = requests.post("https://api.tavily.com/search", json=payload, timeout=30)
+                    response = session.post(self.config.get('tavily_url', "https://api.tavily.com/search"), json=payload, timeout=30)
+                    span.set(status=response.status_code, response_bytes=len(response.content))
                     response.raise_for_status()
                     data = response.json()
-                    
+                
+                    results = []
                     for res in data.get('results', []):
                         res['query'] = query
                         res['source'] = 'tavily'
-                        all_results.append(res)
-                    time.sleep(1)
-                except Exception as e:
-                    self.logger.error(f"Tavily API搜索失败 ({query}): {e}")
-                
-        return all_results
+                        results.append(res)
+                    if self.source_cache:
+                        self.source_cache.set('tavily', cache_key, results)
+            
+                if store:
+                    for res in results:
+                        store.append(res)
+                span.set(results=len(results))
+                return results
+            except Exception as e:
+                self.logger.error(f"Tavily API搜索失败 ({query}): {e}")
+                span.set(error=str(e))
+                return []
+    
+    def _get_http_session(self, pool_size: int = 4):
+        """获取复用的requests会话 (连接池)"""
+        if self._http_session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._http_session = session
+        return self._http_session
     
-    def _run_playwright_crawl(self, targets: List[str]) -> List[Dict]:
-        """执行Playwright爬取"""
+    def _run_playwright_crawl(self, targets: List[str], store: RawStore = None) -> List[Dict]:
+        """执行Playwright爬取 (多页面并发)"""
         self.logger.info("启动Playwright爬取...")
         
-        if not sync_playwright:
-            self.logger.warning("未安装 playwright，跳过爬取")
-            return []
-            
-        crawled_data = []
+        # 先查缓存：有效期内的页面直接复用，全部命中时不启动浏览器
+        results: List[Dict] = []
+        pending = []
+        seen_urls = set()
+        for target in targets:
+            url = self._get_url_for_target(target)
+            if not url:
+                self.logger.warning(f"未知目标: {target}")
+                continue
+            if url in seen_urls:
+                # 不同写法的目标映射到同一页面，只爬一次
+                self.logger.info(f"跳过重复目标: {target} ({url})")
+                continue
+            seen_urls.add(url)
+            cached = self.source_cache.get('playwright', url) if self.source_cache else None
+            if cached:
+                self.logger.info(f"爬取目标 (缓存): {target}")
+                tracing.start_span("page.fetch", kind="http", target=target, url=url, cache_hit=True).end()
+                cached = dict(cached, target=target)
+                if store:
+                    store.append(cached)
+            else:
+                pending.append((len(results), target, url))
+            results.append(cached)
         
+        if pending:
+            if not load_async_playwright():
+                self.logger.warning("未安装 playwright，跳过爬取")
+            else:
+                try:
+                    pending_targets = [(t, u) for _, t, u in pending]
+                    if self.browser:
+                        crawled = self.browser.run(self._crawl_in_browser, pending_targets, store)
+                    else:
+                        crawled = asyncio.run(self._crawl_targets_async(pending_targets, store))
+                    for (index, _, url), record in zip(pending, crawled):
+                        results[index] = record
+                        if record and self.source_cache:
+                            self.source_cache.set('playwright', url, record)
+                except Exception as e:
+                    self.logger.error(f"Playwright执行出错: {e}")
+        
+        return [item for item in results if item]
+    
+    async def _crawl_targets_async(self, targets: List[tuple], store: RawStore = None) -> List[Dict]:
+        """启动一个临时浏览器池完成本次爬取 (未使用共享的 BrowserService 时)"""
+        pool = BrowserPool(
+            contexts=1,
+            pages_per_context=self.config.get('playwright_concurrency', 4),
+            max_navigations=self.config.get('playwright_max_navigations', 20),
+        )
         try:
-            with sync_playwright() as p:
-                # 启动浏览器 (headless=True)
-                browser = p.chromium.launch(headless=True)
-                context = browser.new_context(
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-                )
-                
-                for target in targets:
-                    try:
-                        page = context.new_page()
-                        self.logger.info(f"爬取目标: {target}")
-                        
-                        url = self._get_url_for_target(target)
-                        if not url:
-                            self.logger.warning(f"未知目标: {target}")
-                            continue
-                            
-                        page.goto(url, wait_until="domcontentloaded", timeout=60000)
-                        
-                        # 等待主要内容加载
-                        page.wait_for_timeout(2000)
-
-                        
-                        # 简单的提取逻辑 (实际项目中需要根据不同网站定制选择器)
-                        # 这里我们获取页面标题和主要文本内容作为简化演示
-                        title = page.title()
-                        content = page.evaluate("() => document.body.innerText")
-                        
-                        # 截取前2000字符作为上下文
-                        cleaned_content = content[:5000].replace('\n', ' ')
-                        
-                        crawled_data.append({
-                            "source": "playwright",
-                            "target": target,
-                            "url": url,
-                            "title": title,
-                            "content_snippet": cleaned_content,
-                            "crawled_at": datetime.now().isoformat()
-                        })
-                        
-                        page.close()
-                        time.sleep(2)
-                        
-                    except Exception as e:
-                        self.logger.error(f"爬取失败 ({target}): {e}")
-                
-                browser.close()
-                
-        except Exception as e:
-            self.logger.error(f"Playwright执行出错: {e}")
+            await pool.start()
+            return await self._crawl_in_browser(pool, targets, store)
+        finally:
+            await pool.close()
+    
+    async def _crawl_in_browser(self, pool: BrowserPool, targets: List[tuple], store: RawStore = None) -> List[Dict]:
+        """从浏览器池借页面并发爬取，按域名限制并发，结果与 (目标, URL) 列表一一对应"""
+        page_limit = asyncio.Semaphore(self.config.get('playwright_concurrency', 4))
+        per_domain = self.config.get('playwright_per_domain', 1)
+        domain_limits: Dict[str, asyncio.Semaphore] = {}
+        
+        tasks = []
+        for target, url in targets:
+            domain = urlsplit(url).hostname or ""
+            if domain not in domain_limits:
+                domain_limits[domain] = asyncio.Semaphore(per_domain)
+            tasks.append(self._crawl_page_async(
+                pool, target, url, page_limit, domain_limits[domain], store
+            ))
+        return await asyncio.gather(*tasks)
+    
+    async def _crawl_page_async(self, pool: BrowserPool, target: str, url: str, page_limit, domain_limit,
+                                store: RawStore = None) -> Dict:
+        """爬取单个目标页面，失败时返回None而不影响其他页面；页面或浏览器崩溃时换新页面重试一次"""
+        async with page_limit, domain_limit:
+            span = tracing.start_span("page.fetch", kind="http", target=target, url=url, cache_hit=False)
+            try:
+                self.logger.info(f"爬取目标: {target}")
+                try:
+                    record = await self._fetch_page(pool, target, url, span)
+                except BrowserCrashError as e:
+                    self.logger.warning(f"页面崩溃，重试 ({target}): {e}")
+                    span.add(retries=1)
+                    record = await self._fetch_page(pool, target, url, span)
+                if store:
+                    store.append(record)
+                return record
+            except Exception as e:
+                self.logger.error(f"爬取失败 ({target}): {e}")
+                span.set(error=str(e))
+                return None
+            finally:
+                span.end()
+    
+    async def _fetch_page(self, pool: BrowserPool, target: str, url: str, span) -> Dict:
+        """借一个页面打开目标，在页面内按站点选择器提取热榜条目 (排名/标题/热度/链接)"""
+        specs = build_specs(target, url, self.config.get('playwright_max_items', 50))
+        async with pool.page() as page:
+            await page.goto(url, wait_until="domcontentloaded", timeout=60000)
             
-        return crawled_data
+            # 等待主要内容加载
+            await page.wait_for_timeout(2000)
+            
+            title = await page.title()
+            extracted = await page.evaluate(EXTRACT_ROWS_SCRIPT, specs)
+            rows = extracted.get('rows') or []
+            # 选择器均未命中时退回正文文本 (保留换行，便于按行处理)
+            content = "" if rows else await page.evaluate("() => document.body.innerText")
+        span.set(adapter=extracted.get('adapter'), items=len(rows),
+                 response_chars=len(json.dumps(rows, ensure_ascii=False)) + len(content))
+        
+        record = {
+            "source": "playwright",
+            "target": target,
+            "url": url,
+            "title": title,
+            "crawled_at": datetime.now().isoformat()
+        }
+        if rows:
+            record["items"] = rows
+        else:
+            record["content_snippet"] = content[:5000]
+        return record
     
     def _get_url_for_target(self, target: str) -> str:
         """根据目标名称获取URL映射"""
@@ -193,6 +342,8 @@ class LLMCrawlerAgent(LLMBaseAgent):
             "36氪": "https://36kr.com/hot-list/catalog"
         }
         
+        target_map.update(self.config.get('target_urls', {}))
+        
         # 模糊匹配
         for key, url in target_map.items():
             if key in target or target in key:
@@ -1,22 +1,29 @@
 """LLM增强的Extractor Agent - 结构化提取"""
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, Iterator, List
+import contextvars
 import json
 import os
 from .llm_base_agent import LLMBaseAgent
+from utils import tracing
+from utils.json_stream import JSONArrayStream, iter_json_array, parse_json_array
+from utils.hotlist_adapters import format_rows
+from utils.meme_dedup import deduplicate_memes
+from utils.raw_store import iter_records
+from utils.token_budget import estimate_tokens
 
 
 class LLMExtractorAgent(LLMBaseAgent):
     """使用LLM从原始数据中提取结构化梗信息"""
     
-    def __init__(self, config: Dict[str, Any] = None):
-        super().__init__("LLM-ExtractorAgent", config)
+    def __init__(self, config: Dict[str, Any] = None, transport=None):
+        super().__init__("LLM-ExtractorAgent", config, transport)
     
     def execute(self, data_path: str) -> str:
         """
         执行结构化提取
         
         Args:
-            data_path: 原始数据文件路径 (data/raw/multi_source.json)
+            data_path: 原始数据文件路径 (data/raw/multi_source.jsonl，兼容旧版 .json)
             
         Returns:
             处理后的数据文件路径 (data/processed/memes.json)
@@ -28,30 +35,64 @@ class LLMExtractorAgent(LLMBaseAgent):
             self.logger.error(f"找不到数据文件: {data_path}")
             return ""
             
-        with open(data_path, 'r', encoding='utf-8') as f:
-            raw_data = json.load(f)
-            
+        # 逐条流式读取，不把整个文件载入内存
+        memes = self.extract(iter_records(data_path))
+        return self.finalize(memes, iter_records(data_path))
+    
+    def extract(self, records: Iterable[Dict]) -> List[Dict]:
+        """
+        从原始记录中提取梗 (不含兜底、去重和保存)
+
+        records 可以只包含部分来源，便于对先完成的来源提前提取。
+        """
+        if self.config.get('chunked', False):
+            # 分块提取：覆盖全部原始记录，各块并发调用后合并
+            return self._extract_chunked(records)
+        return self._extract_single(records)
+    
+    def finalize(self, memes: List[Dict], records: Iterable[Dict]) -> str:
+        """兜底提取、模糊去重并保存结果，返回数据文件路径 (records仅在兜底时读取)"""
+        if not memes:
+            self.logger.warning("LLM提取失败，尝试使用简单的正则表达式备选方案")
+            memes = self._fallback_extract(records)
+            self.mark_degraded("LLM提取失败，使用备选方案")
+        
+        # 模糊去重：合并名称近似的梗 (平台/标签/热度合并)
+        threshold = self.config.get('dedup_threshold', 0.5)
+        if threshold:
+            before = len(memes)
+            memes = deduplicate_memes(memes, threshold=threshold)
+            self.logger.info(f"模糊去重: {before} → {len(memes)} 个梗")
+        
+        # 保存结果
+        output_dir = self.config.get('output_dir', 'data/processed')
+        os.makedirs(output_dir, exist_ok=True)
+        output_path = os.path.join(output_dir, "memes.json")
+        self.save_output(memes, output_path)
+        
+        self.logger.info(f"✓ 结构化提取完成，共提取 {len(memes)} 个梗")
+        return output_path
+    
+    def _extract_single(self, records: Iterable[Dict]) -> List[Dict]:
+        """单次提取：只取前5条搜索结果和前5条爬取结果"""
         # 准备Prompt上下文
         # 恢复正常的上下文长度，确保提取质量
-        raw_tavily = raw_data.get('tavily_results', [])[:5] # 恢复到5条
         tavily_results = []
-        for item in raw_tavily:
-            tavily_results.append({
-                "title": item.get('title'),
-                "content": item.get('content', '')[:1000], # 恢复到1000字，保留更多细节
-                "source": "tavily"
-            })
-            
-        playwright_results = raw_data.get('playwright_results', [])[:5] # 恢复到5条
-        
-        # 简化Playwright内容
         simplified_playwright = []
-        for item in playwright_results:
-            simplified_playwright.append({
-                "source": item.get('source'),
-                "target": item.get('target'),
-                "content_snippet": item.get('content_snippet', '')[:800] # 恢复到800字
-            })
+        for item in records:
+            if item.get('source') == 'tavily' and len(tavily_results) < 5: # 恢复到5条
+                tavily_results.append({
+                    "title": item.get('title'),
+                    "content": item.get('content', '')[:1000], # 恢复到1000字，保留更多细节
+                    "source": "tavily"
+                })
+            elif item.get('source') == 'playwright' and len(simplified_playwright) < 5: # 恢复到5条
+                simplified_playwright.append(self._realtime_record(item, 800))
+            if len(tavily_results) >= 5 and len(simplified_playwright) >= 5:
+                break
+        
+        if not tavily_results and not simplified_playwright:
+            return []
             
         context_data = {
             "media_reports": tavily_results,
@@ -59,22 +100,134 @@ class LLMExtractorAgent(LLMBaseAgent):
         }
         
         # 调用LLM进行提取
-        memes = self._extract_memes(context_data)
+        return self._extract_memes(context_data)
+    
+    def _extract_chunked(self, records: Iterable[Dict]) -> List[Dict]:
+        """Map-Reduce提取：全部记录按token预算分块，边读边提交并发提取，最后合并"""
+        from concurrent.futures import ThreadPoolExecutor
+        import threading
         
-        if not memes:
-            self.logger.warning("LLM提取失败，尝试使用简单的正则表达式备选方案")
-            memes = self._fallback_extract(raw_data)
+        max_workers = max(1, self.config.get('max_concurrency', 4))
+        # 限制排队中的批次数，读取速度快于提取时保持内存平稳
+        in_flight = threading.BoundedSemaphore(max_workers * 2)
+        futures = []
+        record_count = 0
         
-        # 保存结果
-        output_path = "data/processed/memes.json"
-        self.save_output(memes, output_path)
+        def submit(batch):
+            in_flight.acquire()
+            # 复制当前上下文，批次的追踪Span归入所属步骤
+            future = pool.submit(contextvars.copy_context().run, self._extract_batch, batch)
+            future.add_done_callback(lambda _: in_flight.release())
+            futures.append(future)
         
-        self.logger.info(f"✓ 结构化提取完成，共提取 {len(memes)} 个梗")
-        return output_path
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for batch, count in self._iter_batches(records, self.config.get('chunk_max_tokens', 6000)):
+                record_count += count
+                submit(batch)
+            partials = [future.result() for future in futures]
+        
+        self.logger.info(f"分块提取: {record_count} 条原始记录 → {len(futures)} 个批次")
+        return [meme for memes in partials for meme in memes]
+    
+    @staticmethod
+    def _realtime_record(item: Dict, max_chars: int) -> Dict:
+        """
+        简化一条热榜记录供Prompt使用
+
+        结构化提取的条目压缩为 "排名. 标题 (热度)" 列表并全部保留；
+        只有正文文本 (选择器未命中或旧缓存) 时截取前 max_chars 字。
+        """
+        record = {"source": item.get('source'), "target": item.get('target')}
+        if item.get('items'):
+            record["hot_list"] = format_rows(item['items'])
+        else:
+            record["content_snippet"] = (item.get('content_snippet') or '')[:max_chars]
+        return record
+    
+    def _iter_batches(self, records: Iterable[Dict], max_tokens: int) -> Iterator:
+        """按预估token数贪心打包记录，每批不超过max_tokens (单条超限时独占一批)。产出 (批次, 记录数)"""
+        record_max_chars = self.config.get('record_max_chars', 3000)
+        current = {"media_reports": [], "realtime_data": []}
+        current_tokens = 0
+        count = 0
+        for item in records:
+            if item.get('source') == 'tavily':
+                section, record = "media_reports", {
+                    "title": item.get('title'),
+                    "content": (item.get('content') or '')[:record_max_chars],
+                    "source": "tavily"
+                }
+            elif item.get('source') == 'playwright':
+                section, record = "realtime_data", self._realtime_record(item, record_max_chars)
+            else:
+                continue
+            
+            cost = estimate_tokens(json.dumps(record, ensure_ascii=False))
+            if current_tokens and current_tokens + cost > max_tokens:
+                yield current, count
+                current = {"media_reports": [], "realtime_data": []}
+                current_tokens = 0
+                count = 0
+            current[section].append(record)
+            current_tokens += cost
+            count += 1
+        if current_tokens:
+            yield current, count
+    
+    def _extract_batch(self, batch: Dict) -> List[Dict]:
+        """提取单个批次，失败时返回空列表而不影响其他批次"""
+        records = len(batch.get("media_reports", [])) + len(batch.get("realtime_data", []))
+        with tracing.span("extract.batch", kind="task", records=records) as span:
+            try:
+                memes = self._extract_memes(batch, target_count="尽可能多")
+                memes = memes if isinstance(memes, list) else []
+                span.set(memes=len(memes))
+                return memes
+            except Exception as e:
+                self.logger.error(f"批次提取失败: {e}")
+                span.set(error=str(e))
+                return []
     
-    def _extract_memes(self, data: Dict) -> List[Dict]:
+    def _extract_memes(self, data: Dict, target_count: str = "目标25-40条") -> List[Dict]:
         """使用LLM提取梗信息"""
+        if self.config.get('stream', False):
+            return list(self.stream_memes(data, target_count))
+        
+        # 重试在 call_llm 内部按统一策略进行 (退避、截止时间、熔断)，这里不再叠加重试
+        response = self.call_llm(self._build_messages(data, target_count), temperature=0.1, max_tokens=4000)
+        if not response:
+            self.logger.error("LLM提取未返回内容")
+            return []
+
+        self.logger.debug(f"LLM返回 {len(response)} 字: {response[:200]}")
+        
+        try:
+            return self._extract_json_from_response(response)
+        except Exception as e:
+            self.logger.error(f"提取JSON失败: {e}")
+            return []
+    
+    def stream_memes(self, data: Dict, target_count: str = "目标25-40条") -> Iterator[Dict]:
+        """
+        流式提取：每条梗在响应中一完整就产出，下游无需等待整个响应结束
+
+        响应被截断或中途断开时，已完整的梗照常产出。
+        """
+        parser = JSONArrayStream()
+        chunks = self.stream_llm(self._build_messages(data, target_count), temperature=0.1, max_tokens=4000)
+        for item in iter_json_array(chunks, parser):
+            if isinstance(item, dict):
+                yield item
         
+        if parser.truncated:
+            self.logger.warning(f"LLM响应不完整，已恢复 {parser.items} 条完整记录")
+        elif not parser.started:
+            self.logger.error("LLM响应中没有JSON数组")
+        if parser.errors:
+            self.logger.warning(f"跳过 {parser.errors} 条无法解析的记录")
+    
+    def _build_messages(self, data: Dict, target_count: str) -> List[Dict]:
+        """构建提取提示词"""
         system_prompt = """你是一个专业的数据结构化专家。
 你的任务是从杂乱的搜索结果和爬取数据中，提取出清晰的"网络热梗"信息。
 
@@ -90,7 +243,7 @@ class LLMExtractorAgent(LLMBaseAgent):
         user_prompt = f"""以下是收集到的多源数据：
 {json.dumps(data, ensure_ascii=False, indent=2)}
 
-请从中提取所有识别到的热梗信息（目标25-40条）。
+请从中提取所有识别到的热梗信息（{target_count}）。
 返回JSON数组：
 [
   {{
@@ -103,89 +256,51 @@ class LLMExtractorAgent(LLMBaseAgent):
   ...
 ]"""
 
-        messages = [
+        return [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
         ]
-        
-        # 增加超时时间和重试
-        import time
-        max_retries = 3
-        for i in range(max_retries):
-            try:
-                print(f"DEBUG: Attempting to call LLM (Attempt {i+1}/{max_retries})...")
-                response = self.call_llm(messages, temperature=0.1, max_tokens=4000)
-                if response:
-                    break
-                else:
-                    print("DEBUG: Empty response from LLM, retrying...")
-                    time.sleep(2)
-            except Exception as e:
-                print(f"DEBUG: Error calling LLM: {e}, retrying...")
-                time.sleep(2)
-        
-        if not response:
-            self.logger.error("Failed to get response from LLM after retries")
-            return []
-
-        print(f"DEBUG: LLM Response length: {len(response)}")
-        print(f"DEBUG: LLM Response preview: {response[:200]}")
-        
-        try:
-            return self._extract_json_from_response(response)
-        except Exception as e:
-            self.logger.error(f"提取JSON失败: {e}")
-            return []
 
-    def _extract_json_from_response(self, response: str) -> Any:
-        """从响应中提取JSON"""
-        import re
-        
-        # 尝试直接解析
-        try:
-            return json.loads(response)
-        except:
-            pass
-            
-        # 尝试提取代码块
-        match = re.search(r'```(?:json)?\s*(\[.*\])\s*```', response, re.DOTALL)
-        if match:
-            return json.loads(match.group(1))
-            
-        # 尝试提取数组
-        match = re.search(r'\[.*\]', response, re.DOTALL)
-        if match:
-            return json.loads(match.group(0))
-            
-        raise ValueError("无法提取JSON数组")
+    def _extract_json_from_response(self, response: str) -> List[Any]:
+        """从响应中提取JSON数组 (增量扫描，截断的响应返回已完整的元素)"""
+        return parse_json_array(response)
 
-    def _fallback_extract(self, raw_data: Dict) -> List[Dict]:
+    def _fallback_extract(self, records: Iterable[Dict]) -> List[Dict]:
         """备选提取方案，当LLM失败时使用"""
-        memes = []
-        # 简单提取playwright的热搜数据
-        playwright_results = raw_data.get('playwright_results', [])
-        for item in playwright_results:
-            if item.get('content_snippet'):
-                # 假设内容片段的第一行可能是标题
-                lines = item.get('content_snippet', '').split('\n')
-                title = lines[0] if lines else "未知热梗"
-                memes.append({
-                    "name": title[:20],
-                    "platform": item.get('source', 'unknown'),
+        playwright_memes = []
+        tavily_memes = []
+        for item in records:
+            if item.get('source') == 'playwright':
+                # 简单提取playwright的热搜数据：有结构化条目时每条即一个候选热梗
+                for row in item.get('items') or []:
+                    if len(playwright_memes) >= 10:
+                        break
+                    playwright_memes.append({
+                        "name": row.get('title', '')[:20],
+                        "platform": item.get('target') or item.get('source', 'unknown'),
+                        "heat": row.get('heat') or "未知",
+                        "description": f"{item.get('target', '')}第{row.get('rank')}名: {row.get('title', '')}"[:100],
+                        "tags": ["自动提取", "备选方案"]
+                    })
+                if not item.get('items') and item.get('content_snippet') and len(playwright_memes) < 10:
+                    # 假设内容片段的第一行可能是标题
+                    lines = item.get('content_snippet', '').split('\n')
+                    title = lines[0] if lines else "未知热梗"
+                    playwright_memes.append({
+                        "name": title[:20],
+                        "platform": item.get('source', 'unknown'),
+                        "heat": "未知",
+                        "description": item.get('content_snippet', '')[:100],
+                        "tags": ["自动提取", "备选方案"]
+                    })
+            elif item.get('source') == 'tavily' and len(tavily_memes) < 10:
+                # 简单提取Tavily的标题
+                tavily_memes.append({
+                    "name": item.get('title', '未知')[:20],
+                    "platform": "media",
                     "heat": "未知",
-                    "description": item.get('content_snippet', '')[:100],
+                    "description": item.get('content', '')[:100],
                     "tags": ["自动提取", "备选方案"]
                 })
-        
-        # 简单提取Tavily的标题
-        tavily_results = raw_data.get('tavily_results', [])
-        for item in tavily_results:
-            memes.append({
-                "name": item.get('title', '未知')[:20],
-                "platform": "media",
-                "heat": "未知",
-                "description": item.get('content', '')[:100],
-                "tags": ["自动提取", "备选方案"]
-            })
             
-        return memes[:10] # 限制返回数量
+        return (playwright_memes + tavily_memes)[:10] # 限制返回数量
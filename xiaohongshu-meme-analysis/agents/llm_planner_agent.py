@@ -1,15 +1,23 @@
 """LLM增强的Planner Agent - 智能理解用户意图"""
-from typing import Dict, Any
-import json
+from typing import Dict, Any, Optional
+import copy
+import threading
+import time
 from datetime import datetime
 from .llm_base_agent import LLMBaseAgent
+from utils.json_stream import parse_json_object
+from utils.query_dedup import normalize_plan, normalize_user_input
+
+# 进程内共享的规划结果记忆 {规范化需求: (时间戳, 计划)}，批量运行的多个Planner共用
+_plan_memo: Dict[str, tuple] = {}
+_plan_memo_lock = threading.Lock()
 
 
 class LLMPlannerAgent(LLMBaseAgent):
     """使用LLM理解用户自然语言输入，生成智能执行计划"""
     
-    def __init__(self, config: Dict[str, Any] = None):
-        super().__init__("LLM-PlannerAgent", config)
+    def __init__(self, config: Dict[str, Any] = None, transport=None):
+        super().__init__("LLM-PlannerAgent", config, transport)
     
     def execute(self, user_input: str) -> Dict[str, Any]:
         """
@@ -23,6 +31,14 @@ class LLMPlannerAgent(LLMBaseAgent):
         """
         self.log_execution("开始智能规划", user_input)
         
+        # 规范化后相同的需求 (仅空白/标点/全半角不同) 在有效期内直接复用上次的计划
+        memo_key = normalize_user_input(user_input)
+        memoized = self._memo_get(memo_key)
+        if memoized:
+            self.logger.info("复用近期相同需求的规划结果")
+            memoized['user_input'] = user_input
+            return memoized
+        
         # 构建LLM提示词
         system_prompt = """你是一个专业的数据分析规划专家。
 你的任务是理解用户的分析需求，并生成详细的执行计划。
@@ -59,7 +75,7 @@ class LLMPlannerAgent(LLMBaseAgent):
         
         # 解析LLM返回的JSON
         try:
-            plan = self._extract_json_from_response(response)
+            plan = self._dedupe_plan(self._extract_json_from_response(response))
             
             # 补充元数据
             plan['user_input'] = user_input
@@ -67,34 +83,49 @@ class LLMPlannerAgent(LLMBaseAgent):
             plan['planner_type'] = 'llm'
             
             self.log_execution("✓ LLM规划完成", plan)
+            self._memo_set(memo_key, plan)
             return plan
             
         except Exception as e:
             self.logger.error(f"解析LLM响应失败: {e}")
             return self._fallback_planning(user_input)
     
+    def _dedupe_plan(self, plan: Dict[str, Any]) -> Dict[str, Any]:
+        """搜索词与爬取目标去重 (近似重复的查询只保留一条)"""
+        before = len(plan.get('tavily_queries') or []), len(plan.get('playwright_targets') or [])
+        plan = normalize_plan(plan, self.config.get('query_dedup_threshold', 0.8))
+        after = len(plan['tavily_queries']), len(plan['playwright_targets'])
+        if after != before:
+            self.logger.info(f"计划去重: 查询 {before[0]} → {after[0]}，目标 {before[1]} → {after[1]}")
+        return plan
+    
+    def _memo_get(self, key: str) -> Optional[Dict[str, Any]]:
+        ttl = self.config.get('memo_ttl_minutes', 60) * 60
+        with _plan_memo_lock:
+            entry = _plan_memo.get(key)
+        if not entry or ttl <= 0 or time.time() - entry[0] > ttl:
+            return None
+        return copy.deepcopy(entry[1])
+    
+    def _memo_set(self, key: str, plan: Dict[str, Any]):
+        """记忆LLM规划结果 (兜底计划不记忆，下次仍尝试LLM规划)"""
+        if self.config.get('memo_ttl_minutes', 60) <= 0:
+            return
+        with _plan_memo_lock:
+            _plan_memo[key] = (time.time(), copy.deepcopy(plan))
+    
+    @staticmethod
+    def clear_memo():
+        """清空规划结果记忆"""
+        with _plan_memo_lock:
+            _plan_memo.clear()
+    
     def _extract_json_from_response(self, response: str) -> Dict:
-        """从LLM响应中提取JSON"""
-        # 尝试直接解析
-        try:
-            return json.loads(response)
-        except:
-            pass
-        
-        # 尝试提取代码块中的JSON
-        import re
-        json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', response, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group(1))
-        
-        # 尝试找到第一个完整的JSON对象
-        json_match = re.search(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', response, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group(0))
-        
-        raise ValueError("无法从响应中提取JSON")
+        """从LLM响应中提取第一个完整的JSON对象"""
+        return parse_json_object(response)
     
     def _fallback_planning(self, user_input: str) -> Dict[str, Any]:
+        self.mark_degraded("LLM规划失败，使用兜底规划")
         """传统规划方法（兜底）"""
         import re
         
@@ -122,7 +153,7 @@ class LLMPlannerAgent(LLMBaseAgent):
         
         self.logger.info(f"Fallback plan generated queries: {base_queries}")
         
-        return {
+        return self._dedupe_plan({
             'intent': intent,
             'tavily_queries': base_queries,
             'playwright_targets': ['微博热搜', '知乎热榜', 'B站热门'],
@@ -141,4 +172,4 @@ class LLMPlannerAgent(LLMBaseAgent):
             'user_input': user_input,
             'created_at': datetime.now().isoformat(),
             'planner_type': 'fallback'
-        }
+        })
@@ -4,13 +4,14 @@ import json
 import os
 from datetime import datetime
 from .llm_base_agent import LLMBaseAgent
+from utils.token_budget import prompt_budget, truncate_to_tokens
 
 
 class LLMWriterAgent(LLMBaseAgent):
     """使用LLM生成深度分析报告"""
     
-    def __init__(self, config: Dict[str, Any] = None):
-        super().__init__("LLM-WriterAgent", config)
+    def __init__(self, config: Dict[str, Any] = None, transport=None):
+        super().__init__("LLM-WriterAgent", config, transport)
     
     def execute(self, insights_path: str) -> str:
         """
@@ -27,35 +28,83 @@ class LLMWriterAgent(LLMBaseAgent):
         with open(insights_path, 'r', encoding='utf-8') as f:
             insights = json.load(f)
             
-        # 整合所有洞察内容
-        report_content = self._generate_report(insights)
-        
-        # 保存报告
         date_str = datetime.now().strftime("%Y%m%d")
-        output_dir = "reports"
+        output_dir = self.config.get('report_dir', 'reports')
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
             
         output_path = f"{output_dir}/report_{date_str}.md"
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(report_content)
+        if self.config.get('stream', False):
+            # 流式生成，边收边写，中途失败也保留已生成部分 (中断时由 stream_llm 标记为降级结果)
+            written = self._stream_report(insights, output_path)
+        else:
+            # 整合所有洞察内容
+            report_content = self._generate_report(insights) or ""
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(report_content)
+            written = len(report_content)
+        if not written:
+            self.mark_degraded("报告生成失败，内容为空")
             
         self.logger.info(f"✓ 报告生成完成，已保存至 {output_path}")
         return output_path
     
     def _generate_report(self, insights: Dict[str, Any]) -> str:
         """使用LLM生成完整报告"""
+        messages = self._build_messages(insights)
+        response = self.call_llm(messages, temperature=0.7, max_tokens=self.config.get('max_tokens', 4000))
+        return response
+    
+    def _stream_report(self, insights: Dict[str, Any], output_path: str) -> int:
+        """
+        流式生成报告并增量追加写入文件，返回已写入字数
+
+        进度写入日志 (带Agent名称的整行输出)，批量/服务模式下多个工作流并发生成时不会互相覆盖。
+        """
+        messages = self._build_messages(insights)
+        written = 0
+        last_reported = 0
         
-        # 组装上下文
-        context = f"""
-【Top 10分析】: {insights.get('top_10_analysis', '')}
-【平台对比】: {insights.get('platform_comparison', '')}
-【传播路径】: {insights.get('propagation_paths', '')}
-【时间趋势】: {insights.get('time_trends', '')}
-【文化洞察】: {insights.get('cultural_insights', '')}
-【商业价值】: {insights.get('commercial_value', '')}
-"""
+        with open(output_path, 'w', encoding='utf-8') as f:
+            for delta in self.stream_llm(messages, temperature=0.7, max_tokens=self.config.get('max_tokens', 4000)):
+                f.write(delta)
+                f.flush()
+                written += len(delta)
+                if written - last_reported >= 200:
+                    self.logger.debug(f"✍️ 已生成 {written} 字...")
+                    last_reported = written
+        
+        self.logger.info(f"✍️ 已生成 {written} 字")
+        if not written:
+            self.logger.warning("流式生成未返回任何内容")
+        return written
+    
+    def _section_budget(self) -> int:
+        """每部分素材可用的token数"""
+        available = prompt_budget(
+            self.context_window,
+            self.config.get('max_tokens', 4000)
+        ) - 1000  # 扣除系统提示词与格式说明
+        return max(min(self.config.get('section_max_tokens', 6000), available // 6), 0)
+    
+    def _build_messages(self, insights: Dict[str, Any]) -> list:
+        """根据洞察素材组装写作提示词"""
+        
+        # 组装上下文 (每部分素材平分token预算，超出部分截断)
+        section_budget = self._section_budget()
+        sections = [
+            ('Top 10分析', 'top_10_analysis'),
+            ('平台对比', 'platform_comparison'),
+            ('传播路径', 'propagation_paths'),
+            ('时间趋势', 'time_trends'),
+            ('文化洞察', 'cultural_insights'),
+            ('商业价值', 'commercial_value'),
+        ]
+        context = "\n" + "".join(
+            f"【{label}】: {truncate_to_tokens(str(insights.get(key) or ''), section_budget)}\n"
+            for label, key in sections
+        )
         
         system_prompt = """你是一个专业的商业分析师和内容创作者。
 你需要基于提供的分析素材，撰写一份高质量的《网络热梗深度分析报告》。
@@ -85,10 +134,7 @@ class LLMWriterAgent(LLMBaseAgent):
 
 请直接输出Markdown格式的报告内容。"""
         
-        messages = [
+        return [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt}
         ]
-        
-        response = self.call_llm(messages, temperature=0.7, max_tokens=4000)
-        return response
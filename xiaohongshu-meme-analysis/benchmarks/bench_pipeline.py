@@ -0,0 +1,236 @@
+"""
+端到端压测：启动本地模拟的 DeepSeek / Tavily / 热榜站点，运行完整工作流
+
+用法:
+    python benchmarks/bench_pipeline.py --runs 4 --concurrency 2 --llm-latency 0.2
+    python benchmarks/bench_pipeline.py --output bench.json
+    python benchmarks/bench_pipeline.py --baseline bench.json --tolerance 0.2
+
+每次运行在独立进程和独立临时目录中执行 (工作流使用相对路径 data/...)，
+汇总各阶段耗时 (p50/max)、并发吞吐量和峰值内存；
+指定 --baseline 时，任一阶段p50或总耗时超出基线 (1+tolerance) 倍则以非零状态退出。
+"""
+from typing import Any, Dict, List
+import argparse
+import copy
+import contextlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from benchmarks.mock_servers import MockDeepSeekServer, MockTavilyServer, StaticSiteServer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _peak_rss_mb() -> float:
+    """当前进程的峰值常驻内存 (MB)，不支持的平台返回0"""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux以KB为单位，macOS以字节为单位
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _run_once(job: Dict[str, Any]) -> Dict[str, Any]:
+    """在子进程中运行一次完整工作流 (环境变量须在导入配置前设置)"""
+    os.environ.update(job["env"])
+    os.chdir(job["workdir"])
+    sys.path.insert(0, project_root)
+
+    from config.llm_config import AGENT_CONFIG
+    from workflows.llm_orchestrator import LLMOrchestrator
+
+    config = copy.deepcopy(AGENT_CONFIG)
+    config["crawler"]["target_urls"] = job["target_urls"]
+    for stage_config in config.values():
+        stage_config["use_cache"] = False
+    config["crawler"]["use_source_cache"] = False
+
+    if not job["verbose"]:
+        logging.disable(logging.INFO)
+    output = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output if not job["verbose"] else sys.stdout):
+        orchestrator = LLMOrchestrator(config)
+        orchestrator.run(job["user_input"])
+    wall = time.perf_counter() - start
+
+    return {
+        "wall": round(wall, 3),
+        "timings": orchestrator.last_timings,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(int(round(pct * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def summarize(runs: List[Dict[str, Any]], elapsed: float, concurrency: int) -> Dict[str, Any]:
+    """汇总多次运行的阶段耗时、吞吐量和内存"""
+    stages: Dict[str, List[float]] = {}
+    for run in runs:
+        for stage, timing in run["timings"].items():
+            stages.setdefault(stage, []).append(timing["duration"])
+
+    walls = [run["wall"] for run in runs]
+    return {
+        "runs": len(runs),
+        "concurrency": concurrency,
+        "elapsed": round(elapsed, 3),
+        "throughput_per_min": round(len(runs) / elapsed * 60, 2) if elapsed else 0.0,
+        "wall": {
+            "p50": round(statistics.median(walls), 3),
+            "p95": round(_percentile(walls, 0.95), 3),
+            "max": round(max(walls), 3),
+        },
+        "stages": {
+            stage: {
+                "p50": round(statistics.median(durations), 3),
+                "max": round(max(durations), 3),
+            }
+            for stage, durations in stages.items()
+        },
+        "peak_rss_mb": max(run["peak_rss_mb"] for run in runs),
+    }
+
+
+def compare(summary: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """与基线对比，返回退化项说明 (为空表示无退化)"""
+    regressions = []
+    checks = [("wall", summary["wall"]["p50"], baseline.get("wall", {}).get("p50"))]
+    for stage, timing in summary["stages"].items():
+        checks.append((stage, timing["p50"], baseline.get("stages", {}).get(stage, {}).get("p50")))
+
+    for name, current, previous in checks:
+        # 基线中耗时极短的阶段波动大，不参与比较
+        if previous is None or previous < 0.05:
+            continue
+        if current > previous * (1 + tolerance):
+            regressions.append(f"{name}: {previous:.3f}s → {current:.3f}s (+{current / previous - 1:.0%})")
+    return regressions
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    lines = [
+        f"运行次数: {summary['runs']} (并发 {summary['concurrency']})",
+        f"总耗时: {summary['elapsed']:.2f}s  吞吐量: {summary['throughput_per_min']:.2f} 次/分钟",
+        f"单次耗时: p50 {summary['wall']['p50']:.2f}s / p95 {summary['wall']['p95']:.2f}s / "
+        f"max {summary['wall']['max']:.2f}s",
+        f"峰值内存: {summary['peak_rss_mb']:.1f} MB",
+        "阶段耗时 (p50 / max):",
+    ]
+    for stage, timing in summary["stages"].items():
+        lines.append(f"   {stage:<18} {timing['p50']:>7.3f}s / {timing['max']:>7.3f}s")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="热梗分析工作流端到端压测 (本地模拟服务)")
+    parser.add_argument("--runs", type=int, default=3, help="总运行次数")
+    parser.add_argument("--concurrency", type=int, default=1, help="同时运行的工作流数")
+    parser.add_argument("--llm-latency", type=float, default=0.1, help="模拟DeepSeek每次请求的延迟 (秒)")
+    parser.add_argument("--llm-chars", type=int, default=2000, help="模拟分析/写作响应的字数")
+    parser.add_argument("--memes-per-call", type=int, default=12, help="模拟提取每次返回的梗数量")
+    parser.add_argument("--tavily-latency", type=float, default=0.1, help="模拟Tavily每次请求的延迟 (秒)")
+    parser.add_argument("--tavily-results", type=int, default=10, help="每个查询返回的结果数")
+    parser.add_argument("--tavily-chars", type=int, default=800, help="每条搜索结果的字数")
+    parser.add_argument("--site-latency", type=float, default=0.05, help="静态热榜站点的响应延迟 (秒)")
+    parser.add_argument("--user-input", default="分析2025年全网最火的梗")
+    parser.add_argument("--output", help="将汇总结果写入JSON文件")
+    parser.add_argument("--baseline", help="与之前 --output 保存的基线对比")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的耗时增幅 (默认20%%)")
+    parser.add_argument("--verbose", action="store_true", help="输出工作流日志")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    deepseek = MockDeepSeekServer(latency=args.llm_latency, content_chars=args.llm_chars,
+                                  memes_per_call=args.memes_per_call).start()
+    tavily = MockTavilyServer(latency=args.tavily_latency, results=args.tavily_results,
+                              content_chars=args.tavily_chars).start()
+    site = StaticSiteServer(latency=args.site_latency).start()
+
+    env = {
+        "DEEPSEEK_API_KEY": "bench-key",
+        "DEEPSEEK_BASE_URL": deepseek.url,
+        "TAVILY_API_KEY": "bench-key",
+        "TAVILY_API_URL": tavily.search_url,
+        "LLM_CACHE_ENABLED": "0",
+        "SOURCE_CACHE_ENABLED": "0",
+    }
+    target_urls = {name: site.page_url(path) for name, path in
+                   [("微博热搜", "weibo"), ("知乎热榜", "zhihu"), ("B站热门", "bilibili")]}
+
+    print(f"🧪 模拟服务: DeepSeek {deepseek.url} | Tavily {tavily.url} | 热榜站点 {site.url}")
+    try:
+        with tempfile.TemporaryDirectory(prefix="meme-bench-") as root:
+            jobs = []
+            for i in range(args.runs):
+                workdir = os.path.join(root, f"run-{i}")
+                os.makedirs(os.path.join(workdir, "data", "processed"), exist_ok=True)
+                jobs.append({
+                    "env": env,
+                    "workdir": workdir,
+                    "target_urls": target_urls,
+                    "user_input": args.user_input,
+                    "verbose": args.verbose,
+                })
+
+            # 每次运行使用独立进程：峰值内存互不干扰，也不共享进程内缓存和连接池
+            context = multiprocessing.get_context("spawn")
+            start = time.perf_counter()
+            with context.Pool(processes=max(args.concurrency, 1), maxtasksperchild=1) as pool:
+                runs = pool.map(_run_once, jobs)
+            elapsed = time.perf_counter() - start
+    finally:
+        deepseek.stop()
+        tavily.stop()
+        site.stop()
+
+    summary = summarize(runs, elapsed, args.concurrency)
+    summary["mock_requests"] = {
+        "deepseek": deepseek.request_count,
+        "tavily": tavily.request_count,
+        "site": site.request_count,
+    }
+    print(format_summary(summary))
+    print(f"模拟服务请求数: {summary['mock_requests']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"💾 结果已保存: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(summary, baseline, args.tolerance)
+        if regressions:
+            print("❌ 性能退化:")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print(f"✓ 未超出基线 (容差 {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+启动耗时基准：在全新的Python进程中测量CLI和工作流的冷启动时间
+
+用法:
+    python benchmarks/bench_startup.py --runs 10
+    python benchmarks/bench_startup.py --importtime 15
+    python benchmarks/bench_startup.py --output startup.json
+    python benchmarks/bench_startup.py --baseline startup.json --tolerance 0.3
+
+每个场景重复运行 --runs 次，每次都是新进程 (模块缓存为空)，在临时目录中执行，
+报告 p50/min/max；--importtime N 额外列出 `llm_main.py --help` 中累计导入耗时最高的N个模块。
+指定 --baseline 时，任一场景p50超出基线 (1+tolerance) 倍则以非零状态退出。
+"""
+from typing import Any, Dict, List
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN_SCRIPT = os.path.join(project_root, "llm_main.py")
+
+# 场景名 → 子进程参数
+SCENARIOS = {
+    "interpreter": ["-c", "pass"],
+    "help": [MAIN_SCRIPT, "--help"],
+    "import_main": ["-c", "import llm_main"],
+    "orchestrator": ["-c", "from workflows.llm_orchestrator import LLMOrchestrator; LLMOrchestrator()"],
+    "all_agents": ["-c", "from agents import LLMPlannerAgent, LLMCrawlerAgent, LLMExtractorAgent, "
+                         "LLMAnalyzerAgent, LLMWriterAgent"],
+}
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = project_root + os.pathsep + env.get("PYTHONPATH", "")
+    env.setdefault("DEEPSEEK_API_KEY", "bench-key")
+    env["TRACING_ENABLED"] = "0"
+    return env
+
+
+def time_scenario(args: List[str], runs: int, workdir: str) -> List[float]:
+    """运行 runs 次，返回每次的墙钟耗时 (秒)"""
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=workdir, env=_env(), check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def top_imports(args: List[str], workdir: str, limit: int) -> List[Dict[str, Any]]:
+    """用 -X importtime 找出累计导入耗时最高的顶层模块"""
+    result = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=workdir, env=_env(),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if cumulative.strip().isdigit() and not name.startswith("   "):
+            # 缩进最少的是被直接导入的模块，子模块的耗时已包含在父模块中
+            modules.append({"module": name.strip(), "ms": round(int(cumulative) / 1000, 1)})
+    return sorted(modules, key=lambda item: -item["ms"])[:limit]
+
+
+def summarize(results: Dict[str, List[float]]) -> Dict[str, Any]:
+    return {
+        name: {
+            "p50": round(statistics.median(durations), 4),
+            "min": round(min(durations), 4),
+            "max": round(max(durations), 4),
+        }
+        for name, durations in results.items()
+    }
+
+
+def compare(summary: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """与基线对比，返回退化项说明 (为空表示无退化)"""
+    regressions = []
+    for name, timing in summary["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name, {}).get("p50")
+        if previous and timing["p50"] > previous * (1 + tolerance):
+            regressions.append(f"{name}: {previous:.3f}s → {timing['p50']:.3f}s (+{timing['p50'] / previous - 1:.0%})")
+    return regressions
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    lines = [f"启动耗时 ({summary['runs']} 次，p50 / min / max):"]
+    for name, timing in summary["scenarios"].items():
+        lines.append(f"   {name:<14} {timing['p50']:>7.3f}s / {timing['min']:>7.3f}s / {timing['max']:>7.3f}s")
+    if summary.get("top_imports"):
+        lines.append("`llm_main.py --help` 导入耗时最高的模块:")
+        for item in summary["top_imports"]:
+            lines.append(f"   {item['module']:<40} {item['ms']:>8.1f} ms")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="CLI与工作流冷启动耗时基准")
+    parser.add_argument("--runs", type=int, default=5, help="每个场景的运行次数")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS),
+                        help="只运行指定场景 (可重复)，默认全部")
+    parser.add_argument("--importtime", type=int, default=0, metavar="N",
+                        help="列出 --help 调用中导入耗时最高的N个模块")
+    parser.add_argument("--output", help="将汇总结果写入JSON文件")
+    parser.add_argument("--baseline", help="与之前 --output 保存的基线对比")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="允许的耗时增幅 (默认30%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    names = args.scenario or list(SCENARIOS)
+
+    with tempfile.TemporaryDirectory(prefix="meme-startup-") as workdir:
+        results = {name: time_scenario(SCENARIOS[name], max(args.runs, 1), workdir) for name in names}
+        summary = {"runs": max(args.runs, 1), "scenarios": summarize(results)}
+        if args.importtime:
+            summary["top_imports"] = top_imports(SCENARIOS["help"], workdir, args.importtime)
+    print(format_summary(summary))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"💾 结果已保存: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(summary, baseline, args.tolerance)
+        if regressions:
+            print("❌ 启动耗时退化:")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print(f"✓ 未超出基线 (容差 {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
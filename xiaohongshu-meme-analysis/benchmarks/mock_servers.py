@@ -0,0 +1,236 @@
+"""本地模拟服务 (DeepSeek / Tavily / 静态热榜站点)，用于压测和测试，不消耗API额度"""
+from typing import Any, Dict, List
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import hashlib
+import json
+import threading
+import time
+
+
+# 模拟提取结果使用的梗名称池 (不同批次返回有重叠的子集，使去重逻辑也参与压测)
+MEME_NAMES = [
+    "City不City", "偷感", "班味", "松弛感", "发疯文学", "电子榨菜", "特种兵旅游", "命运的齿轮",
+    "显眼包", "搭子", "情绪价值", "泼天的富贵", "遥遥领先", "尊嘟假嘟", "鼠鼠我啊", "公主请上车",
+    "多巴胺穿搭", "挖呀挖", "淄博烧烤", "孔乙己的长衫", "美拉德", "小孩哥", "硬控", "包的",
+    "红温", "出片", "city walk", "i人e人", "精神状态良好", "水灵灵地", "草台班子", "偷感很重",
+    "人机", "哈基米", "牛马", "已老实求放过", "我嘞个豆", "没苦硬吃", "班味太重", "你是懂xx的",
+]
+PLATFORMS = ["微博", "B站", "抖音", "小红书", "知乎"]
+TAGS = ["情绪", "打工人", "旅游", "社交", "消费", "娱乐", "自嘲", "网络用语"]
+
+
+class MockServer:
+    """
+    本地HTTP模拟服务基类
+
+    在后台线程中运行 ThreadingHTTPServer，端口由系统分配；
+    latency 为每个请求返回前的固定延迟 (秒)。
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.request_count = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockServer":
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                mock._handle(self, None)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                mock._handle(self, json.loads(body or b"{}"))
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handle(self, handler: BaseHTTPRequestHandler, payload: Any):
+        with self._lock:
+            self.request_count += 1
+        if self.latency:
+            time.sleep(self.latency)
+        self.respond(handler, payload)
+
+    def respond(self, handler: BaseHTTPRequestHandler, payload: Any):
+        raise NotImplementedError
+
+    def send(self, handler: BaseHTTPRequestHandler, body: bytes, content_type: str = "application/json"):
+        handler.send_response(200)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+        self._count_bytes(len(body))
+
+    def _count_bytes(self, size: int):
+        with self._lock:
+            self.bytes_sent += size
+
+
+class MockDeepSeekServer(MockServer):
+    """
+    模拟 DeepSeek /chat/completions
+
+    按系统提示词返回对应阶段的内容：规划返回JSON计划，提取返回JSON梗数组，
+    分析/写作返回 content_chars 字的Markdown。支持 stream=True 的SSE响应。
+    malformed=True 时所有响应都是无法解析的文本 (用于测试兜底逻辑)。
+    """
+
+    def __init__(self, latency: float = 0.0, content_chars: int = 2000, memes_per_call: int = 12,
+                 stream_chunks: int = 20, queries: int = 4, malformed: bool = False):
+        super().__init__(latency)
+        self.content_chars = content_chars
+        self.memes_per_call = memes_per_call
+        self.stream_chunks = stream_chunks
+        self.queries = queries
+        self.malformed = malformed
+        self.usage_tokens = 0
+
+    def respond(self, handler: BaseHTTPRequestHandler, payload: Dict[str, Any]):
+        messages = payload.get("messages", [])
+        content = self._content_for(messages)
+        prompt_chars = sum(len(str(m.get("content", ""))) for m in messages)
+        with self._lock:
+            self.usage_tokens += prompt_chars // 2 + len(content) // 2
+
+        if payload.get("stream"):
+            self._send_stream(handler, content)
+            return
+        body = json.dumps({
+            "choices": [{"message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_chars // 2, "completion_tokens": len(content) // 2},
+        }, ensure_ascii=False).encode("utf-8")
+        self.send(handler, body)
+
+    def _content_for(self, messages: List[Dict]) -> str:
+        if self.malformed:
+            return "抱歉，我暂时无法生成结果。"
+        system = str(messages[0].get("content", "")) if messages else ""
+        seed = int(hashlib.md5(str(messages[-1].get("content", "")).encode("utf-8")).hexdigest(), 16) if messages else 0
+
+        if "规划" in system:
+            return "```json\n" + json.dumps({
+                "intent": "trend_analysis",
+                "tavily_queries": [f"2025网络热梗 维度{i + 1}" for i in range(self.queries)],
+                "playwright_targets": ["微博热搜", "知乎热榜", "B站热门"],
+            }, ensure_ascii=False) + "\n```"
+
+        if "结构化" in system:
+            memes = []
+            for i in range(self.memes_per_call):
+                index = (seed + i * 7) % len(MEME_NAMES)
+                memes.append({
+                    "name": MEME_NAMES[index],
+                    "platform": PLATFORMS[index % len(PLATFORMS)],
+                    "heat": f"{(index + 1) * 37}万",
+                    "description": f"{MEME_NAMES[index]}的含义与用法说明。" * 3,
+                    "tags": [TAGS[index % len(TAGS)], TAGS[(index + 3) % len(TAGS)]],
+                })
+            return json.dumps(memes, ensure_ascii=False)
+
+        paragraph = "这是模拟生成的分析内容，用于压测报告长度与写入速度。"
+        text = (paragraph * (self.content_chars // len(paragraph) + 1))[:self.content_chars]
+        return "## 模拟分析\n\n" + text
+
+    def _send_stream(self, handler: BaseHTTPRequestHandler, content: str):
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+
+        def write_chunk(data: bytes):
+            handler.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self._count_bytes(len(data))
+
+        step = max(len(content) // max(self.stream_chunks, 1), 1)
+        for i in range(0, len(content), step):
+            event = {"choices": [{"delta": {"content": content[i:i + step]}}]}
+            write_chunk(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+        write_chunk(b"data: [DONE]\n\n")
+        handler.wfile.write(b"0\r\n\r\n")
+
+
+class MockTavilyServer(MockServer):
+    """模拟 Tavily /search，每个查询返回 results 条、每条 content_chars 字的结果"""
+
+    def __init__(self, latency: float = 0.0, results: int = 10, content_chars: int = 800):
+        super().__init__(latency)
+        self.results = results
+        self.content_chars = content_chars
+
+    @property
+    def search_url(self) -> str:
+        return f"{self.url}/search"
+
+    def respond(self, handler: BaseHTTPRequestHandler, payload: Dict[str, Any]):
+        query = (payload or {}).get("query", "")
+        count = min(int((payload or {}).get("max_results", self.results)), self.results)
+        sentence = f"关于「{query}」的媒体报道，提到了{'、'.join(MEME_NAMES[:5])}等热梗。"
+        content = (sentence * (self.content_chars // len(sentence) + 1))[:self.content_chars]
+        body = json.dumps({
+            "query": query,
+            "results": [
+                {
+                    "title": f"{query} - 报道{i + 1}",
+                    "url": f"https://news.example.com/{abs(hash(query)) % 10000}/{i}",
+                    "content": content,
+                    "score": round(1 - i * 0.05, 2),
+                }
+                for i in range(count)
+            ],
+        }, ensure_ascii=False).encode("utf-8")
+        self.send(handler, body)
+
+
+class StaticSiteServer(MockServer):
+    """静态热榜站点：任意路径返回一个包含 items 条热榜条目的HTML页面"""
+
+    def __init__(self, latency: float = 0.0, items: int = 50):
+        super().__init__(latency)
+        self.items = items
+
+    def page_url(self, name: str) -> str:
+        return f"{self.url}/{name}"
+
+    def respond(self, handler: BaseHTTPRequestHandler, payload: Any):
+        rows = "\n".join(
+            f'<li class="hot-item"><span class="rank">{i + 1}</span>'
+            f'<a href="/topic/{i}">{MEME_NAMES[i % len(MEME_NAMES)]}</a>'
+            f'<span class="heat">{(self.items - i) * 1000}</span></li>'
+            for i in range(self.items)
+        )
+        html = (
+            f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>热榜 {handler.path}</title></head>"
+            f"<body><h1>实时热榜</h1><ol>{rows}</ol></body></html>"
+        )
+        self.send(handler, html.encode("utf-8"), content_type="text/html; charset=utf-8")
@@ -8,10 +8,86 @@ load_dotenv()
 # DeepSeek API配置
 DEEPSEEK_CONFIG = {
     'api_key': os.getenv('DEEPSEEK_API_KEY', ''),
-    'base_url': 'https://api.deepseek.com',
+    'base_url': os.getenv('DEEPSEEK_BASE_URL', 'https://api.deepseek.com'),  # 压测时指向本地模拟服务
     'model': 'deepseek-chat',  # 或 deepseek-coder
     'temperature': 0.7,
     'max_tokens': 4000,
+    'context_window': 64000,  # deepseek-chat上下文长度 (提示词+输出)
+    'pool_size': 8,  # 共享连接池保留的空闲Keep-Alive连接数
+    'timeout': 300,  # 单次请求超时 (秒)
+}
+
+# LLM请求容错配置 (Agent配置中的 'retry' 字典可覆盖单个Agent)
+LLM_RETRY_CONFIG = {
+    'max_attempts': 4,  # 最多尝试次数 (含首次)
+    'backoff_base': 1.0,  # 指数退避基数 (秒)，第n次重试前随机等待 [0, base*2^n]；有Retry-After时以其为准
+    'backoff_max': 30,  # 单次等待上限 (秒)
+    'request_timeout': 180,  # 单次请求超时 (秒)
+    'deadline': 600,  # 单次调用含全部重试的总时长上限 (秒)
+    'hedge': False,  # 对冲请求：首个请求超过近期耗时分位数仍未返回时再发一个副本，先返回者生效 (增加token消耗)
+    'hedge_percentile': 0.95,
+    'hedge_min_delay': 5,  # 对冲延迟下限 (秒)
+    'hedge_min_samples': 10,  # 耗时样本不足时不对冲
+    'breaker_failures': 5,  # 连续服务端失败次数达到后熔断，期间直接失败
+    'breaker_reset': 30,  # 熔断后经过该时长 (秒) 放行一次试探请求
+}
+
+# LLM响应缓存配置 (相同请求直接复用磁盘结果)
+LLM_CACHE_CONFIG = {
+    'enabled': os.getenv('LLM_CACHE_ENABLED', '1') != '0',
+    'cache_dir': 'data/cache/llm',
+    'max_age_hours': 24 * 7,  # 超过该时长的缓存失效
+    'max_size_mb': 200,  # 缓存目录总大小上限，超出后淘汰最旧条目
+}
+
+# 阶段检查点配置 (断点续跑时恢复输入未变化的阶段产物)
+CHECKPOINT_CONFIG = {
+    'run_dir': 'data/runs',
+    'max_entries': 200,  # 保留的阶段产物数上限，超出后删除最久未使用的
+    'max_age_days': 7,  # 超过该时长未使用的阶段产物被删除
+}
+
+# 数据源缓存配置 (相同的Tavily查询/爬取页面在有效期内直接复用)
+SOURCE_CACHE_CONFIG = {
+    'enabled': os.getenv('SOURCE_CACHE_ENABLED', '1') != '0',
+    'cache_dir': 'data/cache/sources',
+    'ttl_minutes': {
+        'tavily': 360,  # 媒体搜索结果变化慢
+        'playwright': 15,  # 热榜页面变化快
+    },
+    'default_ttl_minutes': 60,
+    'max_size_mb': 100,
+}
+
+# 运行追踪配置 (每次运行导出一个JSON：步骤/LLM调用/HTTP请求的耗时、字节、token)
+TRACING_CONFIG = {
+    'enabled': os.getenv('TRACING_ENABLED', '1') != '0',
+    'trace_dir': 'data/traces',
+}
+
+# 浏览器池配置 (批量/服务模式下常驻的浏览器，多次爬取和运行之间复用)
+BROWSER_POOL_CONFIG = {
+    'contexts': 2,  # 启动时预先创建的浏览器上下文数
+    'pages_per_context': 2,  # 每个上下文同时借出的页面数上限
+    'max_navigations': 20,  # 页面导航该次数后关闭重建，避免长时间运行内存增长
+}
+
+# 服务模式配置 (python llm_main.py --serve)
+SERVICE_CONFIG = {
+    'host': os.getenv('SERVICE_HOST', '127.0.0.1'),
+    'port': int(os.getenv('SERVICE_PORT', '8765')),
+    'max_workers': 2,  # 同时执行的任务数
+    'max_queue': 50,  # 排队任务上限，超出时拒绝提交 (HTTP 429)
+    'max_jobs': 200,  # 保留的任务记录数，超出后删除最早完成的任务
+    'data_root': 'data/service',  # 每个需求的原始数据/中间结果目录
+    'report_root': 'reports/service',  # 报告写入 <report_root>/<需求>/<任务ID>/，同一需求的多个任务互不覆盖
+    'warm_browser': True,  # 启动时在后台预先启动浏览器
+}
+
+# 热梗历史库配置 (SQLite，记录每次运行提取出的梗)
+HISTORY_CONFIG = {
+    'enabled': True,
+    'db_path': 'data/memes.db',
 }
 
 # Web Search配置
@@ -27,12 +103,25 @@ AGENT_CONFIG = {
         'model': 'deepseek-chat',
         'temperature': 0.3,  # 规划需要更精确
         'max_tokens': 2000,
+        'query_dedup_threshold': 0.8,  # 搜索词字符相似度阈值，近似重复的查询只保留一条
+        'memo_ttl_minutes': 60,  # 相同需求 (忽略空白/标点) 在该时长内复用规划结果，0则关闭
     },
     'crawler': {
         'model': 'deepseek-chat',
         'temperature': 0.5,
         'max_tokens': 4000,
         'use_web_search': True,
+        'tavily_concurrency': 4,  # Tavily并发查询数
+        'tavily_rate_limit': 2,  # Tavily每秒请求数上限 (令牌桶补充速率，进程内所有工作流合计；0为不限速)
+        'tavily_burst': 4,  # 令牌桶容量，允许的瞬时突发请求数
+        'playwright_concurrency': 4,  # 同时打开的页面数
+        'playwright_per_domain': 1,  # 同一域名同时打开的页面数
+        'playwright_max_navigations': 20,  # 临时浏览器池中页面导航该次数后重建 (共享浏览器池见 BROWSER_POOL_CONFIG)
+        'playwright_max_items': 50,  # 每个热榜页面最多提取的条目数 (按站点选择器在页面内提取)
+        'raw_store_path': 'data/raw/multi_source.jsonl',  # 原始结果逐条追加写入 (JSONL)
+        'raw_store_gzip': False,  # 为True时写入 .jsonl.gz
+        'tavily_url': os.getenv('TAVILY_API_URL', 'https://api.tavily.com/search'),  # 压测时指向本地模拟服务
+        'target_urls': {},  # 覆盖/补充热榜目标URL，例如 {'微博热搜': 'http://127.0.0.1:8000/weibo'}
         'search_keywords': [
             '2025年热梗',
             '网络流行语',
@@ -41,15 +130,34 @@ AGENT_CONFIG = {
             '年度热词'
         ]
     },
+    'extractor': {
+        'model': 'deepseek-chat',
+        'temperature': 0.1,
+        'max_tokens': 4000,
+        'chunked': True,  # 分块提取全部原始记录 (False则只取前5条搜索+前5条爬取)
+        'chunk_max_tokens': 6000,  # 每批原始数据的token预算
+        'record_max_chars': 3000,  # 单条记录截断长度
+        'max_concurrency': 4,  # 并发提取的批次数
+        'stream': True,  # 流式提取，每条梗在响应中完整后立即解析，截断的响应也保留已完整的记录
+        'dedup_threshold': 0.5,  # 名称n-gram相似度阈值，近似的梗合并 (0则关闭去重)
+        'output_dir': 'data/processed',  # memes.json 输出目录
+    },
     'analyzer': {
         'model': 'deepseek-chat',
         'temperature': 0.7,
         'max_tokens': 8000,
+        'max_concurrency': 6,  # 6个分析维度并发调用，设为1则顺序执行
+        'summary_max_tokens': 12000,  # 梗摘要token预算，超出时按热度保留
+        'stats_summary_max_tokens': 3000,  # 平台对比已有精确统计表，只附带少量高热度梗摘要
+        'output_dir': 'data/processed',  # insights.json / stats.json 输出目录
     },
     'writer': {
         'model': 'deepseek-chat',
         'temperature': 0.8,  # 写作需要更多创造性
-        'max_tokens': 8000,
+        'max_tokens': 8000,  # 报告输出上限，素材预算按此预留输出空间
+        'stream': True,  # 流式生成报告，边生成边写入文件
+        'section_max_tokens': 6000,  # 每部分分析素材的token上限
+        'report_dir': 'reports',  # 报告输出目录
     }
 }
 
@@ -9,11 +9,59 @@ load_dotenv()
 project_root = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, project_root)
 
-from workflows.llm_orchestrator import LLMOrchestrator
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    import argparse
+    parser = argparse.ArgumentParser(description="全网热梗分析系统 (Agentic Workflow)")
+    parser.add_argument('user_input', nargs='?', help="分析需求，例如 '分析2025年全网最火的梗'")
+    parser.add_argument('--resume', action='store_true', help="断点续跑：跳过输入和配置未变化的阶段")
+    parser.add_argument('--batch', metavar='FILE', help="批量模式：从文件读取需求 (每行一个)，每个需求生成一份报告")
+    parser.add_argument('--serve', action='store_true', help="服务模式：启动HTTP服务接收分析任务 (见 workflows/service.py)")
+    parser.add_argument('--host', help="服务模式监听地址 (默认 SERVICE_CONFIG['host'])")
+    parser.add_argument('--port', type=int, help="服务模式监听端口 (默认 SERVICE_CONFIG['port'])")
+    parser.add_argument('--workers', type=int, help="同时运行的需求数 (批量模式默认4，服务模式默认 SERVICE_CONFIG['max_workers'])")
+    return parser.parse_args(argv)
+
+
+def run_batch(args):
+    """批量模式：多个需求共用连接池、缓存和浏览器，非交互运行"""
+    from workflows.batch import BatchRunner, load_queries
+    
+    for key in ('DEEPSEEK_API_KEY', 'TAVILY_API_KEY'):
+        if not os.getenv(key):
+            print(f"⚠️  未检测到 {key}")
+    
+    queries = load_queries(args.batch)
+    if not queries:
+        print(f"❌ 需求文件为空: {args.batch}")
+        return 1
+    
+    with BatchRunner(max_workers=args.workers or 4) as runner:
+        summary = runner.run(queries, resume=args.resume)
+    return 0 if summary['failed'] == 0 else 1
+
+
+def run_service(args):
+    """服务模式：常驻进程通过HTTP接收任务，浏览器、连接池和缓存在任务之间保持常驻"""
+    from workflows.service import MemeService
+    
+    for key in ('DEEPSEEK_API_KEY', 'TAVILY_API_KEY'):
+        if not os.getenv(key):
+            print(f"⚠️  未检测到 {key}")
+    
+    MemeService(host=args.host, port=args.port, max_workers=args.workers).serve_forever()
+    return 0
 
 
 def main():
     """主函数"""
+    args = parse_args()
+    if args.batch:
+        sys.exit(run_batch(args))
+    if args.serve:
+        sys.exit(run_service(args))
+    
     print("=" * 60)
     print("🤖 全网热梗分析系统 (Agentic Workflow)")
     print("🔥 Tavily搜索 + Playwright爬虫 + DeepSeek深度分析")
@@ -42,9 +90,8 @@ def main():
     os.makedirs('output', exist_ok=True)
     
     # 获取用户输入
-    import sys
-    if len(sys.argv) > 1:
-        user_input = sys.argv[1]
+    if args.user_input:
+        user_input = args.user_input
         print(f"\n使用命令行参数输入: {user_input}")
     else:
         print("\n请输入你想分析的内容：")
@@ -59,11 +106,12 @@ def main():
         if not user_input:
             user_input = default_query
     
-    # 运行工作流
+    # 运行工作流 (解析参数后再导入，--help 等调用无需加载工作流模块)
+    from workflows.llm_orchestrator import LLMOrchestrator
     orchestrator = LLMOrchestrator()
     
     try:
-        report_path = orchestrator.run(user_input)
+        report_path = orchestrator.run(user_input, resume=args.resume)
         
         # 询问是否查看报告
         print("\n是否查看报告摘要? (y/n)")
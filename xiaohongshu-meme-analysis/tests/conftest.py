@@ -0,0 +1,8 @@
+"""pytest公共配置"""
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def deepseek_api_key(monkeypatch):
+    """测试期间使用假的 DEEPSEEK_API_KEY (请求均发往本地模拟服务)，测试结束后恢复原环境变量"""
+    monkeypatch.setenv('DEEPSEEK_API_KEY', 'test-key')
@@ -0,0 +1,50 @@
+"""测试分析维度的并发执行"""
+import sys
+import os
+import json
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from agents.llm_analyzer_agent import LLMAnalyzerAgent
+from benchmarks.mock_servers import MockDeepSeekServer
+from utils.http_transport import HTTPTransport
+
+MEMES = [
+    {"name": "班味", "platform": "微博", "heat": "520万", "description": "上班的疲惫感", "tags": ["打工人"]},
+    {"name": "City不City", "platform": "抖音", "heat": "300万", "description": "外国博主句式", "tags": ["旅游"]},
+]
+
+
+def _analyze(server, tmp_path, name: str, max_concurrency: int) -> dict:
+    memes_path = os.path.join(str(tmp_path), "memes.json")
+    with open(memes_path, "w", encoding="utf-8") as f:
+        json.dump(MEMES, f, ensure_ascii=False)
+    agent = LLMAnalyzerAgent({'use_cache': False, 'max_concurrency': max_concurrency,
+                              'output_dir': os.path.join(str(tmp_path), name)},
+                             transport=HTTPTransport(server.url))
+
+    def broken(memes, stats):
+        raise RuntimeError("boom")
+
+    agent._analyze_platforms = broken
+    with open(agent.execute(memes_path), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_concurrent_matches_sequential_when_dimension_fails(tmp_path):
+    """单个维度失败时其余维度照常完成，并发结果的字段和顺序与顺序执行一致"""
+    with MockDeepSeekServer() as server:
+        concurrent = _analyze(server, tmp_path, "concurrent", max_concurrency=6)
+        sequential = _analyze(server, tmp_path, "sequential", max_concurrency=1)
+
+    keys = [key for key, _, _ in LLMAnalyzerAgent.DIMENSIONS]
+    assert list(concurrent) == keys
+    assert concurrent == sequential
+    assert concurrent['platform_comparison'] == ""
+    assert all(concurrent[key] for key in keys if key != 'platform_comparison')
+
+
+if __name__ == '__main__':
+    import tempfile
+    os.environ.setdefault('DEEPSEEK_API_KEY', 'test-key')
+    test_concurrent_matches_sequential_when_dimension_fails(tempfile.mkdtemp())
+    print("✓ 测试通过: LLMAnalyzerAgent")
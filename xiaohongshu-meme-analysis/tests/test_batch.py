@@ -0,0 +1,38 @@
+"""测试批量运行的需求读取与目录划分"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from workflows.batch import load_queries, query_config, query_slug
+
+
+def test_load_queries(tmp_path):
+    """忽略空行和注释，重复需求只保留一次"""
+    path = os.path.join(str(tmp_path), "queries.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# 每晚报告\n分析2025年热梗\n\n  分析B站梗文化  \n分析2025年热梗\n")
+    assert load_queries(path) == ["分析2025年热梗", "分析B站梗文化"]
+
+
+def test_per_query_paths():
+    """同一需求目录稳定，不同需求的中间结果和报告互不覆盖"""
+    assert query_slug("分析2025年热梗") == query_slug("分析2025年热梗")
+    assert query_slug("分析2025年热梗") != query_slug("分析2024年热梗")
+
+    base = {"writer": {"stream": True}}
+    config = query_config(base, "a-1234", "data/batch", "reports/batch")
+    assert "report_dir" not in base["writer"]
+    assert config["crawler"]["raw_store_path"] == os.path.join("data/batch", "a-1234", "raw", "multi_source.jsonl")
+    assert config["analyzer"]["output_dir"] == config["extractor"]["output_dir"]
+    assert config["writer"]["report_dir"] == os.path.join("reports/batch", "a-1234")
+
+    job_config = query_config(base, "a-1234", "data/batch", "reports/batch", run_id="job1")
+    assert job_config["writer"]["report_dir"] == os.path.join("reports/batch", "a-1234", "job1")
+    assert job_config["crawler"]["raw_store_path"] == config["crawler"]["raw_store_path"]
+
+
+if __name__ == '__main__':
+    import tempfile
+    test_load_queries(tempfile.mkdtemp())
+    test_per_query_paths()
+    print("✓ 测试通过: 批量运行")
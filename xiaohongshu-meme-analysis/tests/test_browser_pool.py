@@ -0,0 +1,235 @@
+"""测试浏览器池的页面复用、回收和崩溃重启 (使用内存中的模拟浏览器，不启动Chromium)"""
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from agents.llm_crawler_agent import LLMCrawlerAgent
+from utils.browser_service import BrowserCrashError, BrowserPool
+
+
+class FakePage:
+    def __init__(self, browser):
+        self.browser = browser
+        self.closed = False
+        self.url = None
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def is_closed(self):
+        return self.closed
+
+    async def goto(self, url, **kwargs):
+        if "crash-browser" in url and not self.browser.chromium.crashed:
+            # 模拟浏览器进程崩溃 (只崩溃一次)：连接断开，当前页面报错
+            self.browser.chromium.crashed = True
+            self.browser.connected = False
+            raise RuntimeError("Target page, context or browser has been closed")
+        if "crash-page" in url:
+            self.handlers["crash"](self)
+            raise RuntimeError("Page crashed")
+        if "timeout" in url:
+            raise TimeoutError("Navigation timeout")
+        self.url = url
+
+    async def wait_for_timeout(self, ms):
+        pass
+
+    async def title(self):
+        return f"标题 {self.url}"
+
+    async def evaluate(self, script, arg=None):
+        if arg is None:
+            return "第一行\n第二行"
+        # 结构化提取：知乎页面命中站点规则，其他页面选择器均未命中
+        if "zhihu" not in self.url:
+            return {"adapter": None, "rows": []}
+        return {"adapter": arg[0]["name"], "rows": [
+            {"rank": 1, "title": "班味", "heat": "520 万热度", "link": "http://zhihu/q/1"},
+            {"rank": 2, "title": "city不city", "heat": "", "link": ""},
+        ]}
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+
+    async def new_page(self):
+        page = FakePage(self.browser)
+        self.browser.pages.append(page)
+        return page
+
+
+class FakeBrowser:
+    def __init__(self, chromium):
+        self.connected = True
+        self.chromium = chromium
+        self.pages = []
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self, **options):
+        return FakeContext(self)
+
+    async def close(self):
+        self.connected = False
+
+
+class FakeChromium:
+    def __init__(self):
+        self.launches = 0
+        self.crashed = False
+
+    async def launch(self, **options):
+        self.launches += 1
+        return FakeBrowser(self)
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.chromium = FakeChromium()
+
+    async def stop(self):
+        pass
+
+
+def _pool(**kwargs) -> BrowserPool:
+    pool = BrowserPool(**kwargs)
+    pool._playwright = FakePlaywright()
+    return pool
+
+
+async def _visit(pool, url):
+    async with pool.page() as page:
+        await page.goto(url)
+        return page
+
+
+def test_pages_reused_and_recycled():
+    """页面归还后复用，达到导航次数后重建"""
+    async def scenario():
+        pool = _pool(contexts=1, pages_per_context=1, max_navigations=2)
+        await pool.start()
+        first = await _visit(pool, "http://a")
+        assert await _visit(pool, "http://b") is first
+        assert first.closed
+        third = await _visit(pool, "http://c")
+        assert third is not first
+        await pool.close()
+        return pool.stats
+
+    stats = asyncio.run(scenario())
+    assert stats["launches"] == 1
+    assert stats["pages_created"] == 2
+    assert stats["pages_recycled"] == 1
+
+
+def test_bad_page_discarded():
+    """出错或崩溃的页面被丢弃，浏览器不受影响"""
+    async def scenario():
+        pool = _pool(contexts=1, pages_per_context=2)
+        try:
+            await _visit(pool, "http://timeout")
+            assert False
+        except TimeoutError:
+            pass
+        try:
+            await _visit(pool, "http://crash-page")
+            assert False
+        except BrowserCrashError:
+            pass
+        page = await _visit(pool, "http://ok")
+        await pool.close()
+        return pool.stats, page
+
+    stats, page = asyncio.run(scenario())
+    assert stats["pages_discarded"] == 2
+    assert stats["restarts"] == 0
+    assert page.url == "http://ok"
+
+
+def test_cancelled_task_releases_page():
+    """使用页面的任务被取消时页面被关闭并释放名额，之后可正常借出新页面"""
+    async def scenario():
+        pool = _pool(contexts=1, pages_per_context=1)
+        borrowed = asyncio.Event()
+        pages = []
+
+        async def hold():
+            async with pool.page() as page:
+                pages.append(page)
+                borrowed.set()
+                await asyncio.Event().wait()
+
+        task = asyncio.ensure_future(hold())
+        await borrowed.wait()
+        task.cancel()
+        try:
+            await task
+            assert False
+        except asyncio.CancelledError:
+            pass
+        open_pages = list(pool._open_pages)
+        page = await asyncio.wait_for(_visit(pool, "http://ok"), timeout=1)
+        await pool.close()
+        return pool.stats, pages[0], open_pages, page
+
+    stats, cancelled, open_pages, page = asyncio.run(scenario())
+    assert cancelled.closed
+    assert open_pages == [0]
+    assert stats["pages_discarded"] == 1
+    assert page is not cancelled
+
+
+def test_stale_idle_page_closed():
+    """空闲期间崩溃的页面在下次借出时被关闭丢弃，而不是只从池中移除"""
+    async def scenario():
+        pool = _pool(contexts=1, pages_per_context=1)
+        first = await _visit(pool, "http://a")
+        first.handlers["crash"](first)
+        second = await _visit(pool, "http://b")
+        await pool.close()
+        return pool.stats, first, second
+
+    stats, first, second = asyncio.run(scenario())
+    assert first.closed
+    assert second is not first
+    assert stats["pages_discarded"] == 1
+    assert stats["pages_created"] == 2
+
+
+def test_crawler_recovers_from_browser_crash():
+    """浏览器进程崩溃后自动重启，崩溃的目标重试一次，其他目标照常完成"""
+    async def scenario():
+        pool = _pool(contexts=2, pages_per_context=2)
+        agent = LLMCrawlerAgent({'use_cache': False, 'use_source_cache': False})
+        records = await agent._crawl_in_browser(pool, [
+            ("微博热搜", "http://weibo/crash-browser"),
+            ("知乎热榜", "http://zhihu/hot"),
+        ])
+        await pool.close()
+        return records, pool
+
+    records, pool = asyncio.run(scenario())
+    assert [record["target"] for record in records] == ["微博热搜", "知乎热榜"]
+    assert records[0]["content_snippet"] == "第一行\n第二行"
+    assert [row["title"] for row in records[1]["items"]] == ["班味", "city不city"]
+    assert "content_snippet" not in records[1]
+    assert pool.stats["restarts"] == 1
+    assert pool._playwright is None
+
+
+if __name__ == '__main__':
+    os.environ.setdefault('DEEPSEEK_API_KEY', 'test-key')
+    test_pages_reused_and_recycled()
+    test_bad_page_discarded()
+    test_cancelled_task_releases_page()
+    test_stale_idle_page_closed()
+    test_crawler_recovers_from_browser_crash()
+    print("✓ 测试通过: 浏览器池")
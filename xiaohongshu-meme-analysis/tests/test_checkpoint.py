@@ -0,0 +1,57 @@
+"""测试阶段检查点的恢复与淘汰"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from workflows.checkpoint import StageCheckpoint
+
+
+def _age(checkpoint: StageCheckpoint, stage: str, fingerprint: str, seconds: float):
+    """把阶段产物的最近使用时间调早 seconds 秒"""
+    past = time.time() - seconds
+    os.utime(os.path.join(checkpoint.run_dir, f"{stage}-{fingerprint}", "meta.json"), (past, past))
+
+
+def test_save_and_load(tmp_path):
+    """数据型产物原样恢复，文件型产物复制回原路径"""
+    checkpoint = StageCheckpoint(str(tmp_path / "runs"))
+    output = tmp_path / "report.md"
+    output.write_text("报告", encoding="utf-8")
+
+    fingerprint = checkpoint.fingerprint('writer', {"a": 1})
+    assert checkpoint.fingerprint('writer', {"a": 1}, {"stream": True}) != fingerprint
+    checkpoint.save('writer', fingerprint, str(output))
+    checkpoint.save('planner', fingerprint, {"queries": ["热梗"]})
+
+    output.unlink()
+    assert checkpoint.load('writer', fingerprint) == str(output)
+    assert output.read_text(encoding="utf-8") == "报告"
+    assert checkpoint.load('planner', fingerprint) == {"queries": ["热梗"]}
+    assert checkpoint.load('planner', "missing") is None
+
+
+def test_prune_by_count_and_age(tmp_path):
+    """超过保留数量时删除最久未使用的产物 (恢复也算使用)，过期产物直接删除"""
+    checkpoint = StageCheckpoint(str(tmp_path / "runs"), max_entries=2, max_age_days=1)
+    checkpoint.save('planner', "a", {"n": 1})
+    checkpoint.save('planner', "b", {"n": 2})
+    _age(checkpoint, 'planner', "a", 60)
+    _age(checkpoint, 'planner', "b", 120)
+    assert checkpoint.load('planner', "b") == {"n": 2}
+
+    checkpoint.save('planner', "c", {"n": 3})
+    assert checkpoint.load('planner', "a") is None
+    assert checkpoint.load('planner', "b") == {"n": 2}
+
+    _age(checkpoint, 'planner', "c", 2 * 86400)
+    checkpoint.save('planner', "d", {"n": 4})
+    assert sorted(os.listdir(checkpoint.run_dir)) == ["planner-b", "planner-d"]
+
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+    test_save_and_load(Path(tempfile.mkdtemp()))
+    test_prune_by_count_and_age(Path(tempfile.mkdtemp()))
+    print("✓ 测试通过: StageCheckpoint")
@@ -0,0 +1,40 @@
+"""测试依赖图调度器"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from workflows.dag import DAGScheduler
+
+
+def test_independent_nodes_overlap():
+    """互不依赖的节点并行执行，下游拿到依赖结果"""
+    dag = DAGScheduler()
+    dag.add('plan', lambda _: 2)
+    dag.add('search', lambda r: time.sleep(0.3) or r['plan'] * 10, deps=['plan'])
+    dag.add('crawl', lambda r: time.sleep(0.3) or r['plan'] * 100, deps=['plan'])
+    dag.add('collect', lambda r: r['search'] + r['crawl'], deps=['search', 'crawl'])
+
+    start = time.perf_counter()
+    results = dag.run()
+    elapsed = time.perf_counter() - start
+
+    assert results['collect'] == 220
+    assert elapsed < 0.55
+    assert set(dag.timings) == {'plan', 'search', 'crawl', 'collect'}
+    assert dag.timings['collect']['start'] >= dag.timings['crawl']['end']
+
+
+def test_unknown_dependency_rejected():
+    dag = DAGScheduler()
+    try:
+        dag.add('collect', lambda r: None, deps=['missing'])
+    except ValueError:
+        return
+    raise AssertionError("未定义的依赖应抛出ValueError")
+
+
+if __name__ == '__main__':
+    test_independent_nodes_overlap()
+    test_unknown_dependency_rejected()
+    print("✓ 测试通过: DAGScheduler")
@@ -0,0 +1,50 @@
+"""测试热榜站点适配器的匹配和结构化条目在提取阶段的使用"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from agents.llm_extractor_agent import LLMExtractorAgent
+from utils.hotlist_adapters import build_specs, find_adapter, format_rows
+
+ROWS = [{"rank": i, "title": f"热梗{i}", "heat": f"{100 - i}万", "link": ""} for i in range(1, 31)]
+
+
+def test_adapter_matching():
+    """按域名优先匹配站点，地址被覆盖时按目标名称匹配，未知站点只用通用规则"""
+    assert find_adapter("微博热搜", "https://s.weibo.com/top/summary") == "weibo"
+    assert find_adapter("热榜", "https://www.zhihu.com/billboard") == "zhihu"
+    assert find_adapter("B站热门", "http://127.0.0.1:8000/bili") == "bilibili"
+    assert find_adapter("某论坛", "http://127.0.0.1:8000/x") is None
+
+    specs = build_specs("百度热搜", "https://top.baidu.com/board", limit=20)
+    assert [spec["name"] for spec in specs] == ["baidu", "generic"]
+    assert all(spec["limit"] == 20 and "hosts" not in spec for spec in specs)
+    assert [spec["name"] for spec in build_specs("某论坛", "http://x")] == ["generic"]
+
+
+def test_rows_kept_in_prompt():
+    """结构化条目全部保留为紧凑列表，只有正文文本时才截断"""
+    item = {"source": "playwright", "target": "微博热搜", "items": ROWS}
+    record = LLMExtractorAgent._realtime_record(item, 800)
+    assert len(record["hot_list"]) == 30
+    assert record["hot_list"][0] == "1. 热梗1 (99万)"
+    assert format_rows([{"rank": 2, "title": "无热度", "heat": ""}]) == ["2. 无热度"]
+
+    legacy = {"source": "playwright", "target": "微博热搜", "content_snippet": "x" * 2000}
+    assert LLMExtractorAgent._realtime_record(legacy, 800)["content_snippet"] == "x" * 800
+
+
+def test_fallback_uses_rows():
+    """LLM失败时的备选提取以每个条目作为候选热梗"""
+    agent = LLMExtractorAgent({'use_cache': False})
+    memes = agent._fallback_extract([{"source": "playwright", "target": "微博热搜", "items": ROWS}])
+    assert [meme["name"] for meme in memes] == [f"热梗{i}" for i in range(1, 11)]
+    assert memes[0]["heat"] == "99万"
+
+
+if __name__ == '__main__':
+    os.environ.setdefault('DEEPSEEK_API_KEY', 'test-key')
+    test_adapter_matching()
+    test_rows_kept_in_prompt()
+    test_fallback_uses_rows()
+    print("✓ 测试通过: 热榜站点适配器")
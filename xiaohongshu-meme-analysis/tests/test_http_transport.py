@@ -0,0 +1,97 @@
+"""测试共享HTTP传输层"""
+import sys
+import os
+import json
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from utils.http_transport import HTTPTransport
+
+
+class _EchoHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.dumps({"path": self.path, "echo": self.rfile.read(length).decode("utf-8")})
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class _StallingHandler(BaseHTTPRequestHandler):
+    """发送响应头和部分响应体后停止，模拟读取响应时超时"""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Length", "100")
+        self.end_headers()
+        self.wfile.write(b"partial")
+        self.wfile.flush()
+        time.sleep(1)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_transport_reuses_connections():
+    """连续请求复用同一Keep-Alive连接，异步版本共享连接池"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _EchoHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        transport = HTTPTransport(base_url=f"http://127.0.0.1:{server.server_port}/v1", timeout=5)
+        for i in range(3):
+            response = transport.post("/chat/completions", f"req{i}".encode("utf-8"))
+            assert response.status == 200
+            assert json.loads(response.body) == {"path": "/v1/chat/completions", "echo": f"req{i}"}
+
+        response = asyncio.run(transport.apost("/chat/completions", b"async"))
+        assert json.loads(response.body)["echo"] == "async"
+
+        stats = transport.stats()
+        assert stats["requests"] == 4
+        assert stats["connections_opened"] == 1
+        transport.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_read_timeout_closes_connection():
+    """读取响应超时时关闭连接，不归还连接池"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StallingHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        transport = HTTPTransport(base_url=f"http://127.0.0.1:{server.server_port}", timeout=5)
+        opened = []
+        new_connection = transport._new_connection
+        transport._new_connection = lambda: opened.append(new_connection()) or opened[-1]
+        try:
+            transport.post("/slow", b"x", timeout=0.2)
+            assert False, "应抛出超时"
+        except OSError:
+            pass
+        assert len(opened) == 1 and opened[0].sock is None
+        assert transport._idle.qsize() == 0
+        transport.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    test_transport_reuses_connections()
+    test_read_timeout_closes_connection()
+    print("✓ 测试通过: HTTPTransport")
@@ -0,0 +1,104 @@
+"""测试增量JSON解析"""
+import sys
+import os
+import json
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from agents.llm_extractor_agent import LLMExtractorAgent
+from benchmarks.mock_servers import MockDeepSeekServer
+from utils.http_transport import HTTPTransport
+from utils.json_stream import JSONArrayStream, iter_json_array, parse_json_array, parse_json_object
+
+MEMES = [
+    {"name": "班味", "tags": ["职场", "打工人"], "description": "带\"引号\"和 ] } 的描述"},
+    {"name": "city不city", "tags": [], "description": "反斜杠 \\ 结尾\\"},
+    {"name": "硬控", "heat": 95},
+]
+
+
+def test_items_yielded_as_completed():
+    """逐字符喂入时，每个元素在闭合后立即产出"""
+    text = "```json\n" + json.dumps(MEMES, ensure_ascii=False, indent=2) + "\n```"
+    parser = JSONArrayStream()
+    arrivals = []
+    for position, char in enumerate(text):
+        for item in parser.feed(char):
+            arrivals.append((position, item))
+
+    assert [item for _, item in arrivals] == MEMES
+    assert arrivals[0][0] < len(text) // 2
+    assert parser.finished and not parser.truncated
+
+
+def test_truncated_array_recovers_complete_items():
+    """截断的响应返回所有已完整的元素"""
+    text = json.dumps(MEMES, ensure_ascii=False)
+    cut = text.index('"硬控"')
+    items = parse_json_array("以下是提取结果：" + text[:cut])
+    assert items == MEMES[:2]
+
+    parser = JSONArrayStream()
+    assert list(iter_json_array([text[:10], text[10:cut]], parser)) == MEMES[:2]
+    assert parser.truncated
+
+
+def test_scalars_and_invalid_items():
+    """标量元素可解析，无法解析的元素被跳过"""
+    assert parse_json_array('[1, "a,b", true, null]') == [1, "a,b", True, None]
+
+    parser = JSONArrayStream()
+    assert parser.feed('[{"name": "a"}, {"name": oops}, {"name": "b"}]') == [{"name": "a"}, {"name": "b"}]
+    assert parser.errors == 1
+
+    try:
+        parse_json_array("抱歉，我暂时无法生成结果。")
+        assert False, "没有数组时应抛出 ValueError"
+    except ValueError:
+        pass
+
+
+def test_brackets_in_preamble_skipped():
+    """说明文字中的方括号不会被当作数组开头，逐字符流式喂入时同样找到代码块中的数组"""
+    body = json.dumps(MEMES, ensure_ascii=False, indent=2)
+    for preamble in ("根据[数据]整理如下：", '参考["微博"热搜]整理：', "见[1]整理如下："):
+        text = preamble + "```json\n" + body + "\n```"
+        assert parse_json_array(text) == MEMES
+
+    text = '根据[数据]与["微博"热搜]整理如下：```json\n' + body + "\n```"
+    parser = JSONArrayStream()
+    items = [item for char in text for item in parser.feed(char)]
+    assert items == MEMES
+    assert parser.finished and parser.errors == 0
+
+
+def test_parse_json_object():
+    """取第一个完整对象，支持任意嵌套，忽略前后文字"""
+    plan = {"intent": "trend", "time_range": {"start": "2025-01", "extra": {"a": [1, {"b": 2}]}}}
+    assert parse_json_object("计划如下 {注意} ```json\n" + json.dumps(plan) + "\n``` 完毕") == plan
+
+    try:
+        parse_json_object('{"intent": "trend", "time_range": {')
+        assert False, "截断的对象应抛出 ValueError"
+    except ValueError:
+        pass
+
+
+def test_extractor_stream_memes():
+    """Extractor流式提取逐条产出梗"""
+    with MockDeepSeekServer(memes_per_call=5, stream_chunks=40) as server:
+        agent = LLMExtractorAgent({'use_cache': False, 'stream': True}, transport=HTTPTransport(server.url))
+        memes = list(agent.stream_memes({"media_reports": [{"title": "热梗"}], "realtime_data": []}))
+
+    assert len(memes) == 5
+    assert all(meme.get('name') for meme in memes)
+
+
+if __name__ == '__main__':
+    os.environ.setdefault('DEEPSEEK_API_KEY', 'test-key')
+    test_items_yielded_as_completed()
+    test_truncated_array_recovers_complete_items()
+    test_scalars_and_invalid_items()
+    test_brackets_in_preamble_skipped()
+    test_parse_json_object()
+    test_extractor_stream_memes()
+    print("✓ 测试通过: 增量JSON解析")
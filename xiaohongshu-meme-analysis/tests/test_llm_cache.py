@@ -0,0 +1,68 @@
+"""测试LLM响应缓存"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from agents.llm_writer_agent import LLMWriterAgent
+from benchmarks.mock_servers import MockDeepSeekServer
+from utils.http_transport import HTTPTransport
+from utils.llm_cache import LLMResponseCache
+
+
+def test_cache_hit_and_miss(tmp_path):
+    """相同参数命中，参数变化未命中"""
+    cache = LLMResponseCache(cache_dir=str(tmp_path))
+    messages = [{"role": "user", "content": "分析2025年热梗"}]
+
+    key = cache.make_key("deepseek-chat", messages, 0.7, 4000)
+    assert cache.get(key) is None
+
+    cache.set(key, "报告内容", model="deepseek-chat")
+    assert cache.get(key) == "报告内容"
+    assert cache.make_key("deepseek-chat", messages, 0.3, 4000) != key
+    assert cache.make_key("deepseek-chat", messages, 0.7, 4000, "http://127.0.0.1:8001") != key
+
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+
+
+def test_cache_eviction(tmp_path):
+    """过期与超出大小的条目被淘汰"""
+    cache = LLMResponseCache(cache_dir=str(tmp_path), max_size_mb=0.001)
+    old_key = cache.make_key("m", [{"role": "user", "content": "old"}], 0.7, 100)
+    cache.set(old_key, "x" * 600)
+    past = time.time() - 60
+    os.utime(os.path.join(str(tmp_path), f"{old_key}.json"), (past, past))
+
+    new_key = cache.make_key("m", [{"role": "user", "content": "new"}], 0.7, 100)
+    cache.set(new_key, "y" * 600)
+    assert cache.get(old_key) is None
+    assert cache.get(new_key) == "y" * 600
+
+    expired = LLMResponseCache(cache_dir=str(tmp_path), max_age_hours=0)
+    assert expired.get(new_key) is None
+
+
+def test_cache_separates_endpoints(tmp_path):
+    """同一缓存目录下，不同服务端地址的相同请求互不命中"""
+    cache = LLMResponseCache(cache_dir=str(tmp_path))
+    messages = [{"role": "user", "content": "分析2025年热梗"}]
+    with MockDeepSeekServer() as first, MockDeepSeekServer() as second:
+        for server in (first, second, first):
+            agent = LLMWriterAgent({'use_cache': False}, transport=HTTPTransport(server.url))
+            agent.cache = cache
+            assert agent.call_llm(messages)
+
+    assert (first.request_count, second.request_count) == (1, 1)
+    assert cache.stats()["hits"] == 1
+
+
+if __name__ == '__main__':
+    import tempfile
+    os.environ.setdefault('DEEPSEEK_API_KEY', 'test-key')
+    test_cache_hit_and_miss(tempfile.mkdtemp())
+    test_cache_eviction(tempfile.mkdtemp())
+    test_cache_separates_endpoints(tempfile.mkdtemp())
+    print("✓ 测试通过: LLMResponseCache")
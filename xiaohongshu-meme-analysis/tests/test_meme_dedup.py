@@ -0,0 +1,61 @@
+"""测试热梗模糊去重"""
+import sys
+import os
+import random
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from utils.meme_dedup import MinHashLSH, char_ngrams, deduplicate_memes, jaccard, normalize_name
+
+
+def test_normalize_name():
+    """年份、空白与标点被去掉"""
+    assert normalize_name("2025年 City不City？") == "city不city"
+
+
+def test_deduplicate_merges_near_duplicates():
+    """近似名称合并平台、标签和热度，不相关的梗保持独立"""
+    memes = [
+        {"name": "city不city", "platform": "抖音", "heat": "5000万播放", "description": "短", "tags": ["外国博主"]},
+        {"name": "泼天的富贵", "platform": "微博", "heat": "高", "description": "流量突然降临", "tags": ["流量"]},
+        {"name": "City不City啊", "platform": "小红书", "heat": "2亿浏览", "description": "保保带火的句式", "tags": ["旅游"]},
+        {"name": "接住泼天的富贵", "platform": "B站", "heat": "极高", "description": "", "tags": ["流量", "品牌"]},
+        {"name": "偷感", "platform": "小红书", "heat": "中", "description": "", "tags": []},
+    ]
+    result = deduplicate_memes(memes, threshold=0.5)
+
+    assert [m["name"] for m in result] == ["city不city", "泼天的富贵", "偷感"]
+    city = result[0]
+    assert city["platform"] == "抖音、小红书"
+    assert city["tags"] == ["外国博主", "旅游"]
+    assert city["heat"] == "2亿浏览"
+    assert city["description"] == "保保带火的句式"
+    assert city["aliases"] == ["City不City啊"]
+    assert result[1]["tags"] == ["流量", "品牌"]
+
+    merged = deduplicate_memes([{"name": "班味", "tags": "职场、打工人"}, {"name": "班味儿", "tags": ["职场"]}])
+    assert merged[0]["tags"] == ["职场", "打工人"]
+    assert result[1]["mentions"] == 2
+
+
+def test_pairs_just_above_threshold_merge():
+    """相似度略高于阈值的名称全部合并 (LSH分段不会漏掉候选对)"""
+    rng = random.Random(7)
+    memes = []
+    for _ in range(60):
+        base = "".join(chr(0x4e00 + rng.randrange(20000)) for _ in range(10))
+        variant = base + "".join(chr(0x4e00 + rng.randrange(20000)) for _ in range(8))
+        assert 0.5 < jaccard(char_ngrams(base), char_ngrams(variant)) < 0.55
+        memes += [{"name": base}, {"name": variant}]
+
+    assert len(deduplicate_memes(memes, threshold=0.5)) == 60
+
+    index = MinHashLSH.for_threshold(0.5)
+    assert index.num_perm % index.bands == 0
+    assert (1 - 0.5 ** index.rows) ** index.bands <= 0.01
+
+
+if __name__ == '__main__':
+    test_normalize_name()
+    test_deduplicate_merges_near_duplicates()
+    test_pairs_just_above_threshold_merge()
+    print("✓ 测试通过: deduplicate_memes")
@@ -0,0 +1,69 @@
+"""测试热梗历史库"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import json
+
+from utils.http_transport import HTTPTransport
+from utils.meme_history import MemeHistoryStore
+from workflows.llm_orchestrator import LLMOrchestrator
+
+
+def test_record_and_query(tmp_path):
+    """多次运行的梗可按全文、名称和首次出现时间查询"""
+    store = MemeHistoryStore(str(tmp_path / "memes.db"))
+    store.record_run(
+        [
+            {"name": "接住泼天的富贵", "platform": "微博", "description": "流量突然降临", "tags": ["流量"]},
+            {"name": "City不City", "platform": "抖音", "description": "外国博主句式", "tags": ["旅游"]},
+        ],
+        user_input="分析2025年热梗",
+        seen_at="2025-06-01T00:00:00",
+    )
+    store.record_run([{"name": "city不city！", "platform": "小红书"}], seen_at="2025-07-01T00:00:00")
+
+    assert [m["name"] for m in store.search("泼天的")] == ["接住泼天的富贵"]
+    assert [m["name"] for m in store.search("旅游")] == ["City不City"]
+    assert [m["platform"] for m in store.sightings("City不City")] == ["抖音", "小红书"]
+    assert store.first_seen(["City不City", "没见过"]) == {"City不City": "2025-06-01T00:00:00"}
+    store.close()
+
+
+def test_resume_does_not_record_twice(tmp_path):
+    """断点续跑时提取结果来自检查点，不重复写入历史库"""
+    store = MemeHistoryStore(str(tmp_path / "memes.db"))
+    raw_path = str(tmp_path / "raw.jsonl")
+    memes_path = str(tmp_path / "memes.json")
+    with open(raw_path, "w", encoding="utf-8") as f:
+        f.write('{"source": "tavily", "title": "a"}\n')
+    with open(memes_path, "w", encoding="utf-8") as f:
+        json.dump([{"name": "班味", "platform": "微博"}], f, ensure_ascii=False)
+
+    config = {'extractor': {'use_cache': False}}
+
+    def orchestrator():
+        return LLMOrchestrator(
+            config, transport=HTTPTransport("http://127.0.0.1:9"), history=store,
+            run_dir=str(tmp_path / "runs"), cache_dir=str(tmp_path / "cache"),
+        )
+
+    first = orchestrator()
+    assert first.config is config
+    assert first._step_history(memes_path, "分析热梗")
+    first._save_checkpoint('extractor', raw_path, memes_path)
+
+    resumed = orchestrator()
+    assert resumed._run_stage('extractor', raw_path, resume=True) == memes_path
+    assert resumed._step_history(memes_path, "分析热梗") == 0
+    assert len(store.sightings("班味")) == 1
+    store.close()
+
+
+if __name__ == '__main__':
+    os.environ.setdefault('DEEPSEEK_API_KEY', 'test-key')
+    import tempfile
+    from pathlib import Path
+    test_record_and_query(Path(tempfile.mkdtemp()))
+    test_resume_does_not_record_twice(Path(tempfile.mkdtemp()))
+    print("✓ 测试通过: MemeHistoryStore")
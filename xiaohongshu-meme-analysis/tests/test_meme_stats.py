@@ -0,0 +1,64 @@
+"""测试热梗统计聚合"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from utils.meme_stats import compute_meme_stats, format_stats_tables
+
+
+MEMES = [
+    {"name": "City不City", "platform": "抖音、小红书", "heat": "1.2亿", "tags": ["旅游", "外国人"]},
+    {"name": "偷感", "platform": "小红书", "heat": "3000万", "tags": ["情绪", "社恐"]},
+    {"name": "班味", "platform": "微博", "heat": "未知", "tags": ["打工人", "情绪"]},
+    {"name": "松弛感", "platform": "小红书", "heat": "500万", "tags": ["情绪", "旅游"]},
+]
+
+
+def test_platform_and_tag_counts():
+    """多平台条目按平台拆分计数，标签按频次排序"""
+    stats = compute_meme_stats(MEMES)
+    assert stats["total"] == 4
+    assert stats["platform_counts"] == {"小红书": 3, "抖音": 1, "微博": 1}
+    assert list(stats["tag_frequencies"].items())[0] == ("情绪", 3)
+    pairs = {tuple(sorted(p["tags"])): p["count"] for p in stats["tag_cooccurrence"]}
+    assert pairs[tuple(sorted(("情绪", "旅游")))] == 1
+
+
+def test_heat_distribution_ignores_unparsed():
+    stats = compute_meme_stats(MEMES)
+    assert stats["heat_overall"]["count"] == 3
+    assert stats["heat_overall"]["max"] == 1.2e8
+    assert stats["heat_by_platform"]["小红书"]["count"] == 3
+    assert "微博" not in stats["heat_by_platform"]
+
+
+def test_format_selected_sections():
+    stats = compute_meme_stats(MEMES)
+    text = format_stats_tables(stats, ["platform_counts"])
+    assert "| 小红书 | 3 |" in text
+    assert "高频标签" not in text
+    assert format_stats_tables({}, ["platform_counts"]) == ""
+
+
+def test_string_tags_split():
+    """字符串形式的标签按 、/, 拆分，而不是逐字计数"""
+    memes = [
+        {"name": "班味", "platform": "微博", "tags": "打工人、情绪"},
+        {"name": "偷感", "platform": "小红书", "tags": "情绪, 社恐"},
+        {"name": "硬控", "platform": "抖音", "tags": None},
+    ]
+    stats = compute_meme_stats(memes)
+    assert stats["tag_frequencies"] == {"情绪": 2, "打工人": 1, "社恐": 1}
+    pairs = {tuple(sorted(p["tags"])) for p in stats["tag_cooccurrence"]}
+    assert tuple(sorted(("打工人", "情绪"))) in pairs
+
+
+if __name__ == '__main__':
+    test_platform_and_tag_counts()
+    print("✓ 测试通过: 平台与标签计数")
+    test_heat_distribution_ignores_unparsed()
+    print("✓ 测试通过: 热度分布")
+    test_format_selected_sections()
+    print("✓ 测试通过: 统计表渲染")
+    test_string_tags_split()
+    print("✓ 测试通过: 字符串标签")
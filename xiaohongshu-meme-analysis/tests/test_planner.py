@@ -1,26 +1,41 @@
-"""测试Planner Agent"""
+"""测试Planner Agent (使用本地模拟DeepSeek服务)"""
 import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from agents.planner_agent import PlannerAgent
+from agents.llm_planner_agent import LLMPlannerAgent
+from benchmarks.mock_servers import MockDeepSeekServer
+from utils.http_transport import HTTPTransport
+
+
+def _planner(server: MockDeepSeekServer) -> LLMPlannerAgent:
+    return LLMPlannerAgent({'temperature': 0.3, 'use_cache': False}, transport=HTTPTransport(server.url))
 
 
 def test_planner_agent():
-    """测试规划Agent"""
-    agent = PlannerAgent()
-    
-    # 测试用例1
-    result = agent.execute("分析2025年1月到12月小红书热梗")
-    
-    assert 'time_range' in result
-    assert 'crawl_plan' in result
-    assert 'analysis_plan' in result
-    assert result['time_range']['start'] == '2025-01'
-    assert result['time_range']['end'] == '2025-12'
-    
-    print("✓ 测试通过: PlannerAgent")
+    """LLM返回的计划被解析并补充元数据"""
+    with MockDeepSeekServer(queries=3) as server:
+        result = _planner(server).execute("分析2025年1月到12月小红书热梗")
+
+    assert result['planner_type'] == 'llm'
+    assert len(result['tavily_queries']) == 3
+    assert '微博热搜' in result['playwright_targets']
+    assert result['user_input'] == "分析2025年1月到12月小红书热梗"
+
+
+def test_planner_fallback():
+    """LLM响应无法解析时使用传统规划兜底"""
+    with MockDeepSeekServer(malformed=True) as server:
+        result = _planner(server).execute("对比2024年微博和B站的热梗")
+
+    assert result['planner_type'] == 'fallback'
+    assert result['intent'] == 'comparison'
+    assert result['time_range']['start'] == '2024-01'
+    assert result['time_range']['end'] == '2024-12'
 
 
 if __name__ == '__main__':
+    os.environ.setdefault('DEEPSEEK_API_KEY', 'test-key')
     test_planner_agent()
+    test_planner_fallback()
+    print("✓ 测试通过: LLMPlannerAgent")
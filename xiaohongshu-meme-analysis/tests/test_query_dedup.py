@@ -0,0 +1,53 @@
+"""测试搜索词去重与规划记忆"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from utils.query_dedup import dedupe_queries, dedupe_targets, normalize_plan, normalize_user_input
+
+
+def test_dedupe_queries():
+    """有无年份、空白/全角差异的查询合并，年份不同的查询保留"""
+    queries = ["网络热梗流行语", "2025网络热梗流行语", "2025 网络热梗流行语", "2024网络热梗流行语",
+               "Meme Trends China", "meme  trends china", "B站梗文化"]
+    assert dedupe_queries(queries) == [
+        "2025网络热梗流行语", "2024网络热梗流行语", "meme trends china", "b站梗文化"
+    ]
+
+
+def test_normalize_plan():
+    plan = normalize_plan({
+        "intent": "trend_analysis",
+        "tavily_queries": ["2025十大热梗", "2025 十大热梗", "2025梗文化趋势"],
+        "playwright_targets": ["微博热搜", "知乎热榜", "微博 热搜", "B站热门"],
+    })
+    assert plan["intent"] == "trend_analysis"
+    assert plan["tavily_queries"] == ["2025十大热梗", "2025梗文化趋势"]
+    assert plan["playwright_targets"] == ["微博热搜", "知乎热榜", "B站热门"]
+    assert dedupe_targets(["B站热门", "b站热门"]) == ["B站热门"]
+
+
+def test_planner_memo():
+    """规范化后相同的需求复用规划结果，不再调用LLM"""
+    from agents.llm_planner_agent import LLMPlannerAgent
+    from benchmarks.mock_servers import MockDeepSeekServer
+    from utils.http_transport import HTTPTransport
+
+    assert normalize_user_input("分析 2025年 热梗！") == normalize_user_input("分析2025年热梗")
+    LLMPlannerAgent.clear_memo()
+    with MockDeepSeekServer() as server:
+        planner = LLMPlannerAgent({'use_cache': False}, transport=HTTPTransport(server.url))
+        first = planner.execute("分析2025年热梗")
+        second = planner.execute("分析 2025年 热梗！")
+        assert server.request_count == 1
+    assert second['tavily_queries'] == first['tavily_queries']
+    assert second['user_input'] == "分析 2025年 热梗！"
+    LLMPlannerAgent.clear_memo()
+
+
+if __name__ == '__main__':
+    os.environ.setdefault('DEEPSEEK_API_KEY', 'test-key')
+    test_dedupe_queries()
+    test_normalize_plan()
+    test_planner_memo()
+    print("✓ 测试通过: 搜索词去重与规划记忆")
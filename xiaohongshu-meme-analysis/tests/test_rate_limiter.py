@@ -0,0 +1,70 @@
+"""测试令牌桶限流器"""
+import sys
+import os
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from utils.rate_limiter import TokenBucket, get_shared_bucket
+
+
+def _elapsed(func) -> float:
+    start = time.monotonic()
+    func()
+    return time.monotonic() - start
+
+
+def test_burst_then_refill():
+    """容量内的突发请求立即通过，之后按速率补充"""
+    bucket = TokenBucket(rate=20, capacity=3)
+    assert _elapsed(lambda: [bucket.acquire() for _ in range(3)]) < 0.03
+    waited = _elapsed(bucket.acquire)
+    assert 0.03 < waited < 0.2  # 约 1/20 秒
+
+
+def test_concurrent_acquire_respects_rate():
+    """多线程同时获取时总速率不超过限制"""
+    bucket = TokenBucket(rate=50, capacity=1)
+    acquired = []
+
+    def worker():
+        for _ in range(5):
+            bucket.acquire()
+            acquired.append(time.monotonic())
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(acquired) == 20
+    # 首个令牌立即可用，其余19个按50个/秒补充
+    assert time.monotonic() - start >= 19 / 50 * 0.9
+
+
+def test_zero_rate_is_unlimited():
+    """rate为0不限速，负数直接报错"""
+    bucket = TokenBucket(rate=0, capacity=1)
+    assert _elapsed(lambda: [bucket.acquire() for _ in range(100)]) < 0.05
+    try:
+        TokenBucket(rate=-1)
+        assert False, "负数速率应报错"
+    except ValueError:
+        pass
+
+
+def test_shared_bucket_per_key():
+    """同一地址共用一个令牌桶，不同地址互不影响"""
+    bucket = get_shared_bucket("http://tavily.test/a", rate=2, capacity=4)
+    assert get_shared_bucket("http://tavily.test/a", rate=100, capacity=100) is bucket
+    assert bucket.rate == 2
+    assert get_shared_bucket("http://tavily.test/b", rate=2, capacity=4) is not bucket
+
+
+if __name__ == '__main__':
+    test_burst_then_refill()
+    test_concurrent_acquire_respects_rate()
+    test_zero_rate_is_unlimited()
+    test_shared_bucket_per_key()
+    print("✓ 测试通过: 令牌桶限流")
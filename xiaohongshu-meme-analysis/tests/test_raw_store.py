@@ -0,0 +1,85 @@
+"""测试JSONL原始数据存储"""
+import sys
+import os
+import json
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from config.llm_config import TRACING_CONFIG
+from utils.http_transport import HTTPTransport
+from utils.raw_store import RawStore, iter_records
+from workflows.llm_orchestrator import LLMOrchestrator
+
+
+def test_append_and_stream(tmp_path):
+    """逐条追加后可流式读回，gzip与截断的末行均可处理"""
+    for name in ("raw.jsonl", "raw.jsonl.gz"):
+        path = str(tmp_path / name)
+        with RawStore(path) as store:
+            store.append({"source": "tavily", "title": "泼天的富贵"})
+            store.append({"source": "playwright", "target": "微博热搜"})
+        assert store.counts == {"tavily": 1, "playwright": 1}
+        assert [r["source"] for r in iter_records(path)] == ["tavily", "playwright"]
+
+    path = str(tmp_path / "partial.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"source": "tavily", "title": "完整"}) + "\n")
+        f.write('{"source": "playwright", "tar')
+    assert [r["title"] for r in iter_records(path)] == ["完整"]
+
+
+def test_read_source_while_writing(tmp_path):
+    """写入过程中可按来源读回已写入的记录 (另一来源仍在追加)"""
+    for name in ("raw.jsonl", "raw.jsonl.gz"):
+        path = str(tmp_path / name)
+        with RawStore(path) as store:
+            store.append({"source": "tavily", "title": "a"})
+            store.append({"source": "playwright", "target": "微博热搜"})
+            store.append({"source": "tavily", "title": "b"})
+            assert [r["title"] for r in iter_records(path, "tavily")] == ["a", "b"]
+            store.append({"source": "playwright", "target": "知乎热榜"})
+        assert [r["target"] for r in iter_records(path, "playwright")] == ["微博热搜", "知乎热榜"]
+
+
+def test_legacy_json(tmp_path):
+    """兼容旧版整体JSON文件"""
+    path = str(tmp_path / "multi_source.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"tavily_results": [{"title": "a"}], "playwright_results": [{"target": "b"}]}, f)
+    assert [r["source"] for r in iter_records(path)] == ["tavily", "playwright"]
+
+
+def test_store_closed_when_run_fails(tmp_path, monkeypatch):
+    """采集阶段出错导致工作流失败时，已打开的原始数据存储同样被关闭"""
+    monkeypatch.setitem(TRACING_CONFIG, 'trace_dir', str(tmp_path / "traces"))
+    config = {'crawler': {'use_cache': False, 'use_source_cache': False, 'raw_store_path': str(tmp_path / "raw.jsonl")}}
+    orchestrator = LLMOrchestrator(
+        config, transport=HTTPTransport("http://127.0.0.1:9"), history=False, run_dir=str(tmp_path / "runs"),
+    )
+    opened = []
+    open_store = orchestrator.crawler.open_store
+    monkeypatch.setattr(orchestrator.crawler, 'open_store', lambda: opened.append(open_store()) or opened[-1])
+    monkeypatch.setattr(orchestrator, '_step_plan', lambda user_input, resume: {"tavily_queries": ["热梗"]})
+    monkeypatch.setattr(orchestrator, '_step_crawl', lambda plan, store: 0)
+
+    def failing_search(plan, store):
+        store.append({"source": "tavily", "title": "班味"})
+        raise RuntimeError("Tavily不可用")
+
+    monkeypatch.setattr(orchestrator, '_step_search', failing_search)
+    try:
+        orchestrator.run("分析热梗")
+        assert False, "采集失败时工作流应抛出异常"
+    except RuntimeError:
+        pass
+
+    assert len(opened) == 1 and opened[0]._file.closed
+    assert [r["title"] for r in iter_records(str(tmp_path / "raw.jsonl"))] == ["班味"]
+
+
+if __name__ == '__main__':
+    import tempfile
+    from pathlib import Path
+    test_append_and_stream(Path(tempfile.mkdtemp()))
+    test_read_source_while_writing(Path(tempfile.mkdtemp()))
+    test_legacy_json(Path(tempfile.mkdtemp()))
+    print("✓ 测试通过: RawStore")
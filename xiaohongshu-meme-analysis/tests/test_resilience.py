@@ -0,0 +1,161 @@
+"""测试LLM请求的退避重试、对冲和熔断"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from agents.llm_planner_agent import LLMPlannerAgent
+from benchmarks.mock_servers import MockDeepSeekServer
+from utils import tracing
+from utils.http_transport import HTTPStatusError, HTTPTransport
+from utils.resilience import (
+    CircuitBreaker, CircuitOpenError, LatencyTracker, RetryPolicy,
+    backoff_delay, hedged_call, parse_retry_after,
+)
+
+FAST = {'max_attempts': 4, 'backoff_base': 0.01, 'backoff_max': 0.05, 'deadline': 5,
+        'request_timeout': 5, 'breaker_failures': 3, 'breaker_reset': 0.2}
+
+
+class FlakyDeepSeekServer(MockDeepSeekServer):
+    """前 failures 个请求返回指定状态 (附 Retry-After)，之后正常响应"""
+
+    def __init__(self, failures: int, status: int = 503, retry_after: str = "0"):
+        super().__init__()
+        self.failures = failures
+        self.status = status
+        self.retry_after = retry_after
+
+    def respond(self, handler, payload):
+        if self.request_count <= self.failures:
+            body = b'{"error": "unavailable"}'
+            handler.send_response(self.status)
+            handler.send_header("Retry-After", self.retry_after)
+            handler.send_header("Content-Length", str(len(body)))
+            handler.end_headers()
+            handler.wfile.write(body)
+            return
+        super().respond(handler, payload)
+
+
+def _policy(**overrides) -> RetryPolicy:
+    config = dict(FAST, **overrides)
+    return RetryPolicy(config, CircuitBreaker(config['breaker_failures'], config['breaker_reset']), LatencyTracker())
+
+
+def _error(status: int, headers=None) -> HTTPStatusError:
+    return HTTPStatusError(status, headers or {}, b"")
+
+
+def _failing(error: Exception):
+    """总是抛出 error 的请求函数"""
+    def send(timeout):
+        raise error
+    return send
+
+
+def test_backoff_and_retry_after():
+    """退避时间在抖动范围内，Retry-After 支持秒数和HTTP日期"""
+    for attempt in range(6):
+        assert 0 <= backoff_delay(attempt, base=1.0, cap=8.0) <= min(8.0, 2 ** attempt)
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+
+
+def test_policy_retries_only_transient_errors():
+    """可重试错误按策略重试，4xx立即失败"""
+    calls = []
+
+    def send(timeout):
+        calls.append(timeout)
+        if len(calls) < 3:
+            raise _error(503, {"Retry-After": "0"})
+        return "ok"
+
+    assert _policy().call(send) == "ok"
+    assert len(calls) == 3
+
+    calls.clear()
+
+    def bad_request(timeout):
+        calls.append(timeout)
+        raise _error(400)
+
+    try:
+        _policy().call(bad_request)
+        assert False, "400 不应重试"
+    except HTTPStatusError:
+        pass
+    assert len(calls) == 1
+
+
+def test_deadline_bounds_retry_after():
+    """Retry-After 超过剩余时间时不再等待"""
+    start = time.monotonic()
+    try:
+        _policy(deadline=0.5).call(_failing(_error(429, {"Retry-After": "30"})))
+        assert False, "应放弃重试"
+    except HTTPStatusError as e:
+        assert e.status == 429
+    assert time.monotonic() - start < 0.5
+
+
+def test_circuit_breaker():
+    """连续服务端失败后熔断，冷却后放行试探请求"""
+    policy = _policy(max_attempts=1)
+    for _ in range(3):
+        try:
+            policy.call(_failing(ConnectionRefusedError("down")))
+        except ConnectionRefusedError:
+            pass
+    assert policy.breaker.state == "open"
+    try:
+        policy.call(lambda timeout: "ok")
+        assert False, "熔断期间应直接失败"
+    except CircuitOpenError:
+        pass
+
+    time.sleep(0.25)
+    assert policy.call(lambda timeout: "ok") == "ok"
+    assert policy.breaker.state == "closed"
+
+
+def test_hedged_call():
+    """首个请求超过对冲延迟时发出副本，先返回者生效"""
+    calls = []
+
+    def slow_then_fast():
+        calls.append(1)
+        time.sleep(1.0 if len(calls) == 1 else 0.01)
+        return len(calls)
+
+    start = time.monotonic()
+    result, hedged = hedged_call(slow_then_fast, delay=0.05)
+    assert hedged and result == 2
+    assert time.monotonic() - start < 0.5
+
+    assert hedged_call(lambda: "fast", delay=1.0) == ("fast", False)
+
+
+def test_call_llm_retries_transient_status():
+    """call_llm 在503后重试成功，并在追踪中记录重试次数"""
+    with FlakyDeepSeekServer(failures=2) as server:
+        agent = LLMPlannerAgent({'use_cache': False, 'retry': FAST}, transport=HTTPTransport(server.url))
+        tracer = tracing.Tracer("test")
+        with tracing.activate(tracer):
+            response = agent.call_llm([{"role": "system", "content": "规划"}, {"role": "user", "content": "x"}])
+        assert response
+        assert server.request_count == 3
+    assert tracer.totals()['llm']['retries'] == 2
+
+
+if __name__ == '__main__':
+    os.environ.setdefault('DEEPSEEK_API_KEY', 'test-key')
+    test_backoff_and_retry_after()
+    test_policy_retries_only_transient_errors()
+    test_deadline_bounds_retry_after()
+    test_circuit_breaker()
+    test_hedged_call()
+    test_call_llm_retries_transient_status()
+    print("✓ 测试通过: 退避重试、对冲与熔断")
@@ -0,0 +1,156 @@
+"""测试服务模式的任务队列和HTTP接口"""
+import sys
+import os
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from workflows.service import JobQueue, MemeService, QueueFullError
+
+
+class _GatedRunner:
+    """按需放行的任务执行函数，便于观察排队状态；指定 report_root 时按任务ID写入报告"""
+
+    def __init__(self, report_root: str = None):
+        self.gate = threading.Event()
+        self.calls = []
+        self.report_root = report_root
+        self.max_workers = 1
+        self.browser = None
+
+    def __call__(self, query, resume, job_id=None):
+        self.calls.append(query)
+        self.gate.wait(5)
+        if query == "失败":
+            return {'query': query, 'status': 'failed', 'error': 'RuntimeError: boom', 'duration': 0.0}
+        report = f"reports/{query}.md"
+        if self.report_root:
+            report = os.path.join(self.report_root, f"{job_id}.md")
+            with open(report, 'w', encoding='utf-8') as f:
+                f.write(f"# {query} ({job_id})")
+        return {'query': query, 'status': 'ok', 'report': report, 'duration': 0.0}
+
+    run_query = __call__
+
+    def close(self):
+        pass
+
+
+def _wait_finished(jobs: JobQueue, job_ids, timeout: float = 5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if all(jobs.get(job_id)['status'] in ('ok', 'failed') for job_id in job_ids):
+            return
+        time.sleep(0.01)
+    raise AssertionError("任务未在限定时间内完成")
+
+
+def _request(url: str, method: str = "GET", payload=None):
+    """返回 (状态码, 响应体)，JSON响应解析为对象"""
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    request = urllib.request.Request(url, data=data, method=method)
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            status, body, content_type = response.status, response.read(), response.headers['Content-Type']
+    except urllib.error.HTTPError as e:
+        status, body, content_type = e.code, e.read(), e.headers['Content-Type']
+    if content_type.startswith('application/json'):
+        return status, json.loads(body)
+    return status, body.decode('utf-8')
+
+
+def test_queue_bounds_and_coalescing():
+    """并发受限、相同需求合并、排队已满时拒绝"""
+    runner = _GatedRunner()
+    jobs = JobQueue(runner, max_workers=1, max_queue=2)
+
+    first, created = jobs.submit("分析2025年热梗")
+    assert created
+    while not runner.calls:
+        time.sleep(0.01)
+    second, _ = jobs.submit("分析B站梗")
+    third, _ = jobs.submit("失败")
+
+    again, created = jobs.submit("分析2025年热梗")
+    assert not created and again['id'] == first['id']
+    # 是否续跑不同也写入同一目录，同样合并
+    resumed, created = jobs.submit("分析2025年热梗", resume=True)
+    assert not created and resumed['id'] == first['id']
+
+    stats = jobs.stats()
+    assert stats['running'] == 1 and stats['queued'] == 2
+    assert jobs.get(third['id'])['position'] == 2
+    try:
+        jobs.submit("分析抖音梗")
+        assert False, "排队已满时应拒绝提交"
+    except QueueFullError:
+        pass
+
+    runner.gate.set()
+    _wait_finished(jobs, [first['id'], second['id'], third['id']])
+    assert jobs.get(first['id'])['report'] == "reports/分析2025年热梗.md"
+    assert jobs.get(third['id'])['status'] == 'failed'
+    assert runner.calls == ["分析2025年热梗", "分析B站梗", "失败"]
+    jobs.shutdown()
+
+
+def test_finished_jobs_pruned():
+    """完成的任务记录超出上限时删除最早的"""
+    runner = _GatedRunner()
+    runner.gate.set()
+    jobs = JobQueue(runner, max_workers=2, max_jobs=2)
+    ids = []
+    for query in ["a", "b", "c"]:
+        job, _ = jobs.submit(query)
+        ids.append(job['id'])
+        _wait_finished(jobs, [job['id']])
+    assert jobs.get(ids[0]) is None
+    assert [job['query'] for job in jobs.list()] == ["c", "b"]
+    jobs.shutdown()
+
+
+def test_http_endpoints(tmp_path):
+    """提交、合并、查询状态和报告；同一需求先后两个任务各自返回自己的报告"""
+    runner = _GatedRunner(report_root=str(tmp_path))
+    with MemeService(port=0, runner=runner, service_config={'max_queue': 1}) as service:
+        url = service.url
+        assert _request(f"{url}/jobs", "POST", {"query": " "})[0] == 400
+        assert _request(f"{url}/jobs", "POST", [1])[0] == 400
+        assert _request(f"{url}/jobs/unknown")[0] == 404
+        assert _request(f"{url}/other")[0] == 404
+
+        status, first = _request(f"{url}/jobs", "POST", {"query": "分析2025年热梗"})
+        assert status == 202 and first['status'] in ('queued', 'running')
+        status, same = _request(f"{url}/jobs", "POST", {"query": "分析2025年热梗", "resume": True})
+        assert status == 200 and same['id'] == first['id']
+        while not runner.calls:
+            time.sleep(0.01)
+        assert _request(f"{url}/jobs", "POST", {"query": "分析B站梗"})[0] == 202
+        assert _request(f"{url}/jobs", "POST", {"query": "分析抖音梗"})[0] == 429
+        assert _request(f"{url}/jobs/{first['id']}/report")[0] == 409
+
+        runner.gate.set()
+        _wait_finished(service.jobs, [first['id']])
+        status, second = _request(f"{url}/jobs", "POST", {"query": "分析2025年热梗"})
+        assert status == 202
+        _wait_finished(service.jobs, [second['id']])
+
+        assert _request(f"{url}/jobs/{first['id']}/report") == (200, f"# 分析2025年热梗 ({first['id']})")
+        assert _request(f"{url}/jobs/{second['id']}/report") == (200, f"# 分析2025年热梗 ({second['id']})")
+        status, job = _request(f"{url}/jobs/{first['id']}")
+        assert status == 200 and job['status'] == 'ok'
+        status, listing = _request(f"{url}/jobs")
+        assert [item['id'] for item in listing['jobs']][0] == second['id']
+        status, health = _request(f"{url}/health")
+        assert status == 200 and health['ok'] == 3
+
+
+if __name__ == '__main__':
+    import tempfile
+    test_queue_bounds_and_coalescing()
+    test_finished_jobs_pruned()
+    test_http_endpoints(tempfile.mkdtemp())
+    print("✓ 测试通过: 服务任务队列与HTTP接口")
@@ -0,0 +1,45 @@
+"""测试数据源缓存"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from utils.source_cache import SourceCache
+
+
+def test_per_source_ttl(tmp_path):
+    """各来源按自己的TTL过期"""
+    cache = SourceCache(cache_dir=str(tmp_path), ttl_minutes={"tavily": 360, "playwright": 15})
+    cache.set("tavily", "2025十大热梗", [{"title": "结果"}])
+    cache.set("playwright", "https://s.weibo.com/top/summary", {"title": "微博热搜"})
+    assert cache.get("tavily", "2025十大热梗") == [{"title": "结果"}]
+
+    # 30分钟前写入：热榜已过期，搜索结果仍有效
+    past = time.time() - 30 * 60
+    for fname in os.listdir(str(tmp_path)):
+        os.utime(os.path.join(str(tmp_path), fname), (past, past))
+    assert cache.get("playwright", "https://s.weibo.com/top/summary") is None
+    assert cache.get("tavily", "2025十大热梗") == [{"title": "结果"}]
+
+
+def test_disabled_source_and_size_eviction(tmp_path):
+    """TTL为0的来源不缓存；超出大小上限时淘汰最旧条目"""
+    cache = SourceCache(cache_dir=str(tmp_path), ttl_minutes={"playwright": 0}, max_size_mb=0.001)
+    cache.set("playwright", "https://example.com", {"title": "x"})
+    assert cache.get("playwright", "https://example.com") is None
+
+    cache.set("tavily", "old", "x" * 600)
+    past = time.time() - 60
+    for fname in os.listdir(str(tmp_path)):
+        os.utime(os.path.join(str(tmp_path), fname), (past, past))
+    cache.set("tavily", "new", "y" * 600)
+    assert cache.get("tavily", "old") is None
+    assert cache.get("tavily", "new") == "y" * 600
+    assert cache.stats()["evictions"] == 1
+
+
+if __name__ == '__main__':
+    import tempfile
+    test_per_source_ttl(tempfile.mkdtemp())
+    test_disabled_source_and_size_eviction(tempfile.mkdtemp())
+    print("✓ 测试通过: SourceCache")
@@ -0,0 +1,74 @@
+"""测试按需导入与Agent延迟创建"""
+import sys
+import os
+import subprocess
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _loaded_modules(code: str, cwd: str = project_root) -> set:
+    """在新进程中 (以cwd为工作目录) 执行code，返回其已加载的模块名"""
+    code = f"import sys; sys.path.insert(0, {project_root!r})\n" + code
+    result = subprocess.run(
+        [sys.executable, "-c", code + "\nimport sys; print('\\n'.join(sys.modules))"],
+        cwd=cwd, capture_output=True, text=True, check=True,
+    )
+    return set(result.stdout.split())
+
+
+def test_heavy_imports_deferred():
+    """导入工作流和全部Agent类不加载 pandas / playwright"""
+    modules = _loaded_modules(
+        "from workflows.llm_orchestrator import LLMOrchestrator\n"
+        "from agents import LLMAnalyzerAgent, LLMCrawlerAgent"
+    )
+    assert 'agents.llm_analyzer_agent' in modules
+    assert 'pandas' not in modules
+    assert 'playwright' not in modules
+
+    modules = _loaded_modules("import agents")
+    assert 'agents.llm_crawler_agent' not in modules
+
+
+def test_agents_created_on_first_use(tmp_path):
+    """编排器在首次访问时才创建Agent和打开历史库，且同一阶段只创建一次"""
+    from workflows.llm_orchestrator import LLMOrchestrator
+    db_path = tmp_path / "memes.db"
+    orchestrator = LLMOrchestrator(
+        run_dir=str(tmp_path / "runs"), cache_dir=str(tmp_path / "cache"), history_path=str(db_path),
+    )
+    assert orchestrator._agents == {}
+    assert not db_path.exists()
+
+    writer = orchestrator.writer
+    assert orchestrator.writer is writer
+    assert list(orchestrator._agents) == ['writer']
+    assert writer.cache.cache_dir == str(tmp_path / "cache")
+
+    assert orchestrator.history is orchestrator.history
+    assert db_path.exists()
+    orchestrator.history.close()
+
+
+def test_default_construction_lazy(tmp_path):
+    """默认参数构造编排器不创建Agent、不打开历史库，也不加载 sqlite3 / pandas / playwright"""
+    modules = _loaded_modules(
+        "from workflows.llm_orchestrator import LLMOrchestrator\n"
+        "assert LLMOrchestrator()._agents == {}",
+        cwd=str(tmp_path),
+    )
+    assert 'sqlite3' not in modules
+    assert 'pandas' not in modules
+    assert 'playwright' not in modules
+    assert not (tmp_path / "data" / "memes.db").exists()
+
+
+if __name__ == '__main__':
+    os.environ.setdefault('DEEPSEEK_API_KEY', 'test-key')
+    import tempfile
+    from pathlib import Path
+    test_heavy_imports_deferred()
+    test_agents_created_on_first_use(Path(tempfile.mkdtemp()))
+    test_default_construction_lazy(Path(tempfile.mkdtemp()))
+    print("✓ 测试通过: 按需导入与Agent延迟创建")
@@ -0,0 +1,35 @@
+"""测试Token预估与预算打包"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from utils.token_budget import estimate_tokens, pack_items, truncate_to_tokens
+
+
+def test_estimate_tokens_chinese_and_english():
+    """中文按0.6 token/字，英文按0.3 token/字符估算"""
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("网络热梗" * 10) == 25
+    assert estimate_tokens("meme" * 10) == 13
+
+
+def test_pack_items_prefers_high_priority():
+    """预算不足时保留优先级最高的条目"""
+    items = [{"name": "低", "heat": 1}, {"name": "高", "heat": 9}, {"name": "中", "heat": 5}]
+    packed = pack_items(items, budget=5, render=lambda m: m["name"] * 4, priority=lambda m: m["heat"])
+    assert packed == ["高高高高"]
+
+
+def test_truncate_to_tokens():
+    text = "发疯文学" * 100
+    truncated = truncate_to_tokens(text, 50)
+    assert estimate_tokens(truncated) <= 50
+    assert truncated.endswith("...")
+    assert truncate_to_tokens("短文本", 50) == "短文本"
+
+
+if __name__ == '__main__':
+    test_estimate_tokens_chinese_and_english()
+    test_pack_items_prefers_high_priority()
+    test_truncate_to_tokens()
+    print("✓ 测试通过: token_budget")
@@ -0,0 +1,60 @@
+"""测试运行追踪"""
+import sys
+import os
+import json
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from utils import tracing
+from workflows.dag import DAGScheduler
+
+
+def test_spans_nest_across_threads(tmp_path):
+    """步骤Span是其内部调用的父节点，线程池任务通过复制上下文继承父节点"""
+    def llm_call(tokens):
+        with tracing.span("llm.chat", kind="llm") as span:
+            span.set(prompt_tokens=tokens, completion_tokens=1, retries=0)
+
+    def analyze(_):
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            for tokens in (10, 20):
+                pool.submit(contextvars.copy_context().run, llm_call, tokens).result()
+
+    tracer = tracing.Tracer("test")
+    with tracing.activate(tracer):
+        DAGScheduler().add("analyzer", analyze).run()
+
+    spans = {span["name"]: span for span in tracer.spans if span["kind"] == "step"}
+    llm_spans = [span for span in tracer.spans if span["kind"] == "llm"]
+    assert len(llm_spans) == 2
+    assert all(span["parent_id"] == spans["analyzer"]["id"] for span in llm_spans)
+    assert tracer.totals()["llm"]["prompt_tokens"] == 30
+
+    path = tracer.export(str(tmp_path))
+    with open(path, "r", encoding="utf-8") as f:
+        exported = json.load(f)
+    assert len(exported["spans"]) == 3
+
+
+def test_errors_recorded_and_noop_without_tracer():
+    tracer = tracing.Tracer()
+    with tracing.activate(tracer):
+        try:
+            with tracing.span("step", kind="step"):
+                raise ValueError("boom")
+        except ValueError:
+            pass
+    assert tracer.spans[0]["error"] == "ValueError: boom"
+
+    # 未启用追踪时Span为空操作
+    with tracing.span("ignored") as span:
+        span.set(value=1)
+    assert tracing.start_span("ignored") is tracing.NULL_SPAN
+
+
+if __name__ == '__main__':
+    import tempfile
+    test_spans_nest_across_threads(tempfile.mkdtemp())
+    test_errors_recorded_and_noop_without_tracer()
+    print("✓ 测试通过: tracing")
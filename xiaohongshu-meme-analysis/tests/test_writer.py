@@ -0,0 +1,140 @@
+"""测试报告生成的输出预算与流式写入"""
+import sys
+import os
+import json
+import socket
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from agents.llm_writer_agent import LLMWriterAgent
+from benchmarks.mock_servers import MockDeepSeekServer
+from config.llm_config import DEEPSEEK_CONFIG
+from utils.http_transport import HTTPTransport
+from utils.llm_cache import LLMResponseCache
+from workflows.llm_orchestrator import LLMOrchestrator
+
+
+class RecordingDeepSeekServer(MockDeepSeekServer):
+    """记录每个请求的参数"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.payloads = []
+
+    def respond(self, handler, payload):
+        self.payloads.append(payload)
+        super().respond(handler, payload)
+
+
+class BrokenStreamServer(MockDeepSeekServer):
+    """流式响应发送前 break_after 个事件后直接断开连接 (没有 [DONE] 和结束块)"""
+
+    def __init__(self, break_after: int = 5, **kwargs):
+        super().__init__(**kwargs)
+        self.break_after = break_after
+        self.sent_text = ""
+
+    def _send_stream(self, handler, content):
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+        step = max(len(content) // self.stream_chunks, 1)
+        for i in range(0, step * self.break_after, step):
+            self.sent_text += content[i:i + step]
+            event = {"choices": [{"delta": {"content": content[i:i + step]}}]}
+            data = f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8")
+            handler.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        handler.wfile.flush()
+        handler.close_connection = True
+        handler.connection.shutdown(socket.SHUT_RDWR)
+
+
+def _insights(tmp_path) -> str:
+    path = os.path.join(str(tmp_path), "insights.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"top_10_analysis": "班味 " * 50, "cultural_insights": "自嘲"}, f, ensure_ascii=False)
+    return path
+
+
+def _writer(server, tmp_path, **config) -> LLMWriterAgent:
+    config = dict({'use_cache': False, 'report_dir': os.path.join(str(tmp_path), "reports")}, **config)
+    return LLMWriterAgent(config, transport=HTTPTransport(server.url))
+
+
+def test_writer_sends_budgeted_max_tokens(tmp_path):
+    """发送的 max_tokens 与素材预算预留的输出空间一致，上下文长度默认取 DEEPSEEK_CONFIG"""
+    with RecordingDeepSeekServer() as server:
+        writer = _writer(server, tmp_path, max_tokens=6000, stream=False)
+        assert writer.context_window == DEEPSEEK_CONFIG['context_window']
+        assert _writer(server, tmp_path, context_window=32000).context_window == 32000
+
+        report_path = writer.execute(_insights(tmp_path))
+        streamed = _writer(server, tmp_path, max_tokens=6000, stream=True)
+        streamed.execute(_insights(tmp_path))
+
+    assert os.path.getsize(report_path) > 0
+    assert [payload["max_tokens"] for payload in server.payloads] == [6000, 6000]
+    assert server.payloads[1]["stream"] is True
+
+
+def test_stream_interrupted_keeps_partial_report(tmp_path):
+    """流式输出中途断开：报告文件保留已收到的部分，不完整的输出不写入缓存"""
+    cache = LLMResponseCache(cache_dir=os.path.join(str(tmp_path), "cache"))
+    with BrokenStreamServer(break_after=5) as server:
+        writer = _writer(server, tmp_path, stream=True)
+        writer.cache = cache
+        report_path = writer.execute(_insights(tmp_path))
+
+    with open(report_path, "r", encoding="utf-8") as f:
+        report = f.read()
+    assert report and report == server.sent_text
+    assert server.request_count == 1  # 已产出内容后不再重试
+    assert cache.stats()["writes"] == 0
+
+    with MockDeepSeekServer() as server:
+        writer = _writer(server, tmp_path, stream=True)
+        writer.cache = cache
+        writer.execute(_insights(tmp_path))
+    assert cache.stats()["writes"] == 1
+
+
+def test_stream_progress_not_printed(tmp_path, capsys):
+    """流式生成的进度写入日志，不向标准输出写 \\r 覆盖行 (并发运行时会互相穿插)"""
+    with MockDeepSeekServer(stream_chunks=40) as server:
+        _writer(server, tmp_path, stream=True).execute(_insights(tmp_path))
+    assert "已生成" not in capsys.readouterr().out
+
+
+def test_resume_reruns_interrupted_writer(tmp_path):
+    """首次运行报告流式中断：不保存检查点，断点续跑时重新生成而不是复用不完整的报告"""
+    insights_path = _insights(tmp_path)
+    config = {'writer': {'use_cache': False, 'stream': True, 'report_dir': os.path.join(str(tmp_path), "reports")}}
+
+    def orchestrator(server):
+        return LLMOrchestrator(
+            config, transport=HTTPTransport(server.url), history=False, run_dir=os.path.join(str(tmp_path), "runs"),
+        )
+
+    with BrokenStreamServer(break_after=5) as server:
+        first = orchestrator(server)
+        first._run_stage('writer', insights_path)
+    assert first._agent('writer').degraded
+    checkpoint = first.checkpoint
+    fingerprint = checkpoint.fingerprint('writer', insights_path, config['writer'])
+    assert checkpoint.load('writer', fingerprint) is None
+
+    with MockDeepSeekServer() as server:
+        resumed = orchestrator(server)
+        report_path = resumed._run_stage('writer', insights_path, resume=True)
+    assert server.request_count == 1
+    assert 'writer' not in resumed.restored_stages
+    assert checkpoint.load('writer', fingerprint) == report_path
+
+
+if __name__ == '__main__':
+    import tempfile
+    os.environ.setdefault('DEEPSEEK_API_KEY', 'test-key')
+    test_writer_sends_budgeted_max_tokens(tempfile.mkdtemp())
+    test_stream_interrupted_keeps_partial_report(tempfile.mkdtemp())
+    test_resume_reruns_interrupted_writer(tempfile.mkdtemp())
+    print("✓ 测试通过: LLMWriterAgent")
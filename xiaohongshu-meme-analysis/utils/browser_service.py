@@ -0,0 +1,284 @@
+"""浏览器池与共享浏览器服务：常驻Chromium、预热的上下文、可复用的页面和崩溃后自动重启"""
+from typing import Any, Callable, Dict, List, Optional
+from contextlib import asynccontextmanager
+import asyncio
+import concurrent.futures
+import contextvars
+import threading
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+
+def load_async_playwright() -> Optional[Callable]:
+    """按需导入 playwright.async_api (导入较慢，不在模块加载时进行)，未安装时返回None"""
+    try:
+        from playwright.async_api import async_playwright
+    except ImportError:
+        return None
+    return async_playwright
+
+
+class BrowserCrashError(RuntimeError):
+    """页面或浏览器进程崩溃 (浏览器池会在下次取页面时重建)"""
+
+
+class _PooledPage:
+    """池中的页面及其所属上下文、浏览器代次和已导航次数"""
+
+    def __init__(self, page, context_index: int, generation: int):
+        self.page = page
+        self.context_index = context_index
+        self.generation = generation
+        self.navigations = 0
+        self.crashed = False
+
+
+class BrowserPool:
+    """
+    浏览器池 (绑定到创建它的事件循环)
+
+    启动时预先创建 contexts 个浏览器上下文；page() 借出页面，用完归还后复用，
+    页面导航 max_navigations 次后关闭重建，避免单个页面内存持续增长。
+    页面崩溃或使用中出错时丢弃该页面；浏览器进程断开时，下次借页面前自动重启浏览器，
+    单个坏页面不会影响其他页面和后续爬取。
+    """
+
+    def __init__(self, launch_options: Optional[Dict[str, Any]] = None,
+                 context_options: Optional[Dict[str, Any]] = None,
+                 contexts: int = 2, pages_per_context: int = 2, max_navigations: int = 20):
+        self.launch_options = launch_options or {"headless": True}
+        self.context_options = context_options or {"user_agent": USER_AGENT}
+        self.context_count = max(1, contexts)
+        self.pages_per_context = max(1, pages_per_context)
+        self.max_navigations = max(1, max_navigations)
+        self.stats = {"launches": 0, "restarts": 0, "pages_created": 0, "pages_recycled": 0, "pages_discarded": 0}
+
+        self._playwright = None
+        self._browser = None
+        self._contexts: List[Any] = []
+        self._open_pages: List[int] = []
+        self._idle: List[_PooledPage] = []
+        self._generation = 0
+        self._lock: Optional[asyncio.Lock] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    @property
+    def size(self) -> int:
+        """同时可借出的页面数"""
+        return self.context_count * self.pages_per_context
+
+    def _init_primitives(self):
+        # asyncio原语需在所属事件循环中创建
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+            self._slots = asyncio.Semaphore(self.size)
+
+    async def start(self):
+        """启动浏览器并预热上下文 (已启动时无操作)"""
+        self._init_primitives()
+        async with self._lock:
+            await self._ensure_started()
+
+    async def _ensure_started(self):
+        """调用方需持有 _lock；浏览器未启动或已断开时 (重新) 启动"""
+        if self._browser is not None and self._browser.is_connected():
+            return
+        if self._browser is not None:
+            self.stats["restarts"] += 1
+            await self._discard_browser()
+
+        if self._playwright is None:
+            async_playwright = load_async_playwright()
+            if async_playwright is None:
+                raise RuntimeError("未安装 playwright")
+            self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(**self.launch_options)
+        self.stats["launches"] += 1
+        self._generation += 1
+        self._contexts = [await self._browser.new_context(**self.context_options) for _ in range(self.context_count)]
+        self._open_pages = [0] * self.context_count
+        self._idle = []
+
+    async def _discard_browser(self):
+        """丢弃当前浏览器及其上下文和页面 (进程可能已崩溃，关闭失败时忽略)"""
+        browser, self._browser = self._browser, None
+        self._contexts, self._open_pages, self._idle = [], [], []
+        try:
+            await browser.close()
+        except Exception:
+            pass
+
+    @asynccontextmanager
+    async def page(self):
+        """
+        借出一个页面，退出时归还
+
+        块内抛出异常或任务被取消时页面被丢弃；若原因是页面或浏览器崩溃，抛出 BrowserCrashError。
+        """
+        self._init_primitives()
+        async with self._slots:
+            entry = await self._checkout()
+            succeeded = False
+            try:
+                yield entry.page
+                succeeded = True
+            except Exception as e:
+                if entry.crashed or not self._browser_alive(entry):
+                    raise BrowserCrashError(f"页面或浏览器崩溃: {e}") from e
+                raise
+            finally:
+                # CancelledError 不是 Exception，同样需要释放页面 (此时页面状态未知，直接丢弃)
+                if succeeded:
+                    entry.navigations += 1
+                    await self._checkin(entry)
+                else:
+                    await self._discard(entry)
+
+    def _browser_alive(self, entry: _PooledPage) -> bool:
+        return (entry.generation == self._generation and self._browser is not None
+                and self._browser.is_connected())
+
+    async def _checkout(self) -> _PooledPage:
+        async with self._lock:
+            await self._ensure_started()
+            while self._idle:
+                entry = self._idle.pop()
+                if entry.generation == self._generation and not entry.crashed and not entry.page.is_closed():
+                    return entry
+                await self._discard(entry)
+
+            index = min(range(len(self._contexts)), key=lambda i: self._open_pages[i])
+            try:
+                page = await self._contexts[index].new_page()
+            except Exception:
+                # 上下文或浏览器已失效：重启后重试一次
+                self.stats["restarts"] += 1
+                await self._discard_browser()
+                await self._ensure_started()
+                index = 0
+                page = await self._contexts[index].new_page()
+            self._open_pages[index] += 1
+            self.stats["pages_created"] += 1
+
+            entry = _PooledPage(page, index, self._generation)
+            page.on("crash", lambda *_: setattr(entry, "crashed", True))
+            return entry
+
+    async def _checkin(self, entry: _PooledPage):
+        if entry.crashed or entry.navigations >= self.max_navigations:
+            if not entry.crashed:
+                self.stats["pages_recycled"] += 1
+            await self._close_page(entry)
+            return
+        async with self._lock:
+            if entry.generation == self._generation:
+                self._idle.append(entry)
+                return
+        await self._close_page(entry)
+
+    async def _discard(self, entry: _PooledPage):
+        self.stats["pages_discarded"] += 1
+        await self._close_page(entry)
+
+    async def _close_page(self, entry: _PooledPage):
+        self._release_slot(entry)
+        try:
+            await entry.page.close()
+        except Exception:
+            pass
+
+    def _release_slot(self, entry: _PooledPage):
+        """页面不再占用所属上下文的名额 (旧代次的页面随旧浏览器一起失效，无需计数)"""
+        if entry.generation == self._generation and entry.context_index < len(self._open_pages):
+            self._open_pages[entry.context_index] = max(0, self._open_pages[entry.context_index] - 1)
+
+    async def close(self):
+        if self._browser is not None:
+            await self._discard_browser()
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+
+class BrowserService:
+    """
+    常驻浏览器池
+
+    Playwright对象绑定在创建它的事件循环上，因此浏览器池运行在一个专用线程的事件循环中，
+    其他线程通过 run() 提交协程并同步等待结果。浏览器在首次使用 (或 warm_up()) 时启动，
+    在多次爬取、多次运行之间保持常驻，close() 时关闭。
+    """
+
+    def __init__(self, launch_options: Optional[Dict[str, Any]] = None,
+                 pool_config: Optional[Dict[str, Any]] = None):
+        if pool_config is None:
+            from config.llm_config import BROWSER_POOL_CONFIG
+            pool_config = BROWSER_POOL_CONFIG
+        self.pool = BrowserPool(
+            launch_options,
+            contexts=pool_config.get('contexts', 2),
+            pages_per_context=pool_config.get('pages_per_context', 2),
+            max_navigations=pool_config.get('max_navigations', 20),
+        )
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="browser-service", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def available() -> bool:
+        """是否已安装 playwright"""
+        return load_async_playwright() is not None
+
+    def run(self, func: Callable, *args) -> Any:
+        """
+        在浏览器线程中执行 func(pool, *args) 协程并返回结果
+
+        调用方的上下文 (如追踪Span) 随协程一起传递。
+        """
+        if self._loop.is_closed():
+            raise RuntimeError("浏览器服务已关闭")
+        result: concurrent.futures.Future = concurrent.futures.Future()
+        context = contextvars.copy_context()
+
+        def start():
+            # 在调用方上下文中创建任务，任务继承该上下文
+            task = context.run(self._loop.create_task, self._call(func, args))
+            task.add_done_callback(lambda t: self._resolve(result, t))
+
+        self._loop.call_soon_threadsafe(start)
+        return result.result()
+
+    def warm_up(self):
+        """预先启动浏览器和上下文，之后的 run() 无需等待Chromium冷启动"""
+        asyncio.run_coroutine_threadsafe(self.pool.start(), self._loop).result()
+
+    @staticmethod
+    def _resolve(result: concurrent.futures.Future, task: asyncio.Task):
+        if task.cancelled():
+            result.cancel()
+        elif task.exception() is not None:
+            result.set_exception(task.exception())
+        else:
+            result.set_result(task.result())
+
+    async def _call(self, func: Callable, args: tuple) -> Any:
+        await self.pool.start()
+        return await func(self.pool, *args)
+
+    def close(self):
+        """关闭浏览器并停止后台事件循环"""
+        if self._loop.is_closed():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.pool.close(), self._loop).result(timeout=30)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
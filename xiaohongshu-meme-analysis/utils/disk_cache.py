@@ -0,0 +1,116 @@
+"""磁盘缓存基类：每条缓存一个JSON文件，原子写入，按有效期和总大小淘汰"""
+from typing import Any, Dict, Optional, Type
+import json
+import os
+import threading
+import time
+
+
+class DiskCache:
+    """
+    JSON文件缓存的公共部分
+
+    子类负责缓存键到文件路径的映射和条目内容；过期判断、原子写入、
+    淘汰和命中统计在这里实现。条目有效期默认为 max_age_seconds，
+    子类可覆盖 _ttl_for_file() 按文件区分有效期。
+    """
+
+    def __init__(self, cache_dir: str, max_age_seconds: float, max_size_mb: float):
+        self.cache_dir = cache_dir
+        self.max_age_seconds = max_age_seconds
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _ttl_for_file(self, fname: str) -> float:
+        """缓存文件的有效期 (秒)"""
+        return self.max_age_seconds
+
+    def _read(self, path: str, ttl: float) -> Optional[Dict[str, Any]]:
+        """读取条目，未命中或已过期 (过期时删除) 返回None"""
+        try:
+            if time.time() - os.path.getmtime(path) > ttl:
+                self._remove(path)
+                self._count("misses")
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            self._count("hits")
+            return entry
+        except (OSError, ValueError):
+            self._count("misses")
+            return None
+
+    def _write(self, path: str, entry: Dict[str, Any]):
+        """写入条目 (先写临时文件再原子替换)，并按需淘汰旧条目；无法序列化时放弃写入"""
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            self._count("writes")
+        except (OSError, TypeError, ValueError):
+            self._remove(tmp_path)
+            return
+        self.prune()
+
+    def prune(self):
+        """淘汰过期条目；总大小超限时从最旧的开始删除"""
+        with self._lock:
+            now = time.time()
+            entries = []
+            for fname in os.listdir(self.cache_dir):
+                if not fname.endswith(".json"):
+                    continue
+                path = os.path.join(self.cache_dir, fname)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if now - stat.st_mtime > self._ttl_for_file(fname):
+                    self._remove(path)
+                    self._stats["evictions"] += 1
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_size_bytes:
+                    break
+                self._remove(path)
+                self._stats["evictions"] += 1
+                total -= size
+
+    def stats(self) -> Dict[str, Any]:
+        """返回命中统计"""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
+
+    def _count(self, field: str):
+        with self._lock:
+            self._stats[field] += 1
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+_shared_caches: Dict[tuple, DiskCache] = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_disk_cache(cache_class: Type[DiskCache], cache_dir: str, **options) -> DiskCache:
+    """获取进程内共享的缓存实例 (同一类型、同一目录只创建一次，options 仅在创建时使用)"""
+    with _shared_lock:
+        key = (cache_class, cache_dir)
+        if key not in _shared_caches:
+            _shared_caches[key] = cache_class(cache_dir=cache_dir, **options)
+        return _shared_caches[key]
@@ -0,0 +1,156 @@
+"""热榜页面的结构化提取：按站点配置选择器，在页面内直接提取 排名/标题/热度/链接"""
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+# 站点适配器：hosts 按域名匹配，targets 按目标名称匹配 (target_urls 指向其他地址时使用)
+# item 为每一行的选择器，title/heat/rank/link 为行内选择器 (为空表示不提取该字段)
+# 各站点页面结构会变化，选择器失效时自动退回通用规则
+SITE_ADAPTERS: Dict[str, Dict[str, Any]] = {
+    'weibo': {
+        'hosts': ['s.weibo.com'],
+        'targets': ['微博'],
+        'item': '#pl_top_realtimehot tbody tr',
+        'rank': 'td.td-01',
+        'title': 'td.td-02 a',
+        'heat': 'td.td-02 span',
+        'link': 'td.td-02 a',
+    },
+    'zhihu': {
+        'hosts': ['zhihu.com'],
+        'targets': ['知乎'],
+        'item': '.HotList-item',
+        'rank': '.HotList-itemIndex',
+        'title': '.HotList-itemTitle',
+        'heat': '.HotList-itemMetrics',
+        'link': 'a',
+    },
+    'bilibili': {
+        'hosts': ['bilibili.com'],
+        'targets': ['B站', 'b站', '哔哩哔哩'],
+        'item': '.video-card',
+        'rank': '',
+        'title': '.video-name',
+        'heat': '.play-text',
+        'link': 'a',
+    },
+    'baidu': {
+        'hosts': ['top.baidu.com'],
+        'targets': ['百度'],
+        # 百度的类名带构建哈希后缀，按前缀匹配
+        'item': '[class^="category-wrap"]',
+        'rank': '[class^="index_"]',
+        'title': '[class^="c-single-text-ellipsis"]',
+        'heat': '[class^="hot-index"]',
+        'link': 'a',
+    },
+    'douyin': {
+        'hosts': ['douyin.com'],
+        'targets': ['抖音'],
+        'item': '[data-e2e="hot-list-item"], [class*="hot-list"] li',
+        'rank': '[class*="rank"], [class*="index"]',
+        'title': '[class*="title"], h3',
+        'heat': '[class*="hot-value"], [class*="count"]',
+        'link': 'a',
+    },
+    '36kr': {
+        'hosts': ['36kr.com'],
+        'targets': ['36氪'],
+        'item': '.article-wrapper, .article-item',
+        'rank': '[class*="rank"]',
+        'title': '.article-item-title',
+        'heat': '[class*="hot"], [class*="read"]',
+        'link': 'a.article-item-title, a',
+    },
+}
+
+# 通用规则：取页面中最大的一组同级列表行 (li/tr) 中带链接的行
+GENERIC_ADAPTER: Dict[str, Any] = {
+    'item': 'li, tr',
+    'rank': '[class*="rank"], [class*="index"], [class*="num"]',
+    'title': 'a',
+    'heat': '[class*="heat"], [class*="hot"], [class*="count"]',
+    'link': 'a',
+    'group': True,
+}
+
+# 页面内执行的提取脚本：依次尝试各规则，返回第一个提取到行的结果
+EXTRACT_ROWS_SCRIPT = """
+(specs) => {
+    const text = (el) => el ? (el.innerText || el.textContent || '').replace(/\\s+/g, ' ').trim() : '';
+    const find = (item, selector) => {
+        if (!selector) return null;
+        return item.matches(selector) ? item : item.querySelector(selector);
+    };
+    for (const spec of specs) {
+        let items = Array.from(document.querySelectorAll(spec.item));
+        if (spec.group) {
+            const groups = new Map();
+            for (const item of items) {
+                if (!item.querySelector(spec.title)) continue;
+                const siblings = groups.get(item.parentElement) || [];
+                siblings.push(item);
+                groups.set(item.parentElement, siblings);
+            }
+            items = Array.from(groups.values()).sort((a, b) => b.length - a.length)[0] || [];
+        }
+        const rows = [];
+        const seen = new Set();
+        for (const item of items) {
+            const title = text(spec.title ? item.querySelector(spec.title) : item);
+            if (!title || title.length > spec.max_title || seen.has(title)) continue;
+            seen.add(title);
+            const rank = parseInt(text(spec.rank ? item.querySelector(spec.rank) : null), 10);
+            const link = find(item, spec.link);
+            rows.push({
+                rank: Number.isFinite(rank) ? rank : rows.length + 1,
+                title: title,
+                heat: text(spec.heat ? item.querySelector(spec.heat) : null),
+                link: link && link.href ? link.href : '',
+            });
+            if (rows.length >= spec.limit) break;
+        }
+        if (rows.length >= spec.min_rows) return {adapter: spec.name, rows: rows};
+    }
+    return {adapter: null, rows: []};
+}
+"""
+
+
+def find_adapter(target: str, url: str) -> Optional[str]:
+    """按URL域名 (优先) 或目标名称匹配站点适配器，返回适配器名"""
+    host = urlparse(url).hostname or ''
+    for name, adapter in SITE_ADAPTERS.items():
+        if any(host == h or host.endswith('.' + h) for h in adapter['hosts']):
+            return name
+    for name, adapter in SITE_ADAPTERS.items():
+        if any(key in target for key in adapter['targets']):
+            return name
+    return None
+
+
+def build_specs(target: str, url: str, limit: int = 50, max_title: int = 100) -> List[Dict[str, Any]]:
+    """
+    生成传给 EXTRACT_ROWS_SCRIPT 的规则列表：匹配的站点规则在前，通用规则兜底
+
+    通用规则至少要提取到3行，避免把导航栏等零散链接当作榜单。
+    """
+    specs = []
+    name = find_adapter(target, url)
+    if name:
+        site = {k: v for k, v in SITE_ADAPTERS[name].items() if k not in ('hosts', 'targets')}
+        specs.append(dict(site, name=name, min_rows=1))
+    specs.append(dict(GENERIC_ADAPTER, name='generic', min_rows=3))
+    for spec in specs:
+        spec.update(limit=limit, max_title=max_title)
+    return specs
+
+
+def format_rows(rows: List[Dict[str, Any]]) -> List[str]:
+    """把提取到的行压缩为 "排名. 标题 (热度)" 形式的短文本，用于Prompt和备选提取"""
+    lines = []
+    for row in rows:
+        line = f"{row.get('rank')}. {row.get('title')}"
+        if row.get('heat'):
+            line += f" ({row['heat']})"
+        lines.append(line)
+    return lines
@@ -0,0 +1,239 @@
+"""共享HTTP传输层 (连接池 + Keep-Alive)"""
+from typing import Any, Dict, Iterator, Optional
+from collections import namedtuple
+from urllib.parse import urlsplit
+import asyncio
+import http.client
+import queue
+import ssl
+import threading
+
+from utils import tracing
+
+
+HTTPResponse = namedtuple("HTTPResponse", ["status", "headers", "body"])
+
+# 复用的空闲连接可能已被服务端关闭，这类错误换新连接重试一次
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    BrokenPipeError,
+    ConnectionResetError,
+)
+
+
+class HTTPStatusError(Exception):
+    """
+    服务端返回非200状态 (流式与非流式请求均使用)
+
+    携带状态码、响应头 (如 Retry-After) 和响应体，重试策略据此判断是否可重试及等待时长。
+    """
+
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes):
+        super().__init__(f"HTTP {status}: {body[:200]!r}")
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+
+class HTTPTransport:
+    """
+    面向单一主机的HTTP连接池
+
+    基于标准库 http.client，连接在请求之间保持打开 (Keep-Alive)，
+    多个Agent共享同一实例时TLS握手每次运行只需支付一次。
+    线程安全；提供 apost 作为异步版本。
+    """
+
+    def __init__(self, base_url: str = "https://api.deepseek.com", pool_size: int = 8, timeout: float = 300):
+        parts = urlsplit(base_url)
+        self.base_url = base_url.rstrip("/")
+        self.scheme = parts.scheme or "https"
+        self.host = parts.hostname
+        self.port = parts.port
+        self.base_path = parts.path.rstrip("/")
+        self.pool_size = pool_size
+        self.timeout = timeout
+
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._ssl_context = ssl.create_default_context() if self.scheme == "https" else None
+        self._openai_clients: Dict[str, Any] = {}
+        self._stats = {"requests": 0, "connections_opened": 0, "connections_reused": 0}
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        with self._lock:
+            self._stats["connections_opened"] += 1
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(
+                self.host, self.port, timeout=self.timeout, context=self._ssl_context
+            )
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _acquire(self):
+        """取出一个空闲连接，没有则新建。返回 (连接, 是否复用)"""
+        try:
+            conn = self._idle.get_nowait()
+            with self._lock:
+                self._stats["connections_reused"] += 1
+            return conn, True
+        except queue.Empty:
+            return self._new_connection(), False
+
+    def _release(self, conn: http.client.HTTPConnection):
+        """归还连接；池已满则直接关闭"""
+        if self._idle.qsize() >= self.pool_size:
+            conn.close()
+            return
+        self._idle.put(conn)
+
+    def post(self, path: str, body: bytes, headers: Optional[Dict[str, str]] = None,
+             timeout: Optional[float] = None) -> HTTPResponse:
+        """
+        发送POST请求并读取完整响应
+
+        Args:
+            path: 相对于 base_url 的路径，如 /chat/completions
+            body: 请求体
+            headers: 请求头
+            timeout: 本次请求的超时 (秒)，默认使用池配置
+
+        Returns:
+            HTTPResponse(status, headers, body)
+        """
+        with tracing.span(f"POST {path}", kind="http", host=self.host, request_bytes=len(body)) as span:
+            conn, response = self._open(path, body, headers, timeout)
+            try:
+                data = response.read()
+            except Exception:
+                # 读取超时或连接中断：连接状态未知，关闭而不归还连接池
+                conn.close()
+                raise
+            if response.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            span.set(status=response.status, response_bytes=len(data))
+        return HTTPResponse(response.status, dict(response.getheaders()), data)
+
+    def stream_lines(self, path: str, body: bytes, headers: Optional[Dict[str, str]] = None,
+                     timeout: Optional[float] = None) -> Iterator[bytes]:
+        """
+        发送POST请求并逐行产出响应体 (用于SSE流式响应)
+
+        连接在响应读完后归还连接池；调用方提前中止迭代时连接被关闭。
+        非200状态抛出 HTTPStatusError。
+        """
+        span = tracing.start_span(f"POST {path} (stream)", kind="http", host=self.host, request_bytes=len(body))
+        try:
+            conn, response = self._open(path, body, headers, timeout)
+        except Exception as e:
+            span.end(error=e)
+            raise
+        span.set(status=response.status)
+        if response.status != 200:
+            try:
+                data = response.read()
+            except Exception as e:
+                span.end(error=e)
+                raise
+            finally:
+                conn.close()
+            span.set(response_bytes=len(data))
+            span.end()
+            raise HTTPStatusError(response.status, dict(response.getheaders()), data)
+
+        completed = False
+        received = 0
+        try:
+            for line in iter(response.readline, b""):
+                received += len(line)
+                yield line
+            completed = True
+        finally:
+            span.set(response_bytes=received, completed=completed)
+            span.end()
+            if completed and not response.will_close:
+                self._release(conn)
+            else:
+                conn.close()
+
+    def _open(self, path, body, headers, timeout):
+        """取连接并发送请求，复用的连接失效时换新连接重试一次。返回 (连接, 响应)"""
+        headers = dict(headers or {})
+        headers.setdefault("Connection", "keep-alive")
+        with self._lock:
+            self._stats["requests"] += 1
+
+        conn, reused = self._acquire()
+        try:
+            return conn, self._send(conn, path, body, headers, timeout)
+        except _STALE_CONNECTION_ERRORS:
+            conn.close()
+            if not reused:
+                raise
+        except Exception:
+            conn.close()
+            raise
+
+        conn = self._new_connection()
+        try:
+            return conn, self._send(conn, path, body, headers, timeout)
+        except Exception:
+            conn.close()
+            raise
+
+    def _send(self, conn, path, body, headers, timeout):
+        if timeout is not None:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+        conn.request("POST", self.base_path + path, body=body, headers=headers)
+        return conn.getresponse()
+
+    async def apost(self, path: str, body: bytes, headers: Optional[Dict[str, str]] = None,
+                    timeout: Optional[float] = None) -> HTTPResponse:
+        """post 的异步版本 (在线程中执行，共享同一连接池)"""
+        return await asyncio.to_thread(self.post, path, body, headers, timeout)
+
+    def openai_client(self, api_key: str):
+        """获取共享的OpenAI SDK客户端 (同一API Key只创建一次)"""
+        with self._lock:
+            if api_key not in self._openai_clients:
+                from openai import OpenAI
+                self._openai_clients[api_key] = OpenAI(api_key=api_key, base_url=self.base_url)
+            return self._openai_clients[api_key]
+
+    def stats(self) -> Dict[str, int]:
+        """返回请求与连接复用统计"""
+        with self._lock:
+            return dict(self._stats)
+
+    def close(self):
+        """关闭所有空闲连接"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_shared_transports: Dict[str, HTTPTransport] = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_transport(llm_config: Optional[Dict[str, Any]] = None) -> HTTPTransport:
+    """获取进程内共享的DeepSeek传输层 (同一base_url只创建一次)"""
+    if llm_config is None:
+        from config.llm_config import DEEPSEEK_CONFIG
+        llm_config = DEEPSEEK_CONFIG
+
+    base_url = llm_config.get('base_url', 'https://api.deepseek.com')
+    with _shared_lock:
+        if base_url not in _shared_transports:
+            _shared_transports[base_url] = HTTPTransport(
+                base_url=base_url,
+                pool_size=llm_config.get('pool_size', 8),
+                timeout=llm_config.get('timeout', 300),
+            )
+        return _shared_transports[base_url]
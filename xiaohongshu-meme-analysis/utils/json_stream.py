@@ -0,0 +1,175 @@
+"""LLM输出的增量JSON解析：流式响应中每个数组元素一完整就产出，截断的响应也能恢复已完整的元素"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import json
+import re
+
+_ITEM_SEPARATORS = " \t\r\n,"
+# JSON值可能的首字符
+_VALUE_STARTS = '{["-0123456789tfn'
+# 代码块中的数组，如 ```json\n[
+_FENCED_ARRAY = re.compile(r"```(?:json)?\s*(?=\[)", re.IGNORECASE)
+
+
+class JSONArrayStream:
+    """
+    增量JSON数组解析器
+
+    feed() 接收任意切分的文本片段，返回本次新完整的数组元素。只扫描新到达的字符，
+    记录字符串/转义状态和括号深度，元素闭合后才用 json.loads 解析该元素本身，
+    因此总开销与响应长度成线性关系。第一个 '[' 之前的内容 (说明文字、```json 代码块标记)
+    被忽略；顶层数组闭合后的内容也被忽略。无法解析的单个元素跳过并计入 errors。
+    说明文字中的方括号 (如 "根据[数据]整理") 在第一个元素处就无法解析，此时放弃该 '['，
+    从其后继续寻找数组的开头。
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._item_start: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self.started = False  # 是否已遇到顶层 '['
+        self.finished = False  # 顶层数组是否已闭合
+        self.items = 0
+        self.errors = 0
+
+    def feed(self, text: str) -> List[Any]:
+        """追加一段文本，返回新完整的元素"""
+        if self.finished or not text:
+            return []
+        buf = self._buffer + text
+        completed = []
+        i = self._pos
+        while i < len(buf) and not self.finished:
+            ch = buf[i]
+            if not self.started:
+                self.started = ch == '['
+                i += 1
+                continue
+
+            if self._item_start is None:
+                if ch in _ITEM_SEPARATORS:
+                    i += 1
+                    continue
+                if ch == ']':
+                    self.finished = True
+                    i += 1
+                    continue
+                if not self.items and not self.errors and ch not in _VALUE_STARTS:
+                    # '[' 后不是JSON值，不是数组的开头
+                    self.started = False
+                    i += 1
+                    continue
+                self._item_start = i
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in '{[':
+                self._depth += 1
+            elif ch in '}]' and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    start = self._item_start
+                    if not self._complete(buf[start:i + 1], completed):
+                        self.started = False
+                        i = start
+                        continue
+            elif self._depth == 0 and ch in ',]':
+                # 顶层的数字/字符串等标量元素以逗号或数组结尾分隔
+                start = self._item_start
+                if not self._complete(buf[start:i], completed):
+                    self.started = False
+                    i = start
+                    continue
+                self.finished = ch == ']'
+            i += 1
+
+        # 只保留尚未完整的元素，已解析的部分丢弃
+        keep = self._item_start if self._item_start is not None else i
+        self._buffer = buf[keep:]
+        self._pos = i - keep
+        if self._item_start is not None:
+            self._item_start = 0
+        return completed
+
+    def _complete(self, raw: str, completed: List[Any]) -> bool:
+        """解析一个完整元素；第一个元素就无法解析时返回False (调用方从该元素处重新寻找数组)"""
+        self._item_start = None
+        try:
+            completed.append(json.loads(raw))
+            self.items += 1
+        except ValueError:
+            if not self.items and not self.errors:
+                return False
+            self.errors += 1
+        return True
+
+    @property
+    def truncated(self) -> bool:
+        """数组已开始但未闭合 (响应被截断或流中断)"""
+        return self.started and not self.finished
+
+
+def iter_json_array(chunks: Iterable[str], parser: Optional[JSONArrayStream] = None) -> Iterator[Any]:
+    """
+    逐段解析流式文本，每个数组元素完整时立即产出
+
+    传入 parser 可在迭代结束后查看其 truncated/errors 状态。
+    """
+    parser = parser or JSONArrayStream()
+    for chunk in chunks:
+        for item in parser.feed(chunk):
+            yield item
+
+
+def parse_json_array(text: str) -> List[Any]:
+    """
+    从完整或被截断的响应中解析JSON数组，截断时返回所有已完整的元素
+
+    优先解析 ```json 代码块中的数组，代码块中没有数组时再扫描全文。
+
+    Raises:
+        ValueError: 响应中没有JSON数组
+    """
+    text = text or ""
+    fenced = _FENCED_ARRAY.search(text)
+    if fenced:
+        parser = JSONArrayStream()
+        items = parser.feed(text[fenced.end():])
+        if items or parser.finished:
+            return items
+
+    parser = JSONArrayStream()
+    items = parser.feed(text)
+    if not parser.started:
+        raise ValueError("无法提取JSON数组")
+    return items
+
+
+def parse_json_object(text: str) -> Dict[str, Any]:
+    """
+    从响应中解析第一个完整的JSON对象 (忽略前后的说明文字和代码块标记)
+
+    Raises:
+        ValueError: 响应中没有完整的JSON对象
+    """
+    decoder = json.JSONDecoder()
+    text = text or ""
+    start = text.find('{')
+    while start != -1:
+        try:
+            value, _ = decoder.raw_decode(text, start)
+            if isinstance(value, dict):
+                return value
+        except ValueError:
+            pass
+        start = text.find('{', start + 1)
+    raise ValueError("无法从响应中提取JSON")
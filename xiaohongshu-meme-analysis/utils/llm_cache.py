@@ -0,0 +1,77 @@
+"""LLM响应磁盘缓存 (内容寻址)"""
+from typing import Any, Dict, List, Optional
+import hashlib
+import json
+import os
+import time
+
+from utils.disk_cache import DiskCache, get_shared_disk_cache
+
+
+class LLMResponseCache(DiskCache):
+    """
+    基于内容哈希的LLM响应缓存
+
+    以 服务端地址/model/messages/temperature/max_tokens 的哈希作为键
+    (不同服务端即使模型名相同也不共用缓存)，
+    每条缓存保存为一个JSON文件，按时间和总大小淘汰。
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = "data/cache/llm",
+        max_age_hours: float = 24 * 7,
+        max_size_mb: float = 200,
+    ):
+        super().__init__(cache_dir, max_age_hours * 3600, max_size_mb)
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict], temperature: float, max_tokens: int, base_url: str = "") -> str:
+        """生成缓存键 (服务端地址和请求参数的SHA256)"""
+        payload = json.dumps(
+            {
+                "base_url": base_url,
+                "model": model,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+            },
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存，未命中或已过期返回None"""
+        entry = self._read(self._path_for(key), self.max_age_seconds)
+        return entry.get("content") if entry else None
+
+    def set(self, key: str, content: str, model: str = ""):
+        """写入缓存 (原子替换)，并按需淘汰旧条目"""
+        if not content:
+            return
+        self._write(self._path_for(key), {
+            "model": model,
+            "created_at": time.time(),
+            "content": content,
+        })
+
+
+def get_shared_cache(cache_config: Optional[Dict[str, Any]] = None) -> Optional[LLMResponseCache]:
+    """获取进程内共享的缓存实例 (同一目录只创建一次)"""
+    if cache_config is None:
+        from config.llm_config import LLM_CACHE_CONFIG
+        cache_config = LLM_CACHE_CONFIG
+
+    if not cache_config.get('enabled', True):
+        return None
+
+    return get_shared_disk_cache(
+        LLMResponseCache,
+        cache_config.get('cache_dir', 'data/cache/llm'),
+        max_age_hours=cache_config.get('max_age_hours', 24 * 7),
+        max_size_mb=cache_config.get('max_size_mb', 200),
+    )
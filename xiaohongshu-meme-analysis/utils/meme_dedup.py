@@ -0,0 +1,194 @@
+"""热梗模糊去重 (字符n-gram + MinHash LSH)"""
+from typing import Any, Dict, Iterable, List, Set
+import random
+import re
+import zlib
+
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_NORMALIZE_PATTERN = re.compile(r"[\s\W_]+", re.UNICODE)
+_YEAR_PATTERN = re.compile(r"20\d{2}年?")
+_TAG_SEPARATORS = re.compile(r"[、,，;；]")
+
+
+def normalize_name(name: str) -> str:
+    """归一化梗名称：去掉年份、空白和标点，转小写"""
+    text = _YEAR_PATTERN.sub("", str(name or "")).lower()
+    return _NORMALIZE_PATTERN.sub("", text)
+
+
+def split_tags(tags: Any) -> List[str]:
+    """标签列表 (LLM有时返回 "职场、打工人" 这样的字符串，按分隔符拆开)，去掉空白和空标签"""
+    if not tags:
+        return []
+    if isinstance(tags, str):
+        tags = _TAG_SEPARATORS.split(tags)
+    elif not isinstance(tags, (list, tuple, set)):
+        tags = [tags]
+    return [str(tag).strip() for tag in tags if str(tag).strip()]
+
+
+def char_ngrams(text: str, n: int = 2) -> Set[str]:
+    """字符n-gram集合 (短于n的文本整体作为一个gram)"""
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class MinHashLSH:
+    """
+    MinHash + LSH分桶索引
+
+    每个集合计算 num_perm 个MinHash值，按 bands 段分桶；
+    只有至少一段完全相同的条目才会成为候选对，避免两两比较。
+    相似度为 s 的两个条目成为候选对的概率为 1 - (1 - s^rows)^bands，
+    候选对之后还要用精确的Jaccard确认，所以分段应让阈值处的概率接近1。
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 64, seed: int = 42):
+        if num_perm % bands:
+            raise ValueError("num_perm必须能被bands整除")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = random.Random(seed)
+        self._perms = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+            for _ in range(num_perm)
+        ]
+        self._buckets: List[Dict[tuple, List[int]]] = [{} for _ in range(bands)]
+
+    @classmethod
+    def for_threshold(cls, threshold: float, num_perm: int = 128, max_miss: float = 0.01, seed: int = 42) -> "MinHashLSH":
+        """
+        按相似度阈值选择分段：取阈值处漏检率不超过 max_miss 的最大每段行数
+        (行数越大候选对越少，比较越快)
+
+        Args:
+            threshold: Jaccard相似度阈值
+            num_perm: MinHash个数
+            max_miss: 相似度恰好等于阈值的条目未成为候选对的最大概率
+            seed: 哈希函数的随机种子
+        """
+        rows = 1
+        for candidate in range(2, num_perm + 1):
+            if num_perm % candidate:
+                continue
+            if (1 - threshold ** candidate) ** (num_perm // candidate) > max_miss:
+                break
+            rows = candidate
+        return cls(num_perm=num_perm, bands=num_perm // rows, seed=seed)
+
+    def signature(self, grams: Iterable[str]) -> List[int]:
+        hashes = [zlib.crc32(g.encode("utf-8")) for g in grams]
+        if not hashes:
+            return [_MAX_HASH] * self.num_perm
+        return [
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._perms
+        ]
+
+    def insert(self, item_id: int, signature: List[int]) -> Set[int]:
+        """插入条目并返回与其共享任一分桶的已有条目"""
+        candidates = set()
+        for band in range(self.bands):
+            key = tuple(signature[band * self.rows:(band + 1) * self.rows])
+            bucket = self._buckets[band].setdefault(key, [])
+            candidates.update(bucket)
+            bucket.append(item_id)
+        return candidates
+
+
+def deduplicate_memes(memes: List[Dict], threshold: float = 0.5, ngram: int = 2) -> List[Dict]:
+    """
+    合并名称近似的梗
+
+    先用LSH找出候选对，再以名称n-gram的Jaccard相似度确认；
+    同一簇内合并平台、标签与热度，保留首次出现的顺序。
+
+    Args:
+        memes: 提取出的梗列表
+        threshold: Jaccard相似度阈值
+        ngram: 字符n-gram长度
+
+    Returns:
+        去重后的梗列表
+    """
+    memes = [m for m in memes if isinstance(m, dict) and m.get('name')]
+    parent = list(range(len(memes)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    index = MinHashLSH.for_threshold(threshold)
+    gram_sets = []
+    exact: Dict[str, int] = {}
+    for i, meme in enumerate(memes):
+        key = normalize_name(meme['name']) or str(meme['name']).strip().lower()
+        grams = char_ngrams(key, ngram)
+        gram_sets.append(grams)
+
+        if key in exact:
+            parent[find(i)] = find(exact[key])
+            continue
+        exact[key] = i
+
+        for j in index.insert(i, index.signature(grams)):
+            if jaccard(grams, gram_sets[j]) >= threshold:
+                parent[find(i)] = find(j)
+
+    clusters: Dict[int, List[Dict]] = {}
+    for i, meme in enumerate(memes):
+        clusters.setdefault(find(i), []).append(meme)
+
+    return [_merge_cluster(group) for group in clusters.values()]
+
+
+def _merge_cluster(group: List[Dict]) -> Dict:
+    """合并同一簇的梗：平台与标签取并集，热度取数值最高者，描述取最长者"""
+    merged = dict(group[0])
+    if len(group) == 1:
+        return merged
+
+    platforms: List[str] = []
+    tags: List[str] = []
+    aliases: List[str] = []
+    for meme in group:
+        for platform in re.split(r"[、/,，|]", str(meme.get('platform') or "")):
+            platform = platform.strip()
+            if platform and platform not in platforms:
+                platforms.append(platform)
+        for tag in split_tags(meme.get('tags')):
+            if tag not in tags:
+                tags.append(tag)
+        if meme['name'] != merged['name'] and meme['name'] not in aliases:
+            aliases.append(meme['name'])
+
+    merged['platform'] = "、".join(platforms)
+    merged['tags'] = tags
+    merged['heat'] = max((m.get('heat') for m in group), key=heat_score)
+    merged['description'] = max((str(m.get('description') or "") for m in group), key=len)
+    merged['aliases'] = aliases
+    merged['mentions'] = sum(m.get('mentions', 1) for m in group)
+    return merged
+
+
+def heat_score(heat) -> float:
+    """从热度描述中解析数值 (支持 万/亿)，无法解析时为0"""
+    if isinstance(heat, (int, float)):
+        return float(heat)
+    match = re.search(r"(\d+(?:\.\d+)?)\s*(万|亿)?", str(heat or ""))
+    if not match:
+        return 0.0
+    value = float(match.group(1))
+    return value * {"万": 1e4, "亿": 1e8}.get(match.group(2), 1)
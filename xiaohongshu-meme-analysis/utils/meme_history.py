@@ -0,0 +1,159 @@
+"""热梗历史库 (SQLite + FTS5全文索引)"""
+from typing import Any, Dict, Iterable, List, Optional
+from datetime import datetime
+import json
+import os
+import sqlite3
+import threading
+
+from utils.meme_dedup import normalize_name
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_input TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS memes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    name TEXT NOT NULL,
+    normalized_name TEXT NOT NULL,
+    platform TEXT,
+    heat TEXT,
+    description TEXT,
+    tags TEXT,
+    seen_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_memes_normalized_name ON memes(normalized_name);
+CREATE INDEX IF NOT EXISTS idx_memes_seen_at ON memes(seen_at);
+"""
+
+# trigram分词支持中文子串匹配 (查询词至少3个字符)
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS memes_fts USING fts5(
+    name, description, tags,
+    content='memes', content_rowid='id', tokenize='trigram'
+);
+"""
+
+
+class MemeHistoryStore:
+    """
+    跨运行的热梗历史库
+
+    每次运行的提取结果批量写入 memes 表，名称/描述/标签建立FTS5全文索引；
+    当前SQLite不支持FTS5 trigram时退化为 LIKE 查询。
+    """
+
+    def __init__(self, db_path: str = "data/memes.db"):
+        self.db_path = db_path
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        try:
+            self._conn.executescript(_FTS_SCHEMA)
+            self.fts_enabled = True
+        except sqlite3.OperationalError:
+            self.fts_enabled = False
+        self._conn.commit()
+
+    def record_run(self, memes: Iterable[Dict[str, Any]], user_input: str = "",
+                   seen_at: Optional[str] = None) -> int:
+        """
+        记录一次运行的全部梗 (单个事务内批量写入)
+
+        Returns:
+            运行ID
+        """
+        seen_at = seen_at or datetime.now().isoformat()
+        with self._lock, self._conn:
+            run_id = self._conn.execute(
+                "INSERT INTO runs (user_input, created_at) VALUES (?, ?)", (user_input, seen_at)
+            ).lastrowid
+            rows = [
+                (
+                    run_id,
+                    str(meme['name']),
+                    normalize_name(meme['name']),
+                    str(meme.get('platform') or ''),
+                    str(meme.get('heat') or ''),
+                    str(meme.get('description') or ''),
+                    json.dumps(meme.get('tags') or [], ensure_ascii=False),
+                    seen_at,
+                )
+                for meme in memes
+                if isinstance(meme, dict) and meme.get('name')
+            ]
+            self._conn.executemany(
+                "INSERT INTO memes (run_id, name, normalized_name, platform, heat, description, tags, seen_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            if self.fts_enabled:
+                self._conn.execute(
+                    "INSERT INTO memes_fts (rowid, name, description, tags) "
+                    "SELECT id, name, description, tags FROM memes WHERE run_id = ?",
+                    (run_id,),
+                )
+        return run_id
+
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """全文检索名称/描述/标签，按相关度排序"""
+        query = query.strip()
+        if not query:
+            return []
+        with self._lock:
+            if self.fts_enabled and len(query) >= 3:
+                phrase = '"' + query.replace('"', '""') + '"'
+                rows = self._conn.execute(
+                    "SELECT m.* FROM memes_fts f JOIN memes m ON m.id = f.rowid "
+                    "WHERE memes_fts MATCH ? ORDER BY rank LIMIT ?",
+                    (phrase, limit),
+                ).fetchall()
+            else:
+                pattern = f"%{query}%"
+                rows = self._conn.execute(
+                    "SELECT * FROM memes WHERE name LIKE ? OR description LIKE ? OR tags LIKE ? "
+                    "ORDER BY seen_at DESC LIMIT ?",
+                    (pattern, pattern, pattern, limit),
+                ).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def sightings(self, name: str) -> List[Dict[str, Any]]:
+        """某个梗 (按归一化名称) 的全部历史记录，按时间先后排序"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM memes WHERE normalized_name = ? ORDER BY seen_at",
+                (normalize_name(name),),
+            ).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def first_seen(self, names: Iterable[str]) -> Dict[str, str]:
+        """批量查询梗首次出现的时间，未出现过的名称不在结果中"""
+        lookup = {normalize_name(name): name for name in names}
+        if not lookup:
+            return {}
+        placeholders = ",".join("?" * len(lookup))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT normalized_name, MIN(seen_at) FROM memes "
+                f"WHERE normalized_name IN ({placeholders}) GROUP BY normalized_name",
+                list(lookup),
+            ).fetchall()
+        return {lookup[key]: seen_at for key, seen_at in rows}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        item = dict(row)
+        item['tags'] = json.loads(item.get('tags') or '[]')
+        return item
@@ -0,0 +1,131 @@
+"""热梗统计聚合 (pandas/NumPy本地计算)"""
+from typing import Any, Dict, List
+import re
+
+from utils.meme_dedup import heat_score, split_tags
+
+
+_PLATFORM_SEPARATORS = r"[、/,，|]"
+
+
+def compute_meme_stats(memes: List[Dict[str, Any]], top_tags: int = 20, cooccurrence_tags: int = 12) -> Dict[str, Any]:
+    """
+    计算平台与标签的确定性统计
+
+    Args:
+        memes: 结构化梗列表
+        top_tags: 标签频次表保留的标签数
+        cooccurrence_tags: 参与共现统计的高频标签数
+
+    Returns:
+        {total, platform_counts, tag_frequencies, tag_cooccurrence, heat_overall, heat_by_platform}；
+        未安装pandas时返回空字典
+    """
+    if not memes:
+        return {}
+    # pandas导入耗时约0.3秒，只在分析阶段需要时才导入
+    try:
+        import numpy as np
+        import pandas as pd
+    except ImportError:
+        return {}
+
+    df = pd.DataFrame({
+        'name': [str(m.get('name') or '') for m in memes],
+        'platform': [
+            [p.strip() for p in re.split(_PLATFORM_SEPARATORS, str(m.get('platform') or '')) if p.strip()] or ['未知']
+            for m in memes
+        ],
+        'tags': [split_tags(m.get('tags')) for m in memes],
+        'heat': [heat_score(m.get('heat')) for m in memes],
+    })
+
+    by_platform = df.explode('platform')
+    platform_counts = by_platform['platform'].value_counts()
+
+    tag_series = df['tags'].explode().dropna()
+    tag_counts = tag_series.value_counts()
+
+    # 高频标签的共现矩阵：multi-hot矩阵的转置乘积
+    cooccurrence = []
+    top = list(tag_counts.index[:cooccurrence_tags])
+    if len(top) >= 2:
+        onehot = np.array([[tag in set(tags) for tag in top] for tags in df['tags']], dtype=np.int32)
+        matrix = onehot.T @ onehot
+        rows, cols = np.triu_indices(len(top), k=1)
+        pairs = sorted(
+            ((top[i], top[j], int(matrix[i, j])) for i, j in zip(rows, cols) if matrix[i, j] > 0),
+            key=lambda pair: -pair[2],
+        )
+        cooccurrence = [{'tags': [a, b], 'count': count} for a, b, count in pairs[:15]]
+
+    heat_known = df[df['heat'] > 0]['heat']
+    heat_overall = {}
+    if not heat_known.empty:
+        quantiles = heat_known.quantile([0.25, 0.5, 0.75])
+        heat_overall = {
+            'count': int(heat_known.size),
+            'min': float(heat_known.min()),
+            'p25': float(quantiles[0.25]),
+            'median': float(quantiles[0.5]),
+            'p75': float(quantiles[0.75]),
+            'max': float(heat_known.max()),
+        }
+
+    heat_rows = by_platform[by_platform['heat'] > 0].groupby('platform')['heat'].agg(['count', 'median', 'max'])
+    heat_by_platform = {
+        platform: {'count': int(row['count']), 'median': float(row['median']), 'max': float(row['max'])}
+        for platform, row in heat_rows.iterrows()
+    }
+
+    return {
+        'total': int(len(df)),
+        'platform_counts': {k: int(v) for k, v in platform_counts.items()},
+        'tag_frequencies': {k: int(v) for k, v in tag_counts.head(top_tags).items()},
+        'tag_cooccurrence': cooccurrence,
+        'heat_overall': heat_overall,
+        'heat_by_platform': heat_by_platform,
+    }
+
+
+def _format_heat(value: float) -> str:
+    if value >= 1e8:
+        return f"{value / 1e8:.1f}亿"
+    if value >= 1e4:
+        return f"{value / 1e4:.1f}万"
+    return f"{value:.0f}"
+
+
+def format_stats_tables(stats: Dict[str, Any], sections: List[str]) -> str:
+    """将统计结果渲染为紧凑的Markdown表格 (只输出指定部分)"""
+    if not stats:
+        return ""
+    parts = [f"共 {stats['total']} 个梗。"]
+
+    if 'platform_counts' in sections and stats.get('platform_counts'):
+        rows = "\n".join(f"| {k} | {v} |" for k, v in stats['platform_counts'].items())
+        parts.append(f"平台分布:\n| 平台 | 梗数 |\n|---|---|\n{rows}")
+
+    if 'heat_by_platform' in sections and stats.get('heat_by_platform'):
+        rows = "\n".join(
+            f"| {k} | {v['count']} | {_format_heat(v['median'])} | {_format_heat(v['max'])} |"
+            for k, v in stats['heat_by_platform'].items()
+        )
+        parts.append(f"各平台热度 (仅含可解析数值的条目):\n| 平台 | 条目 | 中位数 | 最高 |\n|---|---|---|---|\n{rows}")
+
+    if 'heat_overall' in sections and stats.get('heat_overall'):
+        h = stats['heat_overall']
+        parts.append(
+            f"热度分布 ({h['count']}条可解析): 最低 {_format_heat(h['min'])} / P25 {_format_heat(h['p25'])} / "
+            f"中位数 {_format_heat(h['median'])} / P75 {_format_heat(h['p75'])} / 最高 {_format_heat(h['max'])}"
+        )
+
+    if 'tag_frequencies' in sections and stats.get('tag_frequencies'):
+        parts.append("高频标签: " + "、".join(f"{k}({v})" for k, v in stats['tag_frequencies'].items()))
+
+    if 'tag_cooccurrence' in sections and stats.get('tag_cooccurrence'):
+        parts.append("标签共现: " + "、".join(
+            f"{pair['tags'][0]}+{pair['tags'][1]}({pair['count']})" for pair in stats['tag_cooccurrence']
+        ))
+
+    return "\n\n".join(parts)
@@ -0,0 +1,78 @@
+"""搜索词与爬取目标的归一化去重"""
+from typing import Any, Dict, Iterable, List, Set
+import re
+import unicodedata
+
+from utils.meme_dedup import char_ngrams, jaccard, normalize_name
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+_YEAR_PATTERN = re.compile(r"20\d{2}")
+_INPUT_NOISE_PATTERN = re.compile(r"[\s\W_]+", re.UNICODE)
+
+
+def normalize_query(query: str) -> str:
+    """规范化搜索词 (全角转半角、小写、合并空白)，仍是可直接发送的查询"""
+    text = unicodedata.normalize("NFKC", str(query or "")).lower()
+    return _WHITESPACE_PATTERN.sub(" ", text).strip(" \t,，。.;；")
+
+
+def normalize_user_input(text: str) -> str:
+    """规范化用户需求，用作规划结果的记忆键 (保留年份，去掉空白和标点)"""
+    text = unicodedata.normalize("NFKC", str(text or "")).lower()
+    return _INPUT_NOISE_PATTERN.sub("", text)
+
+
+def _years(text: str) -> Set[str]:
+    return set(_YEAR_PATTERN.findall(text))
+
+
+def dedupe_queries(queries: Iterable[str], threshold: float = 0.8) -> List[str]:
+    """
+    去掉重复和近似重复的搜索词，保持首次出现的顺序
+
+    去掉年份和标点后相同、或字符bigram相似度不低于 threshold 的查询视为重复；
+    年份不同的查询 (如 2024/2025) 不合并。重复的一对中保留带年份的 (更具体的) 写法。
+    """
+    kept: List[Dict[str, Any]] = []
+    for query in queries:
+        text = normalize_query(query)
+        key = normalize_name(text)
+        if not key:
+            continue
+        years = _years(text)
+        grams = char_ngrams(key)
+
+        duplicate = None
+        for item in kept:
+            if years and item["years"] and years != item["years"]:
+                continue
+            if key == item["key"] or jaccard(grams, item["grams"]) >= threshold:
+                duplicate = item
+                break
+
+        if duplicate is None:
+            kept.append({"text": text, "key": key, "grams": grams, "years": years})
+        elif years and not duplicate["years"]:
+            duplicate.update(text=text, years=years)
+    return [item["text"] for item in kept]
+
+
+def dedupe_targets(targets: Iterable[str]) -> List[str]:
+    """按归一化名称去掉重复的爬取目标，保持首次出现的顺序"""
+    seen = set()
+    result = []
+    for target in targets:
+        key = normalize_name(unicodedata.normalize("NFKC", str(target or "")))
+        if key and key not in seen:
+            seen.add(key)
+            result.append(str(target).strip())
+    return result
+
+
+def normalize_plan(plan: Dict[str, Any], threshold: float = 0.8) -> Dict[str, Any]:
+    """返回搜索词和爬取目标已去重的计划副本"""
+    plan = dict(plan)
+    plan["tavily_queries"] = dedupe_queries(plan.get("tavily_queries") or [], threshold)
+    plan["playwright_targets"] = dedupe_targets(plan.get("playwright_targets") or [])
+    return plan
+
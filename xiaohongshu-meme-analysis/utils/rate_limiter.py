@@ -0,0 +1,57 @@
+"""令牌桶限流器"""
+from typing import Dict
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    线程安全的令牌桶
+
+    以 rate 个/秒的速度补充令牌，最多积累 capacity 个，
+    acquire() 在没有令牌时阻塞等待。rate 为0表示不限速。
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        if rate < 0:
+            raise ValueError(f"rate 不能为负数: {rate}")
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self, tokens: float = 1):
+        """获取令牌，不足时等待补充"""
+        if self.rate == 0:
+            return
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+_shared_buckets: Dict[str, TokenBucket] = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_bucket(key: str, rate: float, capacity: float = 1) -> TokenBucket:
+    """
+    获取进程内共享的令牌桶 (按 key 区分，如服务端地址)
+
+    批量/服务模式下多个工作流同时运行，共用同一个令牌桶才能让总请求速率不超过限制。
+    同一 key 只在首次调用时按 rate/capacity 创建。
+    """
+    with _shared_lock:
+        if key not in _shared_buckets:
+            _shared_buckets[key] = TokenBucket(rate, capacity)
+        return _shared_buckets[key]
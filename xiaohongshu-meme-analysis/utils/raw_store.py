@@ -0,0 +1,87 @@
+"""追加写入的JSONL原始数据存储"""
+from typing import Any, Dict, Iterator, Optional
+import gzip
+import json
+import os
+import threading
+
+
+def _open_text(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class RawStore:
+    """
+    原始采集结果存储 (每行一条JSON记录)
+
+    每条结果采集到后立即追加写入并刷新，进程中断时已写入的记录仍可读取。
+    路径以 .gz 结尾时使用gzip压缩。线程安全。
+    """
+
+    def __init__(self, path: str = "data/raw/multi_source.jsonl"):
+        self.path = path
+        self.counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 新一轮采集覆盖旧文件
+        self._file = _open_text(path, "w")
+
+    def append(self, record: Dict[str, Any]):
+        """追加一条记录"""
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            source = record.get("source", "unknown")
+            self.counts[source] = self.counts.get(source, 0) + 1
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_records(path: str, source: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    逐条读取原始记录，指定 source 时只返回该来源的记录
+
+    兼容旧版整体JSON文件 (multi_source.json)；JSONL文件中被截断的末行会被跳过，
+    因此 RawStore 仍在写入时也可读取 (每条记录写入后已刷新)。
+    """
+    if source is not None:
+        for record in iter_records(path):
+            if record.get("source") == source:
+                yield record
+        return
+
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            raw_data = json.load(f)
+        for item_source, key in (("tavily", "tavily_results"), ("playwright", "playwright_results")):
+            for item in raw_data.get(key, []):
+                item.setdefault("source", item_source)
+                yield item
+        return
+
+    with _open_text(path, "r") as f:
+        try:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+        except EOFError:
+            # gzip文件在写入中途被中断
+            return
@@ -0,0 +1,279 @@
+"""LLM请求的容错策略：指数退避重试 (支持Retry-After)、对冲请求和熔断"""
+from typing import Any, Callable, Dict, Optional, Tuple
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+import contextvars
+import http.client
+import random
+import threading
+import time
+
+from utils.http_transport import HTTPStatusError
+
+# 可重试的HTTP状态：限流、超时和服务端错误
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(RuntimeError):
+    """熔断器处于打开状态，请求未发送"""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 响应头 (秒数或HTTP日期)，无法解析时返回None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """错误响应中的 Retry-After (秒)"""
+    if isinstance(error, HTTPStatusError):
+        for key, value in (error.headers or {}).items():
+            if key.lower() == 'retry-after':
+                return parse_retry_after(value)
+    return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """HTTP错误按状态码判断；网络错误、超时和响应格式异常均可重试"""
+    if isinstance(error, HTTPStatusError):
+        return error.status in RETRYABLE_STATUSES
+    return not isinstance(error, CircuitOpenError)
+
+
+def is_endpoint_failure(error: BaseException) -> bool:
+    """是否说明服务端不可用 (计入熔断)：网络错误、超时和5xx；限流和4xx说明服务端仍在响应"""
+    if isinstance(error, HTTPStatusError):
+        return error.status >= 500
+    return isinstance(error, (OSError, http.client.HTTPException))
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """第 attempt 次 (从0开始) 失败后的等待时间：[0, min(cap, base*2^attempt)] 内均匀随机 (full jitter)"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+    熔断器
+
+    连续 failure_threshold 次服务端失败后打开，期间请求直接失败；
+    经过 reset_timeout 秒后进入半开状态，放行一次试探请求，成功则关闭，失败则重新打开。
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+    def retry_in(self) -> float:
+        """距离下一次试探还有多少秒"""
+        with self._lock:
+            if self.state != "open":
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+
+class LatencyTracker:
+    """最近 window 次成功请求的耗时，用于计算对冲延迟"""
+
+    def __init__(self, window: int = 100):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float, min_samples: int = 1) -> Optional[float]:
+        """样本数不足 min_samples 时返回None"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < max(1, min_samples):
+            return None
+        return samples[min(int(round(pct * (len(samples) - 1))), len(samples) - 1)]
+
+
+_hedge_pool: Optional[ThreadPoolExecutor] = None
+_hedge_pool_lock = threading.Lock()
+
+
+def _get_hedge_pool() -> ThreadPoolExecutor:
+    global _hedge_pool
+    with _hedge_pool_lock:
+        if _hedge_pool is None:
+            _hedge_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-hedge")
+        return _hedge_pool
+
+
+def hedged_call(func: Callable[[], Any], delay: Optional[float]) -> Tuple[Any, bool]:
+    """
+    对冲调用：func 超过 delay 秒未返回时并发执行一个副本，采用先成功的结果
+
+    delay 为None时直接调用。落后的请求在后台自然结束 (连接随后归还连接池)。
+
+    Returns:
+        (结果, 是否发出了副本)
+    """
+    if delay is None:
+        return func(), False
+    pool = _get_hedge_pool()
+    # 每个任务各自复制上下文 (同一Context不能在两个线程中同时运行)
+    primary = pool.submit(contextvars.copy_context().run, func)
+    done, _ = wait([primary], timeout=delay)
+    if done:
+        return primary.result(), False
+
+    pending = {primary, pool.submit(contextvars.copy_context().run, func)}
+    error: Optional[BaseException] = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result(), True
+            error = future.exception()
+    raise error
+
+
+class RetryPolicy:
+    """
+    单个Agent的LLM请求策略
+
+    每次尝试前检查熔断器；可重试的失败按 full jitter 指数退避等待 (有 Retry-After 时以其为准)，
+    单次调用 (含所有重试) 不超过 deadline 秒；可选的对冲请求在首个请求超过近期
+    hedge_percentile 耗时后发出。熔断器按服务端地址共享，耗时统计按Agent共享。
+    """
+
+    def __init__(self, config: Dict[str, Any], breaker: CircuitBreaker, latency: LatencyTracker):
+        self.config = config
+        self.breaker = breaker
+        self.latency = latency
+
+    def start(self) -> float:
+        """开始一次调用，返回截止时间 (time.monotonic)"""
+        return time.monotonic() + self.config.get('deadline', 600)
+
+    def check(self):
+        """熔断器打开时抛出 CircuitOpenError"""
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"LLM服务熔断中，{self.breaker.retry_in():.0f}秒后重试")
+
+    def timeout(self, deadline: float) -> float:
+        """本次尝试的请求超时：不超过单次上限和剩余时间"""
+        return max(1.0, min(self.config.get('request_timeout', 180), deadline - time.monotonic()))
+
+    def hedge_delay(self) -> Optional[float]:
+        """对冲延迟；未开启或耗时样本不足时返回None"""
+        if not self.config.get('hedge', False):
+            return None
+        observed = self.latency.percentile(self.config.get('hedge_percentile', 0.95),
+                                           self.config.get('hedge_min_samples', 10))
+        if observed is None:
+            return None
+        return max(self.config.get('hedge_min_delay', 5), observed)
+
+    def on_success(self, seconds: Optional[float] = None):
+        self.breaker.record_success()
+        if seconds is not None:
+            self.latency.record(seconds)
+
+    def on_failure(self, error: BaseException, attempt: int, deadline: float) -> Optional[float]:
+        """
+        记录一次失败，返回重试前的等待秒数；不应再重试时返回None
+
+        不可重试的错误、已用完次数、或等待后会超过截止时间时不再重试。
+        """
+        if is_endpoint_failure(error):
+            self.breaker.record_failure()
+        elif not isinstance(error, CircuitOpenError):
+            self.breaker.record_success()
+
+        if not is_retryable(error) or attempt + 1 >= self.config.get('max_attempts', 4):
+            return None
+        delay = retry_after(error)
+        if delay is None:
+            delay = backoff_delay(attempt, self.config.get('backoff_base', 1.0), self.config.get('backoff_max', 30))
+        if time.monotonic() + delay >= deadline:
+            return None
+        return delay
+
+    def call(self, send: Callable[[float], Any], span=None) -> Any:
+        """
+        按策略执行 send(timeout)，返回其结果；最终失败时抛出最后一次的异常
+
+        span 记录重试次数、是否发出对冲请求。
+        """
+        deadline = self.start()
+        attempt = 0
+        while True:
+            self.check()
+            timeout = self.timeout(deadline)
+            started = time.monotonic()
+            try:
+                result, hedged = hedged_call(lambda: send(timeout), self.hedge_delay())
+            except Exception as e:
+                delay = self.on_failure(e, attempt, deadline)
+                if delay is None:
+                    raise
+                if span is not None:
+                    span.add(retries=1)
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self.on_success(time.monotonic() - started)
+            if span is not None and hedged:
+                span.set(hedged=True)
+            return result
+
+
+_shared_breakers: Dict[str, CircuitBreaker] = {}
+_shared_latency: Dict[str, LatencyTracker] = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_breaker(endpoint: str, failure_threshold: int = 5, reset_timeout: float = 30.0) -> CircuitBreaker:
+    """获取进程内按服务端地址共享的熔断器"""
+    with _shared_lock:
+        if endpoint not in _shared_breakers:
+            _shared_breakers[endpoint] = CircuitBreaker(failure_threshold, reset_timeout)
+        return _shared_breakers[endpoint]
+
+
+def get_shared_latency(key: str) -> LatencyTracker:
+    """获取进程内共享的耗时统计 (按服务端地址+Agent区分)"""
+    with _shared_lock:
+        if key not in _shared_latency:
+            _shared_latency[key] = LatencyTracker()
+        return _shared_latency[key]
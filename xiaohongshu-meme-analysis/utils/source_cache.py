@@ -0,0 +1,76 @@
+"""数据源结果磁盘缓存 (按来源设置TTL)"""
+from typing import Any, Dict, Optional
+import hashlib
+import os
+import time
+
+from utils.disk_cache import DiskCache, get_shared_disk_cache
+
+
+class SourceCache(DiskCache):
+    """
+    采集结果缓存
+
+    以 "来源 + 查询词/URL" 的哈希作为键，每条缓存保存为 <来源>-<哈希>.json。
+    各来源的有效期单独配置 (热榜变化快、TTL短；媒体搜索结果TTL长)，
+    过期条目在读取和写入时淘汰，总大小超限时从最旧的开始删除。
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = "data/cache/sources",
+        ttl_minutes: Optional[Dict[str, float]] = None,
+        default_ttl_minutes: float = 60,
+        max_size_mb: float = 100,
+    ):
+        super().__init__(cache_dir, default_ttl_minutes * 60, max_size_mb)
+        self.ttl_seconds = {source: minutes * 60 for source, minutes in (ttl_minutes or {}).items()}
+
+    def ttl_for(self, source: str) -> float:
+        """来源的有效期 (秒)；TTL为0表示不缓存该来源"""
+        return self.ttl_seconds.get(source, self.max_age_seconds)
+
+    def _ttl_for_file(self, fname: str) -> float:
+        # 按文件名中的来源取TTL
+        return self.ttl_for(fname.rsplit("-", 1)[0])
+
+    def _path_for(self, source: str, key: str) -> str:
+        digest = hashlib.sha256(f"{source}\n{key}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{source}-{digest}.json")
+
+    def get(self, source: str, key: str) -> Optional[Any]:
+        """读取缓存，未命中或已过期返回None"""
+        ttl = self.ttl_for(source)
+        if ttl <= 0:
+            return None
+        entry = self._read(self._path_for(source, key), ttl)
+        return entry.get("value") if entry else None
+
+    def set(self, source: str, key: str, value: Any):
+        """写入缓存 (原子替换)，并按需淘汰旧条目；空结果不缓存"""
+        if not value or self.ttl_for(source) <= 0:
+            return
+        self._write(self._path_for(source, key), {
+            "source": source,
+            "key": key,
+            "created_at": time.time(),
+            "value": value,
+        })
+
+
+def get_shared_source_cache(cache_config: Optional[Dict[str, Any]] = None) -> Optional[SourceCache]:
+    """获取进程内共享的数据源缓存 (同一目录只创建一次)"""
+    if cache_config is None:
+        from config.llm_config import SOURCE_CACHE_CONFIG
+        cache_config = SOURCE_CACHE_CONFIG
+
+    if not cache_config.get('enabled', True):
+        return None
+
+    return get_shared_disk_cache(
+        SourceCache,
+        cache_config.get('cache_dir', 'data/cache/sources'),
+        ttl_minutes=cache_config.get('ttl_minutes'),
+        default_ttl_minutes=cache_config.get('default_ttl_minutes', 60),
+        max_size_mb=cache_config.get('max_size_mb', 100),
+    )
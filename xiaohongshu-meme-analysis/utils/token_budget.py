@@ -0,0 +1,84 @@
+"""Token预估与提示词预算打包"""
+from typing import Any, Callable, Dict, List, Sequence
+
+
+# DeepSeek官方换算：1个中文字符约0.6 token，1个英文字符约0.3 token
+CJK_TOKENS_PER_CHAR = 0.6
+OTHER_TOKENS_PER_CHAR = 0.3
+# 每条消息的角色与格式开销
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def _is_cjk(ch: str) -> bool:
+    return (
+        '\u4e00' <= ch <= '\u9fff'     # CJK统一汉字
+        or '\u3400' <= ch <= '\u4dbf'  # 扩展A
+        or '\u3000' <= ch <= '\u303f'  # CJK标点
+        or '\uff00' <= ch <= '\uffef'  # 全角字符
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    """估算文本token数 (中英文分别按DeepSeek换算比例计算)"""
+    if not text:
+        return 0
+    cjk = sum(1 for ch in text if _is_cjk(ch))
+    return int(cjk * CJK_TOKENS_PER_CHAR + (len(text) - cjk) * OTHER_TOKENS_PER_CHAR) + 1
+
+
+def estimate_messages_tokens(messages: List[Dict[str, Any]]) -> int:
+    """估算消息列表的总token数"""
+    return sum(
+        estimate_tokens(str(message.get('content', ''))) + MESSAGE_OVERHEAD_TOKENS
+        for message in messages
+    )
+
+
+def prompt_budget(context_window: int, max_tokens: int, reserve: int = 512) -> int:
+    """在上下文窗口中扣除输出token与余量后，提示词可用的token数"""
+    return max(context_window - max_tokens - reserve, 0)
+
+
+def truncate_to_tokens(text: str, budget: int, suffix: str = "...") -> str:
+    """按token预算截断文本"""
+    if estimate_tokens(text) <= budget:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid]) + estimate_tokens(suffix) <= budget:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low] + suffix
+
+
+def pack_items(
+    items: Sequence[Any],
+    budget: int,
+    render: Callable[[Any], str],
+    priority: Callable[[Any], Any] = None,
+) -> List[str]:
+    """
+    在token预算内按优先级打包条目
+
+    Args:
+        items: 待打包的条目
+        budget: token预算
+        render: 条目 -> 提示词文本
+        priority: 排序键，值越大越优先；为空时保持原顺序
+
+    Returns:
+        放得下的条目文本 (按优先级排序)
+    """
+    ordered = sorted(items, key=priority, reverse=True) if priority else list(items)
+    packed = []
+    used = 0
+    for item in ordered:
+        text = render(item)
+        cost = estimate_tokens(text) + 1
+        if used + cost > budget:
+            continue
+        packed.append(text)
+        used += cost
+    return packed
@@ -0,0 +1,183 @@
+"""运行追踪：记录工作流步骤、LLM调用和HTTP请求的耗时/字节/token"""
+from typing import Any, Dict, Iterator, List, Optional
+from contextlib import contextmanager
+from datetime import datetime
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+
+
+_current_tracer: contextvars.ContextVar = contextvars.ContextVar("current_tracer", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+# 汇总到 totals 的数值属性
+_SUMMED_ATTRS = ("prompt_tokens", "completion_tokens", "request_bytes", "response_bytes", "retries")
+
+
+class Span:
+    """一个计时区间；属性通过 set() 追加，end() 后写入所属Tracer"""
+
+    def __init__(self, tracer: "Tracer", name: str, kind: str, parent_id: Optional[int], attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.id = next(tracer._ids)
+        self.name = name
+        self.kind = kind
+        self.parent_id = parent_id
+        self.attrs = dict(attrs)
+        self.thread = threading.current_thread().name
+        self._start = time.perf_counter()
+        self._ended = False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def add(self, **counts):
+        """累加数值属性 (如重试次数、字节数)"""
+        for key, value in counts.items():
+            self.attrs[key] = self.attrs.get(key, 0) + value
+
+    def end(self, error: Optional[BaseException] = None):
+        if self._ended:
+            return
+        self._ended = True
+        if error is not None:
+            self.attrs["error"] = f"{type(error).__name__}: {error}"
+        end = time.perf_counter()
+        self.tracer._record({
+            "id": self.id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "thread": self.thread,
+            "start": round(self._start - self.tracer._origin, 4),
+            "duration": round(end - self._start, 4),
+            **self.attrs,
+        })
+
+
+class _NullSpan:
+    """未启用追踪时使用的空Span"""
+
+    def set(self, **attrs):
+        pass
+
+    def add(self, **counts):
+        pass
+
+    def end(self, error: Optional[BaseException] = None):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """
+    单次运行的追踪记录
+
+    通过 activate() 设为当前上下文的Tracer后，span()/start_span() 记录的区间
+    归入该Tracer，父子关系取自当前上下文。上下文随 asyncio 任务和 asyncio.to_thread
+    自动传递；线程池任务需用 contextvars.copy_context().run 提交。
+    """
+
+    def __init__(self, name: str = "", **metadata):
+        self.name = name
+        self.metadata = metadata
+        self.started_at = datetime.now().isoformat()
+        self.spans: List[Dict[str, Any]] = []
+        self._origin = time.perf_counter()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _record(self, span: Dict[str, Any]):
+        with self._lock:
+            self.spans.append(span)
+
+    def totals(self) -> Dict[str, Any]:
+        """按类型汇总：调用次数、耗时、token、字节、重试和缓存命中"""
+        with self._lock:
+            spans = list(self.spans)
+        totals: Dict[str, Dict[str, Any]] = {}
+        for span in spans:
+            bucket = totals.setdefault(span["kind"], {"count": 0, "duration": 0.0, "cache_hits": 0, "errors": 0})
+            bucket["count"] += 1
+            bucket["duration"] = round(bucket["duration"] + span["duration"], 4)
+            bucket["cache_hits"] += 1 if span.get("cache_hit") else 0
+            bucket["errors"] += 1 if span.get("error") else 0
+            for key in _SUMMED_ATTRS:
+                if isinstance(span.get(key), (int, float)):
+                    bucket[key] = bucket.get(key, 0) + span[key]
+        return totals
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span["start"])
+        return {
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration": round(time.perf_counter() - self._origin, 4),
+            "metadata": self.metadata,
+            "totals": self.totals(),
+            "spans": spans,
+        }
+
+    def export(self, trace_dir: str = "data/traces") -> str:
+        """导出为JSON文件，返回文件路径"""
+        os.makedirs(trace_dir, exist_ok=True)
+        path = os.path.join(trace_dir, f"trace_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return path
+
+
+@contextmanager
+def activate(tracer: Tracer) -> Iterator[Tracer]:
+    """将tracer设为当前上下文的Tracer"""
+    token = _current_tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _current_tracer.reset(token)
+
+
+def current_tracer() -> Optional[Tracer]:
+    return _current_tracer.get()
+
+
+def current_span():
+    """当前上下文的Span，没有时返回空Span (可直接调用 set()/add())"""
+    return _current_span.get() or NULL_SPAN
+
+
+def start_span(name: str, kind: str = "internal", **attrs):
+    """
+    开始一个Span (不设为当前Span，需手动调用 end())
+
+    适用于生成器等跨越多次 yield 的区间；未启用追踪时返回空Span。
+    """
+    tracer = _current_tracer.get()
+    if tracer is None:
+        return NULL_SPAN
+    parent = _current_span.get()
+    return Span(tracer, name, kind, parent.id if parent else None, attrs)
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attrs):
+    """记录一个区间，期间创建的Span以它为父节点；异常会记录后继续抛出"""
+    current = start_span(name, kind, **attrs)
+    if current is NULL_SPAN:
+        yield current
+        return
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.end(error=e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
@@ -0,0 +1,186 @@
+"""批量运行：多个分析需求共用一套连接池、缓存和浏览器"""
+from typing import Any, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import copy
+import hashlib
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from config.llm_config import AGENT_CONFIG, DEEPSEEK_CONFIG, HISTORY_CONFIG
+from utils.browser_service import BrowserService
+from utils.http_transport import get_shared_transport
+from utils.meme_history import MemeHistoryStore
+from workflows.llm_orchestrator import LLMOrchestrator
+
+
+def load_queries(path: str) -> List[str]:
+    """读取需求文件：每行一个需求，忽略空行和 # 注释，重复的需求只保留第一次"""
+    queries = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            query = line.strip()
+            if query and not query.startswith('#') and query not in queries:
+                queries.append(query)
+    return queries
+
+
+def query_slug(query: str) -> str:
+    """需求对应的目录名 (可读前缀 + 哈希)，同一需求每次批量运行使用相同目录，便于断点续跑"""
+    prefix = re.sub(r'[^\w]+', '_', query).strip('_')[:30]
+    digest = hashlib.sha1(query.encode('utf-8')).hexdigest()[:8]
+    return f"{prefix}-{digest}" if prefix else digest
+
+
+def query_config(config: Dict[str, Any], slug: str, data_root: str, report_root: str,
+                 run_id: str = None) -> Dict[str, Any]:
+    """
+    单个需求的配置：原始数据、中间结果和报告写入该需求自己的目录
+
+    指定 run_id 时报告写入 report_root/<slug>/<run_id>/，同一需求的多次运行互不覆盖报告。
+    """
+    config = copy.deepcopy(config)
+    run_dir = os.path.join(data_root, slug)
+    config.setdefault('crawler', {})['raw_store_path'] = os.path.join(run_dir, "raw", "multi_source.jsonl")
+    config.setdefault('extractor', {})['output_dir'] = os.path.join(run_dir, "processed")
+    config.setdefault('analyzer', {})['output_dir'] = os.path.join(run_dir, "processed")
+    report_dir = os.path.join(report_root, slug, run_id) if run_id else os.path.join(report_root, slug)
+    config.setdefault('writer', {})['report_dir'] = report_dir
+    return config
+
+
+class BatchRunner:
+    """
+    批量工作流执行器
+
+    多个需求在有界线程池中并发执行，每个需求一个独立的工作流 (独立的数据目录和报告目录)，
+    共享DeepSeek连接池、LLM/数据源缓存、热梗历史库和常驻浏览器，避免每个需求冷启动。
+    """
+
+    def __init__(self, config: Dict[str, Any] = None, max_workers: int = 4,
+                 data_root: str = "data/batch", report_root: str = "reports/batch"):
+        self.config = config if config is not None else AGENT_CONFIG
+        self.max_workers = max(1, max_workers)
+        self.data_root = data_root
+        self.report_root = report_root
+
+        self.transport = get_shared_transport(DEEPSEEK_CONFIG)
+        self.history = MemeHistoryStore(HISTORY_CONFIG['db_path']) if HISTORY_CONFIG.get('enabled') else None
+        self.browser = BrowserService() if BrowserService.available() else None
+
+    def run(self, queries: List[str], resume: bool = False) -> Dict[str, Any]:
+        """
+        执行全部需求，单个需求失败不影响其他需求
+
+        Returns:
+            汇总结果 (同时保存为 report_root/summary_<时间>.json)
+        """
+        print(f"📦 批量运行: {len(queries)} 个需求，并发 {self.max_workers}")
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [
+                pool.submit(self._run_one, index, len(queries), query, resume)
+                for index, query in enumerate(queries, 1)
+            ]
+            results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start
+
+        summary = self._summarize(results, elapsed)
+        os.makedirs(self.report_root, exist_ok=True)
+        summary_path = os.path.join(self.report_root, f"summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        summary['summary_path'] = summary_path
+
+        print(self.format_summary(summary))
+        return summary
+
+    def _run_one(self, index: int, total: int, query: str, resume: bool) -> Dict[str, Any]:
+        result = self.run_query(query, resume)
+        mark = "✓" if result['status'] == 'ok' else "❌"
+        print(f"[{index}/{total}] {mark} {query} ({result['duration']:.1f}s) → {result.get('report') or result.get('error')}")
+        return result
+
+    def run_query(self, query: str, resume: bool = False, run_id: str = None) -> Dict[str, Any]:
+        """
+        用共享资源执行单个需求，异常不向外抛出
+
+        run_id 用于区分同一需求的多次运行 (如服务模式的任务ID)，报告写入各自目录。
+
+        Returns:
+            {query, slug, status ('ok'/'failed'), duration, report/timings/trace 或 error}
+        """
+        slug = query_slug(query)
+        result = {'query': query, 'slug': slug}
+        start = time.perf_counter()
+        try:
+            orchestrator = LLMOrchestrator(
+                query_config(self.config, slug, self.data_root, self.report_root, run_id),
+                self.transport, history=self.history, browser=self.browser
+            )
+            result['report'] = orchestrator.run(query, resume=resume)
+            result['status'] = 'ok'
+            result['timings'] = orchestrator.last_timings
+            result['trace'] = orchestrator.last_trace_path
+        except Exception as e:
+            result['status'] = 'failed'
+            result['error'] = f"{type(e).__name__}: {e}"
+        result['duration'] = round(time.perf_counter() - start, 3)
+        return result
+
+    @staticmethod
+    def _summarize(results: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+        """汇总：成功/失败数、总耗时、各需求耗时、各阶段耗时中位数"""
+        stage_durations: Dict[str, List[float]] = {}
+        for result in results:
+            for stage, timing in (result.get('timings') or {}).items():
+                stage_durations.setdefault(stage, []).append(timing['duration'])
+
+        succeeded = [r for r in results if r['status'] == 'ok']
+        return {
+            'finished_at': datetime.now().isoformat(),
+            'total': len(results),
+            'succeeded': len(succeeded),
+            'failed': len(results) - len(succeeded),
+            'elapsed': round(elapsed, 3),
+            'run_duration_p50': round(statistics.median([r['duration'] for r in results]), 3) if results else 0.0,
+            'stage_p50': {
+                stage: round(statistics.median(durations), 3)
+                for stage, durations in stage_durations.items()
+            },
+            'runs': results,
+        }
+
+    @staticmethod
+    def format_summary(summary: Dict[str, Any]) -> str:
+        lines = [
+            "=" * 60,
+            f"📦 批量运行完成: 成功 {summary['succeeded']} / 失败 {summary['failed']}，"
+            f"总耗时 {summary['elapsed']:.1f}s (单个需求p50 {summary['run_duration_p50']:.1f}s)",
+            "⏱️  阶段耗时中位数:",
+        ]
+        for stage, duration in summary['stage_p50'].items():
+            lines.append(f"   {stage:<18} {duration:>7.1f}s")
+        if summary.get('summary_path'):
+            lines.append(f"📄 汇总: {summary['summary_path']}")
+        lines.append("=" * 60)
+        return "\n".join(lines)
+
+    def close(self):
+        """关闭共享的浏览器和历史库"""
+        if self.browser:
+            self.browser.close()
+        if self.history:
+            self.history.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
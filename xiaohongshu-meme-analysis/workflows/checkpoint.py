@@ -0,0 +1,114 @@
+"""工作流阶段检查点 (按输入+配置指纹存储阶段产物)"""
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+
+class StageCheckpoint:
+    """
+    阶段产物存储
+
+    每个阶段的产物以 "阶段名 + 输入内容 + 阶段配置" 的哈希为指纹，
+    保存在 run_dir/<阶段>-<指纹>/ 下。输入和配置不变时可直接恢复产物，跳过该阶段。
+    每次保存后淘汰超过 max_age_days 未使用的产物，数量超过 max_entries 时
+    从最久未使用的开始删除 (恢复产物也算一次使用)。
+    """
+
+    def __init__(self, run_dir: str = "data/runs", max_entries: Optional[int] = None, max_age_days: Optional[float] = None):
+        self.run_dir = run_dir
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_days * 86400 if max_age_days is not None else None
+        self._lock = threading.Lock()
+        os.makedirs(self.run_dir, exist_ok=True)
+
+    def fingerprint(self, stage: str, stage_input: Any, config: Optional[Dict] = None) -> str:
+        """
+        计算阶段指纹
+
+        stage_input 为已存在的文件路径时按文件内容计算，否则按其JSON序列化计算。
+        """
+        digest = hashlib.sha256()
+        digest.update(stage.encode('utf-8'))
+        if isinstance(stage_input, str) and os.path.isfile(stage_input):
+            with open(stage_input, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+        else:
+            digest.update(json.dumps(stage_input, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8'))
+        digest.update(json.dumps(config or {}, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+    def _stage_dir(self, stage: str, fingerprint: str) -> str:
+        return os.path.join(self.run_dir, f"{stage}-{fingerprint}")
+
+    def load(self, stage: str, fingerprint: str) -> Optional[Any]:
+        """
+        恢复阶段产物
+
+        Returns:
+            数据型产物返回数据本身；文件型产物复制回原路径并返回该路径；无检查点返回None
+        """
+        meta_path = os.path.join(self._stage_dir(stage, fingerprint), "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            os.utime(meta_path)
+            if meta.get('kind') == 'data':
+                return meta['data']
+
+            stored = os.path.join(self._stage_dir(stage, fingerprint), meta['file'])
+            output_path = meta['output_path']
+            if os.path.dirname(output_path):
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            shutil.copyfile(stored, output_path)
+            return output_path
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, stage: str, fingerprint: str, output: Any):
+        """保存阶段产物 (文件路径则复制文件，否则保存数据本身)"""
+        if not output:
+            return
+        stage_dir = self._stage_dir(stage, fingerprint)
+        os.makedirs(stage_dir, exist_ok=True)
+
+        if isinstance(output, str) and os.path.isfile(output):
+            file_name = os.path.basename(output)
+            shutil.copyfile(output, os.path.join(stage_dir, file_name))
+            meta = {'kind': 'file', 'file': file_name, 'output_path': output}
+        else:
+            meta = {'kind': 'data', 'data': output}
+
+        with open(os.path.join(stage_dir, "meta.json"), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        self.prune()
+
+    def prune(self):
+        """删除过期的阶段产物；数量超限时从最久未使用的开始删除"""
+        if self.max_entries is None and self.max_age_seconds is None:
+            return
+        with self._lock:
+            now = time.time()
+            entries = []
+            for name in os.listdir(self.run_dir):
+                stage_dir = os.path.join(self.run_dir, name)
+                try:
+                    meta_path = os.path.join(stage_dir, "meta.json")
+                    used_at = os.path.getmtime(meta_path if os.path.exists(meta_path) else stage_dir)
+                except OSError:
+                    continue
+                if self.max_age_seconds is not None and now - used_at > self.max_age_seconds:
+                    shutil.rmtree(stage_dir, ignore_errors=True)
+                    continue
+                entries.append((used_at, stage_dir))
+
+            if self.max_entries is not None and len(entries) > self.max_entries:
+                entries.sort()
+                for _, stage_dir in entries[:len(entries) - self.max_entries]:
+                    shutil.rmtree(stage_dir, ignore_errors=True)
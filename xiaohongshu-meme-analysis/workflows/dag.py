@@ -0,0 +1,79 @@
+"""基于依赖图的异步阶段调度器"""
+from typing import Any, Callable, Dict, Iterable, List
+import asyncio
+import time
+
+from utils import tracing
+
+
+class DAGScheduler:
+    """
+    依赖图调度器
+
+    每个节点在其全部依赖完成后立即启动，互不依赖的节点并行执行。
+    同步函数在线程中运行，协程函数直接在事件循环中运行。
+    节点函数接收 {依赖名: 依赖结果} 字典作为唯一参数。
+    """
+
+    def __init__(self):
+        self._nodes: Dict[str, Dict[str, Any]] = {}
+        self.timings: Dict[str, Dict[str, float]] = {}
+
+    def add(self, name: str, func: Callable[[Dict[str, Any]], Any], deps: Iterable[str] = ()):
+        """添加节点；依赖必须是已添加的节点 (因此图中不会出现环)"""
+        deps = list(deps)
+        if name in self._nodes:
+            raise ValueError(f"重复的节点: {name}")
+        missing = [dep for dep in deps if dep not in self._nodes]
+        if missing:
+            raise ValueError(f"节点 {name} 依赖未定义的节点: {missing}")
+        self._nodes[name] = {"func": func, "deps": deps}
+        return self
+
+    def run(self) -> Dict[str, Any]:
+        """执行整个依赖图，返回 {节点名: 结果}"""
+        return asyncio.run(self.run_async())
+
+    async def run_async(self) -> Dict[str, Any]:
+        """run 的异步版本；任一节点失败时取消其余节点并抛出该异常"""
+        self.timings = {}
+        origin = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_node(name: str, func: Callable, deps: List[str]) -> Any:
+            inputs = {dep: await tasks[dep] for dep in deps}
+            start = time.perf_counter()
+            # 节点Span设为当前Span，节点内的LLM/HTTP调用 (含 to_thread 线程) 记为其子Span
+            with tracing.span(name, kind="step"):
+                if asyncio.iscoroutinefunction(func):
+                    result = await func(inputs)
+                else:
+                    result = await asyncio.to_thread(func, inputs)
+            end = time.perf_counter()
+            self.timings[name] = {
+                "start": round(start - origin, 3),
+                "end": round(end - origin, 3),
+                "duration": round(end - start, 3),
+            }
+            return result
+
+        for name, node in self._nodes.items():
+            tasks[name] = asyncio.ensure_future(run_node(name, node["func"], node["deps"]))
+
+        try:
+            results = await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        return dict(zip(tasks.keys(), results))
+
+    def format_timings(self) -> str:
+        """按开始时间输出各节点耗时"""
+        lines = []
+        for name, timing in sorted(self.timings.items(), key=lambda item: item[1]["start"]):
+            lines.append(
+                f"   {name:<18} {timing['start']:>7.1f}s → {timing['end']:>7.1f}s  ({timing['duration']:.1f}s)"
+            )
+        return "\n".join(lines)
@@ -1,7 +1,9 @@
 """LLM增强的工作流编排器"""
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+import json
 import os
 import sys
+import threading
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
@@ -10,71 +12,336 @@ from agents.llm_crawler_agent import LLMCrawlerAgent
 from agents.llm_extractor_agent import LLMExtractorAgent
 from agents.llm_analyzer_agent import LLMAnalyzerAgent
 from agents.llm_writer_agent import LLMWriterAgent
-from config.llm_config import AGENT_CONFIG
+from config.llm_config import AGENT_CONFIG, CHECKPOINT_CONFIG, DEEPSEEK_CONFIG, HISTORY_CONFIG, TRACING_CONFIG
+from utils import tracing
+from utils.http_transport import get_shared_transport
+from utils.raw_store import iter_records
+from workflows.checkpoint import StageCheckpoint
+from workflows.dag import DAGScheduler
 
 
 class LLMOrchestrator:
     """LLM增强的工作流协调器 (5步工作流)"""
     
-    def __init__(self, config: Dict[str, Any] = None):
-        self.config = config or AGENT_CONFIG
+    _AGENT_CLASSES = {
+        'planner': LLMPlannerAgent,
+        'crawler': LLMCrawlerAgent,
+        'extractor': LLMExtractorAgent,
+        'analyzer': LLMAnalyzerAgent,
+        'writer': LLMWriterAgent,
+    }
+    
+    def __init__(
+        self,
+        config: Dict[str, Any] = None,
+        transport=None,
+        history=None,
+        browser=None,
+        run_dir: Optional[str] = None,
+        cache_dir: Optional[str] = None,
+        history_path: Optional[str] = None,
+    ):
+        """
+        Args:
+            config: Agent配置，默认 AGENT_CONFIG
+            transport: 共享的HTTP传输层
+            history: 共享的热梗历史库 (批量运行时多个工作流共用一个)，False 表示不记录历史
+            browser: 共享的常驻浏览器 (BrowserService)，为空时每次爬取启动新浏览器
+            run_dir: 阶段检查点目录，默认 CHECKPOINT_CONFIG['run_dir']
+            cache_dir: LLM响应缓存目录，默认 LLM_CACHE_CONFIG['cache_dir']
+            history_path: 未传入 history 时使用的历史库路径，默认 HISTORY_CONFIG['db_path']
+        """
+        self.config = config if config is not None else AGENT_CONFIG
+        
+        # 所有Agent共享同一个连接池，TLS握手每次运行只需一次
+        self.transport = transport or get_shared_transport(DEEPSEEK_CONFIG)
+        self.checkpoint = StageCheckpoint(
+            run_dir or CHECKPOINT_CONFIG['run_dir'],
+            max_entries=CHECKPOINT_CONFIG.get('max_entries'),
+            max_age_days=CHECKPOINT_CONFIG.get('max_age_days'),
+        )
+        self.cache_dir = cache_dir
+        self.last_timings: Dict[str, Dict[str, float]] = {}
+        # 本次运行中从检查点恢复的阶段
+        self.restored_stages: set = set()
+        self.last_trace_path = ""
+        # 未传入历史库时在首次写入前才打开
+        self._history = history
+        self.history_path = history_path or HISTORY_CONFIG['db_path']
         
-        # 初始化所有LLM Agents
-        self.planner = LLMPlannerAgent(self.config.get('planner', {}))
-        self.crawler = LLMCrawlerAgent(self.config.get('crawler', {}))
-        self.extractor = LLMExtractorAgent(self.config.get('extractor', {})) # 新增
-        self.analyzer = LLMAnalyzerAgent(self.config.get('analyzer', {}))
-        self.writer = LLMWriterAgent(self.config.get('writer', {}))
+        self.browser = browser
+        
+        # LLM Agents在首次使用时创建，断点续跑时已恢复的阶段不再初始化对应Agent
+        self._agents: Dict[str, Any] = {}
+        self._agents_lock = threading.Lock()
         
         print("="*60)
         print("🤖 LLM增强工作流初始化完成")
         print("🔥 全网热梗分析系统 (Tavily + Playwright + DeepSeek)")
         print("="*60)
     
-    def run(self, user_input: str) -> str:
+    @property
+    def history(self):
+        """热梗历史库，首次访问时打开 (未启用时为None)"""
+        with self._agents_lock:
+            if self._history is None and HISTORY_CONFIG.get('enabled'):
+                from utils.meme_history import MemeHistoryStore
+                self._history = MemeHistoryStore(self.history_path)
+            return self._history or None
+    
+    @property
+    def planner(self) -> LLMPlannerAgent:
+        return self._agent('planner')
+    
+    @property
+    def crawler(self) -> LLMCrawlerAgent:
+        return self._agent('crawler')
+    
+    @property
+    def extractor(self) -> LLMExtractorAgent:
+        return self._agent('extractor')
+    
+    @property
+    def analyzer(self) -> LLMAnalyzerAgent:
+        return self._agent('analyzer')
+    
+    @property
+    def writer(self) -> LLMWriterAgent:
+        return self._agent('writer')
+    
+    def _agent(self, name: str):
+        """返回指定阶段的Agent，首次使用时创建 (DAG节点并发访问，需加锁)"""
+        with self._agents_lock:
+            agent = self._agents.get(name)
+            if agent is None:
+                config = self.config.get(name, {})
+                if self.cache_dir:
+                    config = dict(config, cache_dir=self.cache_dir)
+                if name == 'crawler':
+                    agent = LLMCrawlerAgent(config, self.transport, self.browser)
+                else:
+                    agent = self._AGENT_CLASSES[name](config, self.transport)
+                self._agents[name] = agent
+            return agent
+    
+    def run(self, user_input: str, resume: bool = False) -> str:
         """
         执行完整的5步工作流
+        
+        各步骤按依赖图调度：Tavily搜索与Playwright爬取并行，
+        先完成的来源立即开始提取，关键路径只取决于最长的分支。
+        
+        Args:
+            user_input: 用户的自然语言输入
+            resume: 为True时，输入与配置未变化的阶段直接恢复上次的产物
         """
         print(f"\n{'='*60}")
         print(f"🚀 开始执行LLM增强工作流")
         print(f"💬 用户输入: {user_input}")
+        if resume:
+            print(f"♻️  断点续跑: 跳过输入未变化的阶段")
+        print(f"{'='*60}\n")
+        
+        self.restored_stages = set()
+        with self._agents_lock:
+            for agent in self._agents.values():
+                agent.degraded = None
+        # 本次运行打开的原始数据存储，运行失败时同样要关闭
+        opened_stores: List[Any] = []
+        dag = self._build_graph(user_input, resume, opened_stores)
+        tracer = tracing.Tracer("workflow", user_input=user_input, resume=resume)
+        try:
+            with tracing.activate(tracer):
+                results = dag.run()
+        finally:
+            for store in opened_stores:
+                store.close()
+            # 失败的运行同样导出，便于定位出错的步骤
+            if TRACING_CONFIG.get('enabled', True):
+                self.last_trace_path = tracer.export(TRACING_CONFIG.get('trace_dir', 'data/traces'))
+        report_path = results['writer']
+        self.last_timings = dag.timings
+        
+        print(f"{'='*60}")
+        print(f"🎉 工作流执行完成!")
+        print(f"📄 最终报告: {report_path}")
+        print(f"⏱️  节点耗时:")
+        print(dag.format_timings())
+        self._print_cache_stats()
+        self._print_trace_summary(tracer)
         print(f"{'='*60}\n")
         
+        return report_path
+    
+    def _build_graph(self, user_input: str, resume: bool, opened_stores: List[Any]) -> DAGScheduler:
+        """构建工作流依赖图 (打开的原始数据存储记录到 opened_stores，由调用方在运行结束后关闭)"""
+        dag = DAGScheduler()
+        dag.add('planner', lambda _: self._step_plan(user_input, resume))
+        dag.add('restore', lambda r: self._step_restore(r['planner'], resume), deps=['planner'])
+        dag.add('raw_store', lambda r: None if r['restore'] else self._open_store(opened_stores), deps=['restore'])
+        dag.add('tavily', lambda r: self._step_search(r['planner'], r['raw_store']), deps=['planner', 'raw_store'])
+        dag.add('playwright', lambda r: self._step_crawl(r['planner'], r['raw_store']), deps=['planner', 'raw_store'])
+        dag.add('extract_search', lambda r: self._step_extract('tavily', r['raw_store'], r['tavily']),
+                deps=['raw_store', 'tavily'])
+        dag.add('extract_realtime', lambda r: self._step_extract('playwright', r['raw_store'], r['playwright']),
+                deps=['raw_store', 'playwright'])
+        dag.add('collect', lambda r: self._step_collect(r, resume),
+                deps=['planner', 'restore', 'raw_store', 'tavily', 'playwright', 'extract_search', 'extract_realtime'])
+        dag.add('history', lambda r: self._step_history(r['collect'], user_input), deps=['collect'])
+        dag.add('analyzer', lambda r: self._step_analyze(r['collect'], resume), deps=['collect'])
+        dag.add('writer', lambda r: self._step_write(r['analyzer'], resume), deps=['analyzer'])
+        return dag
+    
+    def _open_store(self, opened_stores: List[Any]):
+        """打开本次采集的原始数据存储"""
+        store = self.crawler.open_store()
+        opened_stores.append(store)
+        return store
+    
+    def _step_plan(self, user_input: str, resume: bool) -> Dict[str, Any]:
         # Step 1: LLM Planner (规划)
         print("🧠 Step 1: LLM-Planner (规划)...")
-        plan = self.planner.execute(user_input)
+        plan = self._run_stage('planner', user_input, resume)
         print(f"   ✓ 意图: {plan.get('intent', 'unknown')}")
         print(f"   ✓ Tavily查询: {len(plan.get('tavily_queries', []))}条")
         print(f"   ✓ Playwright目标: {len(plan.get('playwright_targets', []))}个\n")
-        
-        # Step 2: Multi-Tool Crawler (数据采集)
-        print("🌐 Step 2: Multi-Tool Crawler (数据采集)...")
-        print("   └─ 2.1 Tavily搜索 (媒体报道)")
-        print("   └─ 2.2 Playwright爬取 (实时热榜)")
-        raw_data_path = self.crawler.execute(plan)
-        print(f"   ✓ 原始数据已保存: {raw_data_path}\n")
-        
-        # Step 3: LLM Extractor (结构化提取)
+        return plan
+    
+    def _step_restore(self, plan: Dict[str, Any], resume: bool) -> str:
+        """断点续跑时恢复采集阶段的检查点，返回原始数据路径 (无检查点返回空字符串)"""
+        if not resume:
+            return ""
+        fingerprint = self.checkpoint.fingerprint('crawler', plan, self.config.get('crawler', {}))
+        restored = self.checkpoint.load('crawler', fingerprint)
+        if restored:
+            print(f"   ♻️  输入未变化，复用检查点 (crawler-{fingerprint})")
+        return restored or ""
+    
+    def _step_search(self, plan: Dict[str, Any], store) -> int:
+        # Step 2.1: Tavily搜索 (媒体报道)，store为空表示已从检查点恢复
+        # 结果已逐条写入store，节点只返回条数，记录不在依赖图结果中常驻内存
+        if store is None:
+            return 0
+        print("🌐 Step 2.1: Tavily搜索 (媒体报道)...")
+        return len(self.crawler.search(plan, store))
+    
+    def _step_crawl(self, plan: Dict[str, Any], store) -> int:
+        # Step 2.2: Playwright爬取 (实时热榜)，store为空表示已从检查点恢复
+        if store is None:
+            return 0
+        print("🌐 Step 2.2: Playwright爬取 (实时热榜)...")
+        return len(self.crawler.crawl(plan, store))
+    
+    def _step_extract(self, source: str, store, count: int) -> List[Dict]:
+        """来源采集完成后从store逐条读回该来源的记录并提取 (另一来源可能仍在写入)"""
+        if not count:
+            return []
+        return self.extractor.extract(iter_records(store.path, source))
+    
+    def _step_collect(self, results: Dict[str, Any], resume: bool) -> str:
+        # Step 3: LLM Extractor (结构化提取) - 合并各来源的提取结果
         print("⛏️ Step 3: LLM-Extractor (结构化提取)...")
-        print("   └─ 从杂乱数据中提取梗信息")
-        memes_path = self.extractor.execute(raw_data_path)
+        if results['restore']:
+            memes_path = self._run_stage('extractor', results['restore'], resume)
+        else:
+            raw_data_path = self.crawler.close_store(results['raw_store'])
+            print(f"   ✓ 原始数据已保存: {raw_data_path}")
+            self._save_checkpoint('crawler', results['planner'], raw_data_path)
+            
+            memes = results['extract_search'] + results['extract_realtime']
+            memes_path = self.extractor.finalize(memes, iter_records(raw_data_path))
+            self._save_checkpoint('extractor', raw_data_path, memes_path)
         print(f"   ✓ 结构化数据已保存: {memes_path}\n")
-        
+        return memes_path
+    
+    def _step_history(self, memes_path: str, user_input: str) -> int:
+        """
+        将本次提取出的梗写入历史库 (与分析并行，不阻塞主流程)
+
+        提取结果来自检查点时，这些梗在产生该检查点的运行中已经记录过，不再重复写入，
+        否则每次断点续跑都会增加一批相同的记录，影响首次出现时间和出现次数。
+        """
+        history = self.history
+        if not history or not memes_path:
+            return 0
+        if 'extractor' in self.restored_stages:
+            print("   🗃️  提取结果来自检查点，已记录过，跳过写入历史库")
+            return 0
+        try:
+            with open(memes_path, 'r', encoding='utf-8') as f:
+                memes = json.load(f)
+            run_id = history.record_run(memes, user_input=user_input)
+            print(f"   🗃️  已记录 {len(memes)} 个梗到历史库 (run #{run_id})")
+            return run_id
+        except Exception as e:
+            print(f"   ⚠️  写入历史库失败: {e}")
+            return 0
+    
+    def _step_analyze(self, memes_path: str, resume: bool) -> str:
         # Step 4: LLM Analyzer (深度分析)
         print("📊 Step 4: LLM-Analyzer (深度分析)...")
         print("   └─ 6轮深度分析 (Top10/生态/传播/趋势/文化/商业)")
-        insights_path = self.analyzer.execute(memes_path)
+        insights_path = self._run_stage('analyzer', memes_path, resume)
         print(f"   ✓ 洞察已保存: {insights_path}\n")
-        
+        return insights_path
+    
+    def _step_write(self, insights_path: str, resume: bool) -> str:
         # Step 5: LLM Writer (报告生成)
         print("📝 Step 5: LLM-Writer (报告生成)...")
         print("   └─ 撰写4000-6000字深度报告")
-        report_path = self.writer.execute(insights_path)
+        report_path = self._run_stage('writer', insights_path, resume)
         print(f"   ✓ 报告已保存: {report_path}\n")
-        
-        print(f"{'='*60}")
-        print(f"🎉 工作流执行完成!")
-        print(f"📄 最终报告: {report_path}")
-        print(f"{'='*60}\n")
-        
         return report_path
+    
+    def _run_stage(self, stage: str, stage_input: Any, resume: bool = False) -> Any:
+        """执行单个阶段并保存检查点；断点续跑时优先恢复指纹相同的产物 (此时不创建该阶段的Agent)"""
+        fingerprint = self.checkpoint.fingerprint(stage, stage_input, self.config.get(stage, {}))
+        if resume:
+            restored = self.checkpoint.load(stage, fingerprint)
+            if restored:
+                print(f"   ♻️  输入未变化，复用检查点 ({stage}-{fingerprint})")
+                self.restored_stages.add(stage)
+                return restored
+        
+        output = self._agent(stage).execute(stage_input)
+        self._save_output(stage, fingerprint, output)
+        return output
+    
+    def _save_checkpoint(self, stage: str, stage_input: Any, output: Any):
+        """为不经过 _run_stage 的阶段保存检查点"""
+        fingerprint = self.checkpoint.fingerprint(stage, stage_input, self.config.get(stage, {}))
+        self._save_output(stage, fingerprint, output)
+    
+    def _save_output(self, stage: str, fingerprint: str, output: Any):
+        """只为成功的结果保存检查点；兜底或不完整的结果在断点续跑时重新执行"""
+        degraded = self._agent(stage).degraded
+        if degraded:
+            print(f"   ⚠️  {stage} 结果不完整 ({degraded})，不保存检查点")
+            return
+        self.checkpoint.save(stage, fingerprint, output)
+    
+    def _print_trace_summary(self, tracer: tracing.Tracer):
+        """打印本次运行的LLM调用/HTTP请求汇总"""
+        llm = tracer.totals().get('llm', {})
+        http = tracer.totals().get('http', {})
+        print(f"🔎 LLM调用 {llm.get('count', 0)} 次 (缓存命中 {llm.get('cache_hits', 0)}, 重试 {llm.get('retries', 0)}): "
+              f"prompt {llm.get('prompt_tokens', 0)} / completion {llm.get('completion_tokens', 0)} tokens")
+        print(f"🔎 HTTP请求 {http.get('count', 0)} 次: 发送 {http.get('request_bytes', 0) / 1024:.1f} KB / "
+              f"接收 {http.get('response_bytes', 0) / 1024:.1f} KB")
+        if self.last_trace_path:
+            print(f"🔎 追踪文件: {self.last_trace_path}")
+    
+    def _print_cache_stats(self):
+        """打印LLM缓存与数据源缓存命中统计"""
+        with self._agents_lock:
+            agents = dict(self._agents)
+        cache = next((agent.cache for agent in agents.values() if agent.cache), None)
+        if cache:
+            stats = cache.stats()
+            print(f"💾 LLM缓存: 命中 {stats['hits']} / 未命中 {stats['misses']} "
+                  f"(命中率 {stats['hit_rate']:.0%}, 淘汰 {stats['evictions']})")
+        crawler = agents.get('crawler')
+        if crawler and crawler.source_cache:
+            stats = crawler.source_cache.stats()
+            print(f"💾 数据源缓存: 命中 {stats['hits']} / 未命中 {stats['misses']} "
+                  f"(命中率 {stats['hit_rate']:.0%}, 淘汰 {stats['evictions']})")
@@ -0,0 +1,289 @@
+"""服务模式：常驻进程通过HTTP接收分析任务，排队执行，浏览器、连接池和缓存在任务之间保持常驻"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+import json
+import os
+import sys
+import threading
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from config.llm_config import SERVICE_CONFIG
+from workflows.batch import BatchRunner, query_slug
+
+
+class QueueFullError(Exception):
+    """排队任务数已达上限"""
+
+
+class JobQueue:
+    """
+    任务队列
+
+    任务在有界线程池中执行，最多 max_workers 个同时运行，排队数超过 max_queue 时拒绝提交。
+    相同需求 (同一数据目录，不论是否断点续跑) 已在排队或运行时直接返回该任务，避免重复执行并写入同一目录。
+    run_query(需求, 是否续跑, 任务ID) 按任务ID区分报告路径，同一需求先后完成的任务各自保留报告。
+    完成的任务记录最多保留 max_jobs 条，超出后删除最早完成的。
+    """
+
+    def __init__(self, run_query: Callable[[str, bool, str], Dict[str, Any]], max_workers: int = 2,
+                 max_queue: int = 50, max_jobs: int = 200):
+        self.run_query = run_query
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max_queue
+        self.max_jobs = max_jobs
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+
+    def submit(self, query: str, resume: bool = False) -> Tuple[Dict[str, Any], bool]:
+        """
+        提交任务
+
+        Returns:
+            (任务, 是否新建)；相同需求正在排队或运行时返回已有任务 (resume 以已有任务为准)
+
+        Raises:
+            QueueFullError: 排队任务数已达上限
+        """
+        slug = query_slug(query)
+        with self._lock:
+            for job in self._jobs.values():
+                if job['slug'] == slug and job['status'] in ('queued', 'running'):
+                    return self._view(job), False
+            if self._count('queued') >= self.max_queue:
+                raise QueueFullError(f"排队任务已达上限 ({self.max_queue})")
+
+            job = {
+                'id': uuid.uuid4().hex[:12],
+                'query': query,
+                'slug': slug,
+                'resume': resume,
+                'status': 'queued',
+                'submitted_at': datetime.now().isoformat(),
+            }
+            self._jobs[job['id']] = job
+            view = self._view(job)
+        self._pool.submit(self._run, job['id'])
+        return view, True
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._view(job) if job else None
+
+    def list(self) -> List[Dict[str, Any]]:
+        """全部任务，最新提交的在前"""
+        with self._lock:
+            return [self._view(job) for job in reversed(list(self._jobs.values()))]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'queued': self._count('queued'),
+                'running': self._count('running'),
+                'ok': self._count('ok'),
+                'failed': self._count('failed'),
+            }
+
+    def _run(self, job_id: str):
+        with self._lock:
+            job = self._jobs[job_id]
+            job['status'] = 'running'
+            job['started_at'] = datetime.now().isoformat()
+            query, resume = job['query'], job['resume']
+
+        result = self.run_query(query, resume, job_id)
+
+        with self._lock:
+            job.update({key: value for key, value in result.items() if key != 'query'})
+            job['finished_at'] = datetime.now().isoformat()
+            self._prune()
+
+    def _count(self, status: str) -> int:
+        return sum(1 for job in self._jobs.values() if job['status'] == status)
+
+    def _view(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """任务状态的副本，排队中的任务附带排队位置"""
+        view = dict(job)
+        if job['status'] == 'queued':
+            queued = [item['id'] for item in self._jobs.values() if item['status'] == 'queued']
+            view['position'] = queued.index(job['id']) + 1
+        return view
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job['status'] in ('ok', 'failed')]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_jobs)]:
+            del self._jobs[job_id]
+
+    def shutdown(self, cancel_pending: bool = True):
+        """停止接收任务并等待运行中的任务完成；cancel_pending 时取消尚未开始的任务"""
+        self._pool.shutdown(wait=True, cancel_futures=cancel_pending)
+
+
+class MemeService:
+    """
+    热梗分析HTTP服务
+
+    接口 (JSON)：
+        POST /jobs              {"query": "...", "resume": false} → 202 新任务 / 200 已有相同任务 / 429 队列已满
+        GET  /jobs              全部任务
+        GET  /jobs/<id>         任务状态 (queued/running/ok/failed)、耗时、报告路径
+        GET  /jobs/<id>/report  该任务自己的报告Markdown原文 (任务未完成时 409)
+        GET  /health            队列统计
+
+    所有任务共用一个 BatchRunner：DeepSeek连接池、LLM/数据源缓存、热梗历史库和常驻浏览器
+    在任务之间保持常驻，每个任务只需排队即可开始，不再有进程和浏览器冷启动。
+    """
+
+    def __init__(self, config: Dict[str, Any] = None, host: str = None, port: int = None,
+                 max_workers: int = None, service_config: Dict[str, Any] = None,
+                 runner: BatchRunner = None):
+        self.service_config = dict(SERVICE_CONFIG, **(service_config or {}))
+        self.runner = runner or BatchRunner(
+            config,
+            max_workers=max_workers or self.service_config.get('max_workers', 2),
+            data_root=self.service_config.get('data_root', 'data/service'),
+            report_root=self.service_config.get('report_root', 'reports/service'),
+        )
+        self.jobs = JobQueue(
+            self.runner.run_query,
+            max_workers=self.runner.max_workers,
+            max_queue=self.service_config.get('max_queue', 50),
+            max_jobs=self.service_config.get('max_jobs', 200),
+        )
+        address = (host or self.service_config.get('host', '127.0.0.1'),
+                   self.service_config.get('port', 8765) if port is None else port)
+        self._server = ThreadingHTTPServer(address, self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def warm_up(self):
+        """后台预先启动浏览器，不阻塞服务启动和任务提交"""
+        browser = self.runner.browser
+        if not browser or not self.service_config.get('warm_browser', True):
+            return
+
+        def launch():
+            try:
+                browser.warm_up()
+                print("🌐 浏览器已预热")
+            except Exception as e:
+                print(f"⚠️  浏览器预热失败 (任务中将重试): {e}")
+
+        threading.Thread(target=launch, name="browser-warm-up", daemon=True).start()
+
+    def serve_forever(self):
+        """在当前线程中运行服务，Ctrl+C 退出"""
+        self.warm_up()
+        print(f"🚀 热梗分析服务已启动: {self.url} (并发 {self.jobs.max_workers})")
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            print("\n⏹️  正在停止服务...")
+        finally:
+            self.close()
+
+    def start(self) -> "MemeService":
+        """在后台线程中运行服务 (用于测试和嵌入)"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="meme-service", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self, cancel_pending: bool = True):
+        """停止服务：默认取消排队中的任务，运行中的任务完成后再释放共享资源"""
+        if self._thread:
+            self._server.shutdown()
+            self._thread = None
+        self._server.server_close()
+        self.jobs.shutdown(cancel_pending)
+        self.runner.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _handler_class(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                service._handle_get(self, urlsplit(self.path).path.rstrip('/'))
+
+            def do_POST(self):
+                service._handle_post(self, urlsplit(self.path).path.rstrip('/'))
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def _handle_get(self, handler: BaseHTTPRequestHandler, path: str):
+        parts = path.strip('/').split('/')
+        if path == '/health':
+            return self._send_json(handler, 200, dict(status='ok', **self.jobs.stats()))
+        if path == '/jobs':
+            return self._send_json(handler, 200, {'jobs': self.jobs.list()})
+        if len(parts) in (2, 3) and parts[0] == 'jobs':
+            job = self.jobs.get(parts[1])
+            if job is None:
+                return self._send_json(handler, 404, {'error': '任务不存在'})
+            if len(parts) == 2:
+                return self._send_json(handler, 200, job)
+            if parts[2] == 'report':
+                return self._send_report(handler, job)
+        self._send_json(handler, 404, {'error': '未知路径'})
+
+    def _handle_post(self, handler: BaseHTTPRequestHandler, path: str):
+        if path != '/jobs':
+            return self._send_json(handler, 404, {'error': '未知路径'})
+        try:
+            body = handler.rfile.read(int(handler.headers.get('Content-Length') or 0))
+            payload = json.loads(body or b'{}')
+            query = str(payload.get('query') or '').strip()
+        except (ValueError, AttributeError):
+            return self._send_json(handler, 400, {'error': '请求体必须是JSON对象'})
+        if not query:
+            return self._send_json(handler, 400, {'error': '缺少 query'})
+
+        try:
+            job, created = self.jobs.submit(query, resume=bool(payload.get('resume', False)))
+        except QueueFullError as e:
+            return self._send_json(handler, 429, {'error': str(e)})
+        self._send_json(handler, 202 if created else 200, job)
+
+    def _send_report(self, handler: BaseHTTPRequestHandler, job: Dict[str, Any]):
+        if job['status'] != 'ok':
+            return self._send_json(handler, 409, {'error': f"任务状态为 {job['status']}，暂无报告"})
+        try:
+            with open(job['report'], 'rb') as f:
+                body = f.read()
+        except OSError as e:
+            return self._send_json(handler, 404, {'error': f"报告文件不存在: {e}"})
+        self._send(handler, 200, body, "text/markdown; charset=utf-8")
+
+    def _send_json(self, handler: BaseHTTPRequestHandler, status: int, payload: Any):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self._send(handler, status, body, "application/json; charset=utf-8")
+
+    @staticmethod
+    def _send(handler: BaseHTTPRequestHandler, status: int, body: bytes, content_type: str):
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)